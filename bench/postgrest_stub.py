@@ -0,0 +1,403 @@
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Local stand-in for the slice of the Supabase REST API (PostgREST) that the
+# writers and scorers use, with injectable latency and failures:
+#   POST   /rest/v1/<table>[?on_conflict=a,b]   insert / upsert (Prefer: resolution=merge|ignore-duplicates)
+#   GET    /rest/v1/<table>?select=&order=&limit=&offset=&<col>=<op>.<value>   (Range header too)
+#   PATCH  /rest/v1/<table>?<filters>           update
+#   DELETE /rest/v1/<table>?<filters>           delete
+#   GET    /_stats, POST /_reset                harness bookkeeping
+# Filter ops: eq, neq, gt, gte, lt, lte, in.(a,b), is.null. Tables live in memory
+# and are created on first write. Point SUPABASE_URL at it to use the real clients.
+# The changed_at triggers of sql/008_changed_at_watermarks.sql are emulated.
+
+# --- Constants ---
+DEFAULT_MAX_ROWS = 1000   # Supabase's default db-max-rows cap on a single select
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+# Tables whose changed_at moves only on a content change → columns ignored
+CHANGED_AT_TABLES = {
+    "advisors": ("last_updated",),
+    "advisor_drp_events": ("created_at",),
+    "firm_data": (),
+}
+
+DEFAULT_FAULTS = {
+    "latency_ms": 0.0,         # added to every request
+    "jitter_ms": 0.0,          # uniform 0..jitter on top of latency
+    "conflict_rate": 0.0,      # share of writes answered 409
+    "too_large_rate": 0.0,     # share of writes answered 413
+    "rate_limit_rate": 0.0,    # share of requests answered 429 (with Retry-After)
+    "server_error_rate": 0.0,  # share of requests answered 500/502/503
+    "max_batch_rows": None,    # writes with more rows than this get 413
+    "max_rows": DEFAULT_MAX_ROWS,
+    "seed": 7,
+}
+
+# --- Query helpers ---
+def _coerce(value):
+    if value == "null":
+        return None
+    if value in ("true", "false"):
+        return value == "true"
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value.strip('"')
+
+def _compare_key(value):
+    # Mixed None/number/str columns sort like Postgres: NULLs last, then by value
+    if value is None:
+        return (2, 0, "")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, "")
+    return (1, 0, str(value))
+
+def parse_filter(column, expression):
+    op, _, raw = expression.partition(".")
+    if op == "in":
+        # Like eq: a text column matches its numeric-looking literals as text
+        literals = [v for v in raw.strip("()").split(",") if v != ""]
+        values = {_coerce(v) for v in literals} | {v.strip('"') for v in literals}
+        return lambda row: row.get(column) in values
+    if op == "is":
+        expected = _coerce(raw)
+        return lambda row: row.get(column) is expected
+    value = _coerce(raw)
+
+    def check(row):
+        current = row.get(column)
+        if op == "eq":
+            return current == value or str(current) == str(value)
+        if op == "neq":
+            return current is not None and current != value and str(current) != str(value)
+        if current is None:
+            return False
+        # A text column compares as text even when the literal looks numeric
+        right = _compare_key(raw.strip('"') if isinstance(current, str) else value)
+        left = _compare_key(current)
+        return {"gt": left > right, "gte": left >= right, "lt": left < right, "lte": left <= right}[op]
+
+    if op not in ("eq", "neq", "gt", "gte", "lt", "lte"):
+        raise ValueError(f"Unsupported filter operator: {op}")
+    return check
+
+def parse_query(query):
+    params = parse_qsl(query, keep_blank_values=True)
+    filters = [parse_filter(column, value) for column, value in params if column not in RESERVED_PARAMS]
+    options = {column: value for column, value in params if column in RESERVED_PARAMS}
+    return filters, options
+
+def parse_prefer(header):
+    prefs = {}
+    for part in (header or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            prefs[name] = value
+    return prefs
+
+def stamp_changed_at(table_name, row, previous=None):
+    # bump_changed_at(): inserts get now(), updates keep the old stamp unless
+    # something besides the ignored columns changed
+    if table_name not in CHANGED_AT_TABLES:
+        return
+    ignored = {"changed_at", *CHANGED_AT_TABLES[table_name]}
+    if previous is not None:
+        old = {k: v for k, v in previous.items() if k not in ignored}
+        new = {k: v for k, v in row.items() if k not in ignored}
+        if old == new:
+            row["changed_at"] = previous.get("changed_at")
+            return
+    row["changed_at"] = datetime.now(timezone.utc).isoformat()
+
+# --- In-memory tables ---
+class Table:
+    def __init__(self):
+        self.rows = {}        # row key → row; insertion-ordered
+        self.next_id = 1
+
+    def key_for(self, row, conflict_columns):
+        if conflict_columns:
+            return tuple(row.get(c) for c in conflict_columns)
+        if "id" not in row:
+            row["id"] = self.next_id
+            self.next_id += 1
+        return ("id", row["id"])
+
+
+class StubState:
+    def __init__(self, faults):
+        self.faults = {**DEFAULT_FAULTS, **faults}
+        self.random = random.Random(self.faults["seed"])
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    def table(self, name):
+        if name not in self.tables:
+            self.tables[name] = Table()
+        return self.tables[name]
+
+    def record(self, method, table, status, rows=0):
+        with self.lock:
+            self.stats[f"{method} {table} {status}"] += 1
+            if rows:
+                self.stats[f"{method} {table} rows"] += rows
+
+    def roll(self, rate):
+        with self.lock:
+            return rate and self.random.random() < rate
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": dict(self.stats),
+                "tables": {name: len(t.rows) for name, t in self.tables.items()},
+            }
+
+
+# --- HTTP handler ---
+class PostgrestStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    state = None  # set per server in start_stub
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, code=None, headers=None):
+        # Same shape as PostgREST's error body, which the supabase client parses
+        self._send(status, {"code": code or str(status), "details": None, "hint": None, "message": message}, headers)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        segments = parts.path.strip("/").split("/")
+        if len(segments) == 3 and segments[:2] == ["rest", "v1"]:
+            return segments[2], parts.query
+        return None, parts.query
+
+    def _inject(self, method, table, is_write, rows=0):
+        # Returns True when a fault response was sent
+        faults = self.state.faults
+        delay = faults["latency_ms"] + (self.state.random.uniform(0, faults["jitter_ms"]) if faults["jitter_ms"] else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        if self.state.roll(faults["rate_limit_rate"]):
+            self.state.record(method, table, 429)
+            self._error(429, "Too Many Requests", headers={"Retry-After": "1"})
+            return True
+        if self.state.roll(faults["server_error_rate"]):
+            status = self.state.random.choice([500, 502, 503])
+            self.state.record(method, table, status)
+            self._error(status, "Injected server error")
+            return True
+        if is_write:
+            cap = faults["max_batch_rows"]
+            if (cap and rows > cap) or self.state.roll(faults["too_large_rate"]):
+                self.state.record(method, table, 413)
+                self._error(413, "Payload Too Large")
+                return True
+            if self.state.roll(faults["conflict_rate"]):
+                self.state.record(method, table, 409)
+                self._error(409, "duplicate key value violates unique constraint", "23505")
+                return True
+        return False
+
+    def _matching(self, table, filters):
+        return [row for row in table.rows.values() if all(f(row) for f in filters)]
+
+    # --- Verbs ---
+    def do_GET(self):
+        name, query = self._route()
+        if name is None:
+            if self.path.startswith("/_stats"):
+                return self._send(200, self.state.snapshot())
+            return self._error(404, "Not found")
+
+        if self._inject("GET", name, is_write=False):
+            return
+        try:
+            filters, options = parse_query(query)
+        except ValueError as e:
+            self.state.record("GET", name, 400)
+            return self._error(400, str(e))
+
+        with self.state.lock:
+            rows = self._matching(self.state.table(name), filters)
+
+        for spec in reversed([s for s in options.get("order", "").split(",") if s]):
+            column, _, direction = spec.partition(".")
+            rows.sort(key=lambda row: _compare_key(row.get(column)), reverse=direction.startswith("desc"))
+
+        offset = int(options.get("offset") or 0)
+        limit = int(options["limit"]) if options.get("limit") else None
+        range_header = self.headers.get("Range")
+        if range_header and "-" in range_header:
+            first, _, last = range_header.partition("-")
+            offset, limit = int(first), int(last) - int(first) + 1 if last else None
+        cap = self.state.faults["max_rows"]
+        if cap and (limit is None or limit > cap):
+            limit = cap
+        total = len(rows)
+        rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+
+        columns = [c for c in options.get("select", "*").split(",") if c]
+        if columns and columns != ["*"]:
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+
+        self.state.record("GET", name, 200, len(rows))
+        content_range = f"{offset}-{offset + len(rows) - 1}/{total}" if rows else f"*/{total}"
+        self._send(200, rows, {"Content-Range": content_range})
+
+    def do_POST(self):
+        name, query = self._route()
+        if name is None:
+            if self.path.startswith("/_reset"):
+                with self.state.lock:
+                    self.state.tables.clear()
+                    self.state.stats.clear()
+                return self._send(204)
+            return self._error(404, "Not found")
+
+        payload = self._read_body()
+        rows = payload if isinstance(payload, list) else [payload]
+        if self._inject("POST", name, is_write=True, rows=len(rows)):
+            return
+
+        _, options = parse_query(query)
+        prefer = parse_prefer(self.headers.get("Prefer"))
+        conflict_columns = [c for c in options.get("on_conflict", "").split(",") if c]
+        resolution = prefer.get("resolution")
+
+        # PostgREST rejects bulk inserts whose objects have different keys
+        if len({frozenset(row) for row in rows}) > 1:
+            self.state.record("POST", name, 400)
+            return self._error(400, "All object keys must match", "PGRST102")
+
+        with self.state.lock:
+            table = self.state.table(name)
+            rows = [dict(row) for row in rows]
+            keyed = [(table.key_for(row, conflict_columns), row) for row in rows]
+            # Without a merge/ignore preference a duplicate key fails the whole statement
+            if resolution is None and any(key in table.rows for key, _ in keyed):
+                status = 409
+            else:
+                status = 201
+                for key, row in keyed:
+                    existing = table.rows.get(key)
+                    if existing is None:
+                        # Upserts keyed on other columns still get a serial id
+                        if "id" not in row:
+                            row["id"] = table.next_id
+                            table.next_id += 1
+                        stamp_changed_at(name, row)
+                        table.rows[key] = row
+                    elif resolution == "merge-duplicates":
+                        merged = {**existing, **row}
+                        stamp_changed_at(name, merged, existing)
+                        existing.update(merged)
+
+        if status == 409:
+            self.state.record("POST", name, 409)
+            return self._error(409, "duplicate key value violates unique constraint", "23505")
+
+        self.state.record("POST", name, 201, len(rows))
+        if prefer.get("return") == "representation":
+            return self._send(201, rows)
+        self._send(201)
+
+    def do_PATCH(self):
+        name, query = self._route()
+        if name is None:
+            return self._error(404, "Not found")
+        changes = self._read_body() or {}
+        if self._inject("PATCH", name, is_write=True, rows=1):
+            return
+        filters, _ = parse_query(query)
+        with self.state.lock:
+            matched = self._matching(self.state.table(name), filters)
+            for row in matched:
+                updated = {**row, **changes}
+                stamp_changed_at(name, updated, row)
+                row.update(updated)
+        self.state.record("PATCH", name, 200, len(matched))
+        self._send(200, matched if parse_prefer(self.headers.get("Prefer")).get("return") == "representation" else [])
+
+    def do_DELETE(self):
+        name, query = self._route()
+        if name is None:
+            return self._error(404, "Not found")
+        self._read_body()  # supabase-py sends "{}"; left unread it corrupts the next keep-alive request
+        if self._inject("DELETE", name, is_write=True):
+            return
+        filters, _ = parse_query(query)
+        with self.state.lock:
+            table = self.state.table(name)
+            doomed = [key for key, row in table.rows.items() if all(f(row) for f in filters)]
+            removed = [table.rows.pop(key) for key in doomed]
+        self.state.record("DELETE", name, 200, len(removed))
+        self._send(200, removed)
+
+
+# --- Server ---
+def start_stub(port=0, **faults):
+    # Starts the stub on a background thread; returns the server, whose .url and
+    # .state (tables and request counters) the caller can inspect
+    state = StubState(faults)
+    handler = type("BoundPostgrestStubHandler", (PostgrestStubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.state = state
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="postgrest-stub", daemon=True).start()
+    return server
+
+def parse_faults(argv):
+    # --latency-ms 50 --server-error-rate 0.02 ... → {"latency_ms": 50.0, ...}
+    faults = {}
+    for i, arg in enumerate(argv):
+        if not arg.startswith("--"):
+            continue
+        name = arg[2:].replace("-", "_")
+        if name in DEFAULT_FAULTS and i + 1 < len(argv):
+            faults[name] = int(argv[i + 1]) if name in ("max_batch_rows", "max_rows", "seed") else float(argv[i + 1])
+    return faults
+
+if __name__ == "__main__":
+    # python bench/postgrest_stub.py [--port 54321] [--latency-ms 40] [--rate-limit-rate 0.05] ...
+    argv = sys.argv[1:]
+    port = int(argv[argv.index("--port") + 1]) if "--port" in argv else 54321
+    server = start_stub(port, **parse_faults(argv))
+    print(f"🧪 PostgREST stub listening on {server.url} — set SUPABASE_URL to this")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,221 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import gc
+import gzip
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+from bench.synthetic_feeds import (
+    DEFAULT_DRP_DENSITY, DEFAULT_SEED, DEFAULT_SPARSITY, drp_event_records, feed_file_names, generate_feeds,
+)
+
+# Times and memory-profiles the parsers and the scorer on synthetic feeds.
+#   python bench/run_benchmarks.py                    compare against bench/baselines.json
+#   python bench/run_benchmarks.py --save-baseline    record the current numbers as the baseline
+#   python bench/run_benchmarks.py --scales 10000 --cases parse_advisors,parse_drp_events
+# Every case runs in a fresh interpreter so one case's heap never inflates the next.
+# Timings are machine-specific: re-record the baseline on the machine you compare on.
+
+# --- Constants ---
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("BENCH_DATA_DIR", os.path.join(BENCH_DIR, "data"))
+BASELINE_FILE = os.path.join(BENCH_DIR, "baselines.json")
+SCALES = [10000, 100000, 1000000]
+# parse_firms builds the whole document tree; the live SEC + STATE feeds hold
+# ~30k firms, so the largest firm scale stays at 100k to fit a CI runner
+FIRM_MAX_SCALE = 100000
+TIME_TOLERANCE = 0.25    # slower than baseline by more than 25% → regression
+MEMORY_TOLERANCE = 0.10
+QUICK_REPEATS = 3        # best-of-N timing below this scale
+QUICK_SCALE = 100000
+
+CASES = ["parse_advisors", "parse_drp_events", "parse_firms", "score_drp_event", "score_drp_events_batch"]
+
+# --- Inputs ---
+def feed_dir(scale):
+    # Feeds are regenerated only when a setting changes
+    return os.path.join(DATA_DIR, f"n{scale}_seed{DEFAULT_SEED}_drp{DEFAULT_DRP_DENSITY}_sparse{DEFAULT_SPARSITY}")
+
+def ensure_feeds(scale, cases):
+    out_dir = feed_dir(scale)
+    names = feed_file_names(datetime(2024, 1, 2))
+    paths = {name: os.path.join(out_dir, file_name) for name, file_name in names.items()}
+    if any(case.startswith("parse_") for case in cases) and not all(os.path.exists(p) for p in paths.values()):
+        generate_feeds(out_dir, advisors=scale, firms=min(scale, FIRM_MAX_SCALE))
+    return paths
+
+def case_scales(case, scales):
+    if case == "parse_firms":
+        return [s for s in scales if s <= FIRM_MAX_SCALE]
+    return scales
+
+def load_case_input(case, scale, paths):
+    if case in ("parse_advisors", "parse_drp_events"):
+        with zipfile.ZipFile(paths["advisor"]) as z:
+            return [z.read(name) for name in z.namelist() if name.endswith(".xml")]
+    if case == "parse_firms":
+        with open(paths["firm_SEC"], "rb") as f:
+            return gzip.decompress(f.read())
+    return drp_event_records(scale)
+
+def case_function(case):
+    # Imported here so only the measured module is loaded in the child process
+    if case == "parse_advisors":
+        from ingest.fetch_and_parse_advisors import parse_advisors
+        return parse_advisors
+    if case == "parse_drp_events":
+        from ingest.ingest_all_drp_events import parse_drp_events
+        return lambda xml_files: parse_drp_events(xml_files)[0]
+    if case == "parse_firms":
+        from ingest.fetch_and_parse_firm_xml import parse_firms
+        return lambda xml: parse_firms(xml, "SEC")
+    if case == "score_drp_event":
+        from scoring.drp_severity_scoring import score_drp_event
+        return lambda events: [score_drp_event(e) for e in events]
+    if case == "score_drp_events_batch":
+        from scoring.drp_severity_scoring import score_drp_events_batch
+        return lambda events: score_drp_events_batch(events)[0]
+    raise ValueError(f"Unknown benchmark case: {case}")
+
+# --- Measurement (child process) ---
+def measure(case, scale, paths):
+    run = case_function(case)
+    data = load_case_input(case, scale, paths)
+    repeats = QUICK_REPEATS if scale < QUICK_SCALE else 1
+
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        output = run(data)
+        timings.append(time.perf_counter() - started)
+        output_count = len(output)
+        del output
+
+    # Separate pass: tracemalloc slows allocation-heavy code, so it never
+    # overlaps the timed runs. Inputs are allocated before tracing starts.
+    gc.collect()
+    tracemalloc.start()
+    output = run(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = min(timings)
+    return {
+        "seconds": round(seconds, 4),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "records_per_second": round(scale / seconds) if seconds else None,
+        "output_records": output_count,
+    }
+
+def run_case(case, scale, paths):
+    # Child prints its result as the last stdout line; parser chatter goes before it
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", case, str(scale), json.dumps(paths)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{case} @ {scale:,} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+# --- Baselines ---
+def load_baselines():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, "r") as f:
+        return json.load(f)
+
+def save_baselines(results):
+    baselines = load_baselines()
+    baselines.setdefault("results", {})
+    for case, by_scale in results.items():
+        baselines["results"].setdefault(case, {}).update(by_scale)
+    baselines["machine"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+    baselines["settings"] = {"seed": DEFAULT_SEED, "drp_density": DEFAULT_DRP_DENSITY, "sparsity": DEFAULT_SPARSITY}
+    baselines["recorded_at"] = datetime.utcnow().isoformat()
+    with open(BASELINE_FILE, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"💾 Baselines saved to {BASELINE_FILE}")
+
+def compare(case, scale, current, baseline):
+    # Returns a list of regression messages (empty when within tolerance)
+    if not baseline:
+        return []
+    problems = []
+    if current["seconds"] > baseline["seconds"] * (1 + TIME_TOLERANCE):
+        problems.append(f"time {baseline['seconds']}s → {current['seconds']}s")
+    if current["peak_mb"] > baseline["peak_mb"] * (1 + MEMORY_TOLERANCE):
+        problems.append(f"memory {baseline['peak_mb']}MB → {current['peak_mb']}MB")
+    if current["output_records"] != baseline["output_records"]:
+        problems.append(f"output {baseline['output_records']:,} → {current['output_records']:,} records")
+    return problems
+
+def format_change(current, baseline, field):
+    if not baseline or not baseline.get(field):
+        return ""
+    change = (current[field] - baseline[field]) / baseline[field] * 100
+    return f" ({change:+.0f}%)"
+
+# --- Main Function ---
+def parse_option(argv, flag, default):
+    if flag not in argv:
+        return default
+    return argv[argv.index(flag) + 1]
+
+def main(argv):
+    scales = [int(s) for s in parse_option(argv, "--scales", ",".join(map(str, SCALES))).split(",")]
+    cases = parse_option(argv, "--cases", ",".join(CASES)).split(",")
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise SystemExit(f"❌ Unknown cases: {', '.join(sorted(unknown))}")
+
+    baselines = load_baselines().get("results", {})
+    results = {}
+    regressions = []
+
+    for scale in scales:
+        paths = ensure_feeds(scale, cases)
+        for case in cases:
+            if scale not in case_scales(case, scales):
+                continue
+            current = run_case(case, scale, paths)
+            results.setdefault(case, {})[str(scale)] = current
+            baseline = baselines.get(case, {}).get(str(scale))
+            print(
+                f"📊 {case:<24} {scale:>9,}  {current['seconds']:>8.3f}s{format_change(current, baseline, 'seconds'):<7}"
+                f"  {current['peak_mb']:>9.1f} MB{format_change(current, baseline, 'peak_mb'):<7}"
+                f"  {current['records_per_second'] or 0:>10,}/s"
+            )
+            for problem in compare(case, scale, current, baseline):
+                regressions.append(f"{case} @ {scale:,}: {problem}")
+
+    if "--save-baseline" in argv:
+        save_baselines(results)
+        return 0
+
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _, _, child_case, child_scale, child_paths = sys.argv
+        print(json.dumps(measure(child_case, int(child_scale), json.loads(child_paths))))
+        sys.exit(0)
+    sys.exit(main(sys.argv[1:]))
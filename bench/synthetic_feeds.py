@@ -0,0 +1,291 @@
+import gzip
+import os
+import random
+import sys
+import zipfile
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+# Deterministic stand-ins for the SEC compilation reports:
+#   IA_INDVL_Feed_MM_DD_YYYY.xml.zip      (one or more <Indvl> XML parts)
+#   IA_FIRM_{SEC,STATE}_Feed_MM_DD_YYYY.xml.gz
+# The same seed and settings always produce byte-identical files.
+
+# --- Constants ---
+DEFAULT_SEED = 42
+DEFAULT_DRP_DENSITY = 0.08   # share of individuals with at least one DRP flag
+DEFAULT_SPARSITY = 0.15      # chance that an optional field or element is left out
+RECORDS_PER_PART = 250000    # the SEC splits the individual feed into several XML files
+WRITE_CHUNK = 2000           # records rendered per write
+
+DRP_FLAGS = [
+    "hasRegAction", "hasCriminal", "hasBankrupt", "hasCivilJudc", "hasBond",
+    "hasJudgment", "hasInvstgn", "hasCustComp", "hasTermination",
+]
+
+# Detail sections as they appear in the individual feed, per DRP flag
+DETAIL_SECTIONS = {
+    "hasCustComp": ("CustomerComplaints", "CustomerComplaintEvent"),
+    "hasCriminal": ("Criminals", "CriminalEvent"),
+    "hasRegAction": ("RegulatoryActions", "RegulatoryActionEvent"),
+    "hasBankrupt": ("Bankruptcies", "BankruptcyEvent"),
+    "hasCivilJudc": ("CivilJudgments", "CivilJudgmentEvent"),
+    "hasBond": ("Bonds", "BondEvent"),
+    "hasJudgment": ("Judgments", "JudgmentEvent"),
+    "hasInvstgn": ("Investigations", "InvestigationEvent"),
+    "hasTermination": ("Terminations", "TerminationEvent"),
+}
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Chen", "Priya",
+    "José", "Zoë", "Renée", "Mohammed", "Anne-Marie",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "O'Brien", "Nguyen", "Van Der Berg", "Müller", "St. John",
+]
+SUFFIXES = ["Jr.", "Sr.", "II", "III", "CFP"]
+FIRM_WORDS = [
+    "Capital", "Wealth", "Advisors", "Partners", "Financial", "Asset", "Management", "Planning",
+    "Investment", "Group", "Trust", "Securities", "Private", "Family Office", "Smith & Sons",
+]
+FIRM_SUFFIXES = ["LLC", "INC.", "LP", "LTD", "CORP"]
+STATES = ["CA", "NY", "TX", "FL", "IL", "PA", "OH", "GA", "NC", "MI", "NJ", "VA", "WA", "AZ", "MA", "CO"]
+CITIES = ["Springfield", "Riverside", "Franklin", "Greenville", "Bristol", "Clinton", "Fairview", "Salem", "Madison"]
+EXAMS = [("S65", "Uniform Investment Adviser Law Examination"), ("S66", "Uniform Combined State Law Examination"),
+         ("S7", "General Securities Representative Examination"), ("SIE", "Securities Industry Essentials Examination")]
+REGULATORS = ["FINRA", "SEC", "State of California", "New York Department of Financial Services", "NFA"]
+RESOLUTIONS = ["Settled", "Denied", "Closed - No Action", "Arbitration Award", "Withdrawn", "Pending"]
+ALLEGATION_PHRASES = [
+    "Client alleges unsuitable recommendations in variable annuity",
+    "Unauthorized trading in customer account",
+    "Misrepresentation of fees resulting in loss",
+    "Breach of fiduciary duty and fraud",
+    "Failure to supervise representative",
+    "Client harm from excessive trading",
+    "Late filing of Form U4 amendment",
+]
+DATE_FORMATS = ["%m/%d/%Y", "%Y-%m-%d", "%m/%Y", "%Y"]
+
+# --- Helpers ---
+def attr(value):
+    return escape(str(value), {'"': "&quot;"})
+
+def attrs(pairs):
+    return "".join(f' {name}="{attr(value)}"' for name, value in pairs if value is not None)
+
+def maybe(rng, sparsity, value):
+    return None if rng.random() < sparsity else value
+
+def random_date(rng, start_year=1990, end_year=2024):
+    start = date(start_year, 1, 1)
+    return start + timedelta(days=rng.randrange((date(end_year, 12, 31) - start).days))
+
+def firm_name(rng):
+    return f"{rng.choice(FIRM_WORDS)} {rng.choice(FIRM_WORDS)} {rng.choice(FIRM_SUFFIXES)}"
+
+def feed_file_names(feed_date):
+    stamp = feed_date.strftime("%m_%d_%Y")
+    return {
+        "advisor": f"IA_INDVL_Feed_{stamp}.xml.zip",
+        "firm_SEC": f"IA_FIRM_SEC_Feed_{stamp}.xml.gz",
+        "firm_STATE": f"IA_FIRM_STATE_Feed_{stamp}.xml.gz",
+    }
+
+# --- Individuals ---
+def drp_event_xml(rng, tag, sparsity):
+    # Mix of attribute and child-element fields, like the detail sections in the feed
+    event_date = random_date(rng, 2000).strftime(rng.choice(DATE_FORMATS))
+    fields = [
+        ("dt", maybe(rng, sparsity, event_date)),
+        ("initiatedBy", maybe(rng, sparsity, rng.choice(REGULATORS))),
+        ("resolution", maybe(rng, sparsity, rng.choice(RESOLUTIONS))),
+        ("allegations", maybe(rng, sparsity, rng.choice(ALLEGATION_PHRASES))),
+        ("damageAmt", maybe(rng, sparsity, f"{rng.randrange(1000, 2000000):,}")),
+    ]
+    body = ""
+    if rng.random() >= sparsity:
+        body = f"<Comment>{escape(rng.choice(ALLEGATION_PHRASES))}</Comment>"
+    return f"<{tag}{attrs(fields)}>{body}</{tag}>"
+
+def indvl_xml(rng, crd, firm_crds, drp_density, sparsity):
+    info = attrs([
+        ("lastNm", rng.choice(LAST_NAMES)),
+        ("firstNm", rng.choice(FIRST_NAMES)),
+        ("midNm", maybe(rng, max(sparsity, 0.5), rng.choice("ABCDEFGHJKLMNPRSTW"))),
+        ("sufNm", maybe(rng, max(sparsity, 0.9), rng.choice(SUFFIXES))),
+        ("indvlPK", crd),
+        ("actvAGReg", rng.choice("YN")),
+        ("link", f"https://adviserinfo.sec.gov/individual/summary/{crd}"),
+    ])
+    parts = [f"<Indvl><Info{info}/>"]
+
+    # Inactive individuals carry no current employment
+    if firm_crds and rng.random() >= sparsity:
+        org_pk, org_nm = rng.choice(firm_crds)
+        employer = attrs([
+            ("orgNm", org_nm),
+            ("orgPK", org_pk),
+            ("city", maybe(rng, sparsity, rng.choice(CITIES))),
+            ("state", maybe(rng, sparsity, rng.choice(STATES))),
+            ("cntry", "United States"),
+        ])
+        registration = attrs([
+            ("regAuth", rng.choice(STATES)),
+            ("regCat", rng.choice(["RA", "AG"])),
+            ("st", "APPROVED"),
+            ("stDt", random_date(rng).isoformat()),
+        ])
+        parts.append(f"<CrntEmps><CrntEmp{employer}><CrntRgstns><CrntRgstn{registration}/></CrntRgstns></CrntEmp></CrntEmps>")
+
+    if rng.random() >= sparsity:
+        exams = "".join(
+            f"<Exm{attrs([('exmCd', code), ('exmNm', name), ('exmDt', random_date(rng).isoformat())])}/>"
+            for code, name in rng.sample(EXAMS, rng.randint(1, 3))
+        )
+        parts.append(f"<Exms>{exams}</Exms>")
+
+    flagged = rng.sample(DRP_FLAGS, rng.choice([1, 1, 1, 2, 3])) if rng.random() < drp_density else []
+    flags = attrs((flag, "Y" if flag in flagged else "N") for flag in DRP_FLAGS)
+    parts.append(f"<DRPs><DRP{flags}/></DRPs>")
+
+    for flag in flagged:
+        # Some flags have no detail section in the feed and fall back to flag-level records
+        if rng.random() < sparsity:
+            continue
+        section, tag = DETAIL_SECTIONS[flag]
+        events = "".join(drp_event_xml(rng, tag, sparsity) for _ in range(rng.choice([1, 1, 2, 3])))
+        parts.append(f"<{section}>{events}</{section}>")
+
+    parts.append("</Indvl>")
+    return "".join(parts)
+
+def write_advisor_feed(path, count, seed=DEFAULT_SEED, drp_density=DEFAULT_DRP_DENSITY,
+                       sparsity=DEFAULT_SPARSITY, firm_count=None):
+    rng = random.Random(seed)
+    firm_count = firm_count or max(count // 20, 1)
+    firm_rng = random.Random(seed + 1)
+    firm_crds = [(100000 + i, firm_name(firm_rng)) for i in range(firm_count)]
+
+    # Fixed timestamps keep the archive byte-identical across runs
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        crd = 1000000
+        for part, start in enumerate(range(0, count, RECORDS_PER_PART), start=1):
+            info = zipfile.ZipInfo(os.path.basename(path).replace(".xml.zip", f"_{part}.xml"), (2024, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with z.open(info, "w") as f:
+                f.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<IAPDIndividualReport><Indvls>')
+                end = min(start + RECORDS_PER_PART, count)
+                for chunk_start in range(start, end, WRITE_CHUNK):
+                    rows = []
+                    for _ in range(chunk_start, min(chunk_start + WRITE_CHUNK, end)):
+                        crd += rng.randint(1, 7)
+                        rows.append(indvl_xml(rng, crd, firm_crds, drp_density, sparsity))
+                    f.write("".join(rows).encode("utf-8"))
+                f.write(b"</Indvls></IAPDIndividualReport>")
+    return path
+
+# --- Firms ---
+def firm_xml(rng, crd, drp_density, sparsity):
+    filing_date = random_date(rng, 2005).isoformat()
+    info = attrs([("SECRgnCD", maybe(rng, sparsity, "801")), ("FirmCrdNb", crd), ("BusNm", firm_name(rng))])
+    address = attrs([
+        ("Strt1", maybe(rng, sparsity, f"{rng.randrange(1, 9999)} Main St")),
+        ("City", maybe(rng, sparsity, rng.choice(CITIES))),
+        ("State", maybe(rng, sparsity, rng.choice(STATES))),
+        ("Cntry", "United States"),
+        ("PostlCd", maybe(rng, sparsity, f"{rng.randrange(10000, 99999)}")),
+    ])
+    # Firms with no main-office city fall back to the mailing address
+    mailing = ""
+    if rng.random() < sparsity:
+        mailing = f"<MailingAddr{attrs([('City', rng.choice(CITIES)), ('State', rng.choice(STATES)), ('PostlCd', '10001')])}/>"
+
+    item5a = attrs([("TtlEmp", maybe(rng, sparsity, rng.randrange(1, 5000)))])
+    item5f = attrs([
+        ("Q5F1", "Y"),
+        ("Q5F2C", maybe(rng, sparsity, f"{rng.randrange(0, 50_000_000_000):,}")),
+        ("Q5F2F", maybe(rng, sparsity, f"{rng.randrange(0, 20000):,}")),
+    ])
+    item6b = attrs([("Q6B1", maybe(rng, sparsity, rng.choice("YN")))])
+    form = f"<FormInfo><Part1A><Item5A{item5a}/><Item5F{item5f}/><Item6B{item6b}/></Part1A></FormInfo>"
+
+    disclosure = ""
+    if rng.random() < drp_density:
+        drps = "".join(
+            f"<DRP{attrs([('DRPType', rng.choice(['Regulatory', 'Civil'])), ('Dt', random_date(rng, 2000).isoformat())])}/>"
+            for _ in range(rng.randint(1, 4))
+        )
+        disclosure = f"<Disclosure>{drps}</Disclosure>"
+
+    return (
+        f"<Firm><Info{info}/><MainAddr{address}/>{mailing}"
+        f"<Filing{attrs([('Dt', filing_date), ('FormVrsn', '10/2021')])}/>{form}{disclosure}</Firm>"
+    )
+
+def write_firm_feed(path, count, feed_type="SEC", seed=DEFAULT_SEED, drp_density=DEFAULT_DRP_DENSITY,
+                    sparsity=DEFAULT_SPARSITY):
+    # SEC and STATE feeds draw from separate streams and CRD ranges
+    rng = random.Random(seed + (2 if feed_type == "SEC" else 3))
+    crd = 100000 if feed_type == "SEC" else 5000000
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<IAPDFirm{feed_type}Report><Firms>'.encode("utf-8"))
+        for chunk_start in range(0, count, WRITE_CHUNK):
+            rows = []
+            for _ in range(chunk_start, min(chunk_start + WRITE_CHUNK, count)):
+                rows.append(firm_xml(rng, crd, drp_density, sparsity))
+                crd += 1
+            f.write("".join(rows).encode("utf-8"))
+        f.write(f"</Firms></IAPDFirm{feed_type}Report>".encode("utf-8"))
+    return path
+
+# --- Parsed DRP events ---
+def drp_event_records(count, seed=DEFAULT_SEED, sparsity=DEFAULT_SPARSITY):
+    # Event dicts shaped like parse_drp_events output, for benchmarking the scorer
+    # at a given event count without generating a feed several times larger
+    rng = random.Random(seed + 4)
+    records = []
+    for i in range(count):
+        description = None
+        if rng.random() >= sparsity:
+            description = " ".join(rng.sample(ALLEGATION_PHRASES, rng.randint(1, 2)))
+        records.append({
+            "crd": str(1000000 + i // 2),
+            "flag_type": rng.choice(DRP_FLAGS),
+            "event_seq": i % 2,
+            "event_date": maybe(rng, sparsity, random_date(rng, 2000).isoformat()),
+            "description": description,
+            "regulator": maybe(rng, sparsity, rng.choice(REGULATORS)),
+            "resolution": maybe(rng, sparsity, rng.choice(RESOLUTIONS)),
+        })
+    return records
+
+# --- Main Function ---
+def generate_feeds(out_dir, advisors, firms, seed=DEFAULT_SEED, drp_density=DEFAULT_DRP_DENSITY,
+                   sparsity=DEFAULT_SPARSITY, feed_date=date(2024, 1, 2)):
+    os.makedirs(out_dir, exist_ok=True)
+    names = feed_file_names(feed_date)
+    paths = {name: os.path.join(out_dir, file_name) for name, file_name in names.items()}
+
+    print(f"🧪 Writing {advisors:,} individuals → {paths['advisor']}")
+    write_advisor_feed(paths["advisor"], advisors, seed, drp_density, sparsity)
+    for feed_type in ("SEC", "STATE"):
+        print(f"🧪 Writing {firms:,} {feed_type} firms → {paths[f'firm_{feed_type}']}")
+        write_firm_feed(paths[f"firm_{feed_type}"], firms, feed_type, seed, drp_density, sparsity)
+    return paths
+
+if __name__ == "__main__":
+    # python bench/synthetic_feeds.py <out_dir> [advisors] [firms] [seed] [drp_density] [sparsity]
+    args = sys.argv[1:]
+    if not args:
+        raise SystemExit("Usage: python bench/synthetic_feeds.py <out_dir> [advisors] [firms] [seed] [drp_density] [sparsity]")
+    generate_feeds(
+        args[0],
+        advisors=int(args[1]) if len(args) > 1 else 10000,
+        firms=int(args[2]) if len(args) > 2 else 1000,
+        seed=int(args[3]) if len(args) > 3 else DEFAULT_SEED,
+        drp_density=float(args[4]) if len(args) > 4 else DEFAULT_DRP_DENSITY,
+        sparsity=float(args[5]) if len(args) > 5 else DEFAULT_SPARSITY,
+    )
@@ -0,0 +1,147 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import contextlib
+import gzip
+import io
+import logging
+import time
+import zipfile
+from bench.postgrest_stub import parse_faults, start_stub
+from bench.run_benchmarks import ensure_feeds
+
+# Runs each Supabase writer against a local PostgREST stub and reports rows/sec,
+# rows actually stored and the responses it got back:
+#   python bench/writer_throughput.py --scale 10000
+#   python bench/writer_throughput.py --writers firms,event_scores --latency-ms 40 --rate-limit-rate 0.05
+# Fault flags are the keys of bench.postgrest_stub.DEFAULT_FAULTS (--server-error-rate,
+# --max-batch-rows, ...). No request leaves the machine.
+
+# --- Constants ---
+DEFAULT_SCALE = 10000
+STUB_KEY = "stub.stub.stub"  # JWT-shaped so the supabase client accepts it
+WRITERS = ["advisors", "drp_events", "firms", "event_scores", "rollups"]
+
+# --- Inputs ---
+def load_inputs(scale):
+    # Parsed once up front so only the writes are timed
+    from ingest.fetch_and_parse_advisors import parse_advisors
+    from ingest.fetch_and_parse_firm_xml import parse_firms
+    from ingest.ingest_all_drp_events import parse_drp_events
+
+    paths = ensure_feeds(scale, ["parse_advisors"])
+    with zipfile.ZipFile(paths["advisor"]) as z:
+        xml_files = [z.read(name) for name in z.namelist() if name.endswith(".xml")]
+    with open(paths["firm_SEC"], "rb") as f:
+        firm_xml = gzip.decompress(f.read())
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {
+            "advisors": parse_advisors(xml_files),
+            "drp_events": parse_drp_events(xml_files)[0],
+            "firms": parse_firms(firm_xml, "SEC"),
+        }
+
+def point_clients_at(url):
+    from storage.clients import get_settings, reset_clients
+    os.environ["SUPABASE_URL"] = url
+    os.environ["SUPABASE_KEY"] = STUB_KEY
+    get_settings.cache_clear()
+    reset_clients()
+
+# --- Writers ---
+def prepare_writer(name, inputs):
+    # Returns (table, rows the writer is given, call) so the write itself is all that is timed
+    if name == "advisors":
+        from storage.write_advisors_to_supabase import write_advisors_to_supabase
+        rows = inputs["advisors"]
+        return "advisors", len(rows), lambda: write_advisors_to_supabase(rows, batch_size=100, upsert_on="crd_number")
+
+    if name == "drp_events":
+        from storage.write_drp_events_to_supabase import write_drp_events_to_supabase
+        rows = inputs["drp_events"]
+        return "advisor_drp_events", len(rows), lambda: write_drp_events_to_supabase(rows)
+
+    if name == "firms":
+        from ingest.fetch_and_parse_firm_xml import write_firms_to_supabase
+        rows = inputs["firms"]
+        return "firm_data", len(rows), lambda: write_firms_to_supabase(rows)
+
+    from storage.clients import supabase
+    from scoring.drp_severity_scoring import BATCH_SIZE, RULES, SCORING_VERSION
+    from scoring.event_scores import build_event_score_rows, write_event_scores
+    rows = build_event_score_rows(inputs["drp_events"], set(), RULES)
+
+    if name == "event_scores":
+        return "drp_event_scores", len(rows), lambda: write_event_scores(supabase, rows, set(), BATCH_SIZE)
+
+    if name == "rollups":
+        from scoring.advisor_rollups import apply_rollup_deltas, summarize_deltas
+        deltas = summarize_deltas((r["crd"] for r in rows), (r["adjusted_score"] for r in rows))
+        return "advisor_drp_scores", len(deltas), lambda: apply_rollup_deltas(supabase, deltas, SCORING_VERSION)
+
+    raise ValueError(f"Unknown writer: {name}")
+
+def measure_writer(server, name, inputs):
+    table, sent, call = prepare_writer(name, inputs)
+    before = server.state.snapshot()
+    started = time.perf_counter()
+    error = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            call()
+    except Exception as e:
+        error = f"{type(e).__name__}: {str(e)[:120]}"
+    seconds = time.perf_counter() - started
+
+    after = server.state.snapshot()
+    counts = {
+        key: value - before["requests"].get(key, 0)
+        for key, value in after["requests"].items()
+        if value != before["requests"].get(key, 0) and not key.endswith(" rows")
+    }
+    stored = after["tables"].get(table, 0) - before["tables"].get(table, 0)
+    return {
+        "seconds": round(seconds, 3),
+        "rows_sent": sent,
+        "rows_stored": stored,
+        "rows_per_second": round(stored / seconds) if stored and seconds else 0,
+        "requests": counts,
+        "error": error,
+    }
+
+# --- Main Function ---
+def main(argv):
+    scale = int(argv[argv.index("--scale") + 1]) if "--scale" in argv else DEFAULT_SCALE
+    writers = argv[argv.index("--writers") + 1].split(",") if "--writers" in argv else WRITERS
+    unknown = set(writers) - set(WRITERS)
+    if unknown:
+        raise SystemExit(f"❌ Unknown writers: {', '.join(sorted(unknown))}")
+
+    faults = parse_faults(argv)
+    print(f"🧪 Preparing {scale:,}-record inputs...")
+    inputs = load_inputs(scale)
+    server = start_stub(**faults)
+    point_clients_at(server.url)
+    logging.basicConfig(level=logging.WARNING)
+    print(f"🧪 Stub at {server.url} with faults: {faults or 'none'}\n")
+
+    failed = False
+    for name in writers:
+        result = measure_writer(server, name, inputs)
+        requests_summary = ", ".join(f"{key.split()[0]} {key.split()[-1]}×{count}" for key, count in sorted(result["requests"].items()))
+        print(
+            f"📊 {name:<14} {result['seconds']:>8.2f}s  sent {result['rows_sent']:>8,}  "
+            f"stored {result['rows_stored']:>8,}  {result['rows_per_second']:>9,} rows/s  [{requests_summary}]"
+        )
+        if result["error"]:
+            print(f"   ❌ aborted: {result['error']}")
+        if result["error"] or any(not key.split()[-1].startswith("2") for key in result["requests"]):
+            failed = True
+
+    server.shutdown()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+# --- Priority Weights ---
+NEVER_FETCHED_PRIORITY = 1000
+DISCLOSURE_CHANGE_PRIORITY = 500
+FIRM_CHANGE_PRIORITY = 300
+STALENESS_PER_DAY = 1
+MAX_STALENESS_DAYS = 365
+
+def snapshot(advisor):
+    return [
+        bool(advisor.get("has_disclosures")),
+        advisor.get("disclosures_count") or 0,
+        str(advisor["firm_crd_number"]) if advisor.get("firm_crd_number") else None,
+    ]
+
+def detect_changes(advisors, state):
+    # Compare each advisor with the last run's snapshot; changes stay pending until refreshed
+    previous = state["advisors"]
+    pending = state["pending"]
+    seen = {}
+    changed = 0
+
+    for advisor in advisors:
+        crd = str(advisor["crd_number"])
+        current = snapshot(advisor)
+        before = previous.get(crd)
+        seen[crd] = current
+
+        if before is None or before == current:
+            continue
+
+        priority = 0
+        if before[0] != current[0] or before[1] != current[1]:
+            priority += DISCLOSURE_CHANGE_PRIORITY
+        if before[2] != current[2]:
+            priority += FIRM_CHANGE_PRIORITY
+        pending[crd] = max(pending.get(crd, 0), priority)
+        changed += 1
+
+    # Advisors that left the feed drop out of the persisted state
+    state["advisors"] = seen
+    state["pending"] = {crd: p for crd, p in pending.items() if crd in seen}
+    return changed
+
+def parse_fetched_at(value):
+    if not value:
+        return None
+    try:
+        fetched = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if fetched.tzinfo is not None:
+        fetched = fetched.astimezone(timezone.utc).replace(tzinfo=None)
+    return fetched
+
+def score_crd(crd, fetched_at, state, now):
+    priority = state["pending"].get(crd, 0)
+    if crd not in fetched_at:
+        return priority + NEVER_FETCHED_PRIORITY
+
+    fetched = parse_fetched_at(fetched_at[crd])
+    if fetched is None:
+        stale_days = MAX_STALENESS_DAYS
+    else:
+        stale_days = min(max((now - fetched).days, 0), MAX_STALENESS_DAYS)
+    return priority + stale_days * STALENESS_PER_DAY
+
+def build_refresh_queue(advisors, fetched_at, state, now=None, budget=None):
+    # fetched_at: {crd: last_fetched_at} from advisor_advs
+    now = now or datetime.utcnow()
+    detect_changes(advisors, state)
+
+    scored = [(score_crd(crd, fetched_at, state, now), crd) for crd in state["advisors"]]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    if budget is not None:
+        scored = scored[:budget]
+    return [crd for _, crd in scored]
+
+def mark_refreshed(crds, state):
+    for crd in crds:
+        state["pending"].pop(str(crd), None)
@@ -0,0 +1,190 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
+import io
+import logging
+import re
+from storage.clients import supabase
+from storage.adv_text_cache import load_adv_text_cache, save_adv_text_cache
+from storage.object_store import LocalObjectStore, S3ObjectStore
+from storage.supabase_mirror import refresh_mirror
+
+# --- Constants ---
+ADV_PDF_PREFIX = os.getenv("ADV_PDF_PREFIX", "adv_pdfs/")
+LOCAL_OBJECT_STORE = os.getenv("LOCAL_OBJECT_STORE")  # Directory used instead of S3 when set
+CHUNK_SIZE = 200  # PDFs downloaded + extracted per round
+DOWNLOAD_WORKERS = 16
+EXTRACT_WORKERS = os.cpu_count() or 1
+WRITE_BATCH_SIZE = 100
+
+# One alternation so each document is scanned once for every flag
+KEYWORD_PATTERN = re.compile(
+    r"(?P<mentions_fiduciary>\bfiduciar(?:y|ies)\b)|(?P<mentions_fee_only>\bfee[\s\-]*only\b)",
+    re.IGNORECASE,
+)
+KEYWORD_FLAGS = list(KEYWORD_PATTERN.groupindex)
+
+# --- Logging Setup ---
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler("extract_adv_text.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+# The PDFs under adv_pdfs/ are the advisors' individual IAPD reports
+# (populate_advisor_advs: individual_{crd}.pdf stored as adv_pdfs/{crd}.pdf), so
+# the key holds an advisor CRD and the keyword flags describe that report. They
+# are written to the advisor's advisor_advs row next to the report URL. No firm
+# ADV Part 2 brochure is collected, so firm_data's mentions_* columns are left
+# unset rather than inferred from individual reports.
+
+# --- Helper Functions ---
+def crd_from_key(key):
+    # Advisor (individual) CRD the report was stored under
+    stem = os.path.splitext(os.path.basename(key))[0]
+    return int(stem) if stem.isdigit() else None
+
+def scan_keywords(text):
+    flags = dict.fromkeys(KEYWORD_FLAGS, False)
+    remaining = len(flags)
+    for match in KEYWORD_PATTERN.finditer(text):
+        if not flags[match.lastgroup]:
+            flags[match.lastgroup] = True
+            remaining -= 1
+            if not remaining:
+                break
+    return flags
+
+def extract_pdf(job):
+    # Runs in a worker process: parse the PDF and compute the keyword flags.
+    # pypdf is imported here so run_nightly's eager stage imports stay cheap
+    from pypdf import PdfReader
+    key, digest, pdf_bytes = job
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        pages = [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        return key, digest, None, f"{type(e).__name__}: {e}"
+
+    text = " ".join(" ".join(pages).split())
+    return key, digest, scan_keywords(text), None
+
+def get_object_store():
+    if LOCAL_OBJECT_STORE:
+        logging.info(f"🗂️ Using local object store at {LOCAL_OBJECT_STORE}")
+        return LocalObjectStore(LOCAL_OBJECT_STORE)
+    return S3ObjectStore()
+
+def load_advisor_adv_crds():
+    # CRDs that already have an advisor_advs row, from the local mirror
+    mirror = refresh_mirror(["advisor_advs"])
+    crds = {int(crd) for (crd,) in mirror.execute("SELECT crd FROM advisor_advs WHERE crd IS NOT NULL")}
+    mirror.close()
+    return crds
+
+def advisor_flags(keys, cache):
+    # {advisor CRD: keyword flags of their stored report}
+    flags_by_advisor = {}
+    for key in keys:
+        crd = crd_from_key(key)
+        flags = cache["documents"].get(cache["keys"].get(key))
+        if crd is not None and flags is not None:
+            flags_by_advisor[crd] = flags
+    return flags_by_advisor
+
+def write_advisor_flags(keys, cache, existing_crds):
+    # Writes advisors whose flags changed since the last successful write. Only
+    # existing advisor_advs rows are updated, so partial rows never insert stubs;
+    # the rest stay unrecorded and are retried next run.
+    current = advisor_flags(keys, cache)
+    written = cache["advisors"]
+    rows = [
+        {"crd": crd, **flags} for crd, flags in sorted(current.items())
+        if crd in existing_crds and written.get(str(crd)) != flags
+    ]
+
+    for i in range(0, len(rows), WRITE_BATCH_SIZE):
+        batch = rows[i:i + WRITE_BATCH_SIZE]
+        supabase.table("advisor_advs").upsert(batch, on_conflict="crd").execute()
+        for row in batch:
+            written[str(row["crd"])] = current[row["crd"]]
+    return len(rows)
+
+def process_chunk(keys, store, cache, download_pool, extract_pool):
+    documents = cache["documents"]
+    jobs = []
+    keys_by_digest = {}
+    skipped = 0
+
+    for key, pdf_bytes in zip(keys, download_pool.map(store.get_bytes, keys)):
+        if not pdf_bytes:
+            logging.warning(f"⚠️ Could not read {key}")
+            continue
+
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        if cache["keys"].get(key) == digest:
+            skipped += 1
+            continue
+
+        if digest in documents:
+            # Same bytes already extracted under another key: reuse the flags
+            cache["keys"][key] = digest
+            continue
+
+        if digest not in keys_by_digest:
+            keys_by_digest[digest] = []
+            jobs.append((key, digest, pdf_bytes))
+        keys_by_digest[digest].append(key)
+
+    for key, digest, flags, error in extract_pool.map(extract_pdf, jobs):
+        if error:
+            logging.warning(f"⚠️ Text extraction failed for {key}: {error}")
+            continue
+
+        documents[digest] = flags
+        for same_key in keys_by_digest[digest]:
+            cache["keys"][same_key] = digest
+
+    return len(jobs), skipped
+
+# --- Main Function ---
+def main():
+    store = get_object_store()
+    cache = load_adv_text_cache()
+
+    keys = [k for k in store.list_keys(ADV_PDF_PREFIX) if k.lower().endswith(".pdf")]
+    logging.info(f"📄 Found {len(keys):,} ADV PDFs under {ADV_PDF_PREFIX}")
+
+    extracted_total = skipped_total = 0
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as download_pool, \
+            ProcessPoolExecutor(max_workers=EXTRACT_WORKERS) as extract_pool:
+        for i in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[i:i + CHUNK_SIZE]
+            extracted, skipped = process_chunk(chunk, store, cache, download_pool, extract_pool)
+            extracted_total += extracted
+            skipped_total += skipped
+
+            # Save after every chunk so a crash never loses finished extractions
+            save_adv_text_cache(cache)
+            logging.info(f"📦 {i + len(chunk):,}/{len(keys):,} | Extracted: {extracted} | Unchanged: {skipped}")
+
+    written_total = write_advisor_flags(keys, cache, load_advisor_adv_crds())
+    save_adv_text_cache(cache)
+
+    logging.info(
+        f"✅ ADV text extraction complete. Extracted {extracted_total}, "
+        f"skipped {skipped_total} unchanged, updated {written_total} advisors."
+    )
+    return written_total
+
+if __name__ == "__main__":
+    setup_logging()
+    main()
@@ -0,0 +1,118 @@
+import io
+import zipfile
+import xml.etree.ElementTree as ET
+import requests
+
+BLOCK_SIZE = 256 * 1024
+MAX_CACHED_BLOCKS = 4
+
+class HttpRangeFile(io.RawIOBase):
+    # Seekable read-only view of a remote file; every read is served from
+    # fixed-size blocks fetched with HTTP Range requests. Use as a context
+    # manager (or call close()) to release the cached blocks and, when no
+    # session was passed in, the connection pool.
+    def __init__(self, url, block_size=BLOCK_SIZE, session=None):
+        self.url = url
+        self.block_size = block_size
+        self._owns_session = session is None
+        self.session = session or requests.Session()
+        self.position = 0
+        self.bytes_fetched = 0
+        self.requests_made = 0
+        self._blocks = {}
+        try:
+            self.size = self._remote_size()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.closed:
+            self._blocks.clear()
+            if self._owns_session:
+                self.session.close()
+        super().close()
+
+    def _remote_size(self):
+        response = self.session.get(self.url, headers={"Range": "bytes=0-0"}, stream=True)
+        self.requests_made += 1
+        content_range = response.headers.get("Content-Range", "")
+        response.close()
+        if response.status_code != 206 or "/" not in content_range:
+            raise Exception(f"Server does not support range requests for {self.url}: {response.status_code}")
+        return int(content_range.rsplit("/", 1)[1])
+
+    def _block(self, index):
+        block = self._blocks.get(index)
+        if block is None:
+            start = index * self.block_size
+            end = min(start + self.block_size, self.size) - 1
+            response = self.session.get(self.url, headers={"Range": f"bytes={start}-{end}"})
+            if response.status_code != 206:
+                raise Exception(f"Range request failed for {self.url}: {response.status_code}")
+            block = response.content
+            self.requests_made += 1
+            self.bytes_fetched += len(block)
+            if len(self._blocks) >= MAX_CACHED_BLOCKS:
+                self._blocks.pop(next(iter(self._blocks)))
+            self._blocks[index] = block
+        return block
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        return self.position
+
+    def readinto(self, buffer):
+        if self.closed:
+            raise ValueError(f"I/O operation on closed HttpRangeFile for {self.url}")
+        view = memoryview(buffer).cast("B")
+        written = 0
+        while written < len(view) and self.position < self.size:
+            index, offset = divmod(self.position, self.block_size)
+            chunk = self._block(index)[offset:offset + len(view) - written]
+            view[written:written + len(chunk)] = chunk
+            written += len(chunk)
+            self.position += len(chunk)
+        return written
+
+def sample_feed_xml(zip_url, limit, record_tag="Indvl"):
+    # Reads the ZIP central directory and streams the first XML member only
+    # until `limit` records are parsed; returns one small well-formed XML
+    # document with those records, usable by the normal parse_* functions
+    records = []
+    root_tag = None
+
+    with HttpRangeFile(zip_url) as remote, zipfile.ZipFile(remote) as z:
+        name = next(n for n in z.namelist() if n.endswith(".xml"))
+        with z.open(name) as member:
+            for event, elem in ET.iterparse(member, events=("start", "end")):
+                if event == "start":
+                    if root_tag is None:
+                        root_tag = elem.tag
+                    continue
+                if elem.tag != record_tag:
+                    continue
+                records.append(ET.tostring(elem))
+                elem.clear()
+                if len(records) >= limit:
+                    break
+
+    print(
+        f"🧪 Sampled {len(records)} <{record_tag}> records from {name} "
+        f"using {remote.requests_made} range requests ({remote.bytes_fetched / 1e6:.1f} MB of {remote.size / 1e6:.1f} MB)"
+    )
+    return b"".join([f"<{root_tag}>".encode(), *records, f"</{root_tag}>".encode()])
@@ -5,18 +5,13 @@ import zipfile
 import io
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-
-load_dotenv()  # ✅ This must run BEFORE os.getenv(...)
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from storage.write_advisors_to_supabase import write_advisors_to_supabase
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise RuntimeError("Missing SUPABASE_URL or SUPABASE_KEY environment variable.")
+from ingest.ingest_all_drp_events import count_disclosure_events
+from storage.advisor_records import AdvisorRecord, to_crd
+from storage.clients import require_supabase_settings
+from storage.feed_archive import archive_records, feed_date_from_url
 
 def get_advisor_feed_url():
     base_url = "https://reports.adviserinfo.sec.gov/reports/CompilationReports/IA_INDVL_Feed_{}.xml.zip"
@@ -54,16 +49,25 @@ def parse_advisors(xml_contents):
     today_str = datetime.today().strftime("%Y-%m-%d")
 
     for xml_content in xml_contents:
-        root = ET.fromstring(xml_content)
-        for rep in root.iter("Indvl"):
+        # Stream each <Indvl> and drop it once its record is built
+        for _, rep in ET.iterparse(io.BytesIO(xml_content)):
+            if rep.tag != "Indvl":
+                continue
+
             info = rep.find("Info")
             drps = rep.find("DRPs")
             crnt_emps = rep.find("CrntEmps")
+            # Same count update_advisor_disclosure_flags keeps in sync from the event rows
+            disclosure_count = count_disclosure_events(drps, rep.find) if drps is not None else 0
+            rep.clear()
 
             if info is None:
                 continue
 
-            crd = info.attrib.get("indvlPK")
+            crd = to_crd(info.attrib.get("indvlPK"))
+            if crd is None:
+                continue
+
             first = info.attrib.get("firstNm", "")
             last = info.attrib.get("lastNm", "")
             mid = info.attrib.get("midNm", "")
@@ -78,42 +82,31 @@ def parse_advisors(xml_contents):
             if crnt_emps is not None:
                 first_emp = crnt_emps.find("CrntEmp")
                 if first_emp is not None:
-                    firm_crd = first_emp.attrib.get("orgPK")
+                    firm_crd = to_crd(first_emp.attrib.get("orgPK"))
                     firm_name = first_emp.attrib.get("orgNm")
                     status = "Active"
 
-            has_disclosures = False
-            disclosure_count = 0
-            if drps is not None:
-                has_disclosures = any(
-                    drps.attrib.get(k, "N") == "Y" for k in drps.attrib
-                )
-                disclosure_count = sum(
-                    1 for k, v in drps.attrib.items() if v == "Y"
-                )
-
-            if not crd:
-                continue
-
-            advisors[crd] = {
-                "CRD Number": crd,
-                "Advisor Name": name,
-                "Firm CRD Number": firm_crd,
-                "Firm Name": firm_name,
-                "Status": status,
-                "Has Disclosures": has_disclosures,
-                "Disclosures Count": disclosure_count,
-                "Last Updated": today_str,
-            }
+            advisors[crd] = AdvisorRecord(
+                crd, name, firm_crd, firm_name, status,
+                disclosure_count > 0, disclosure_count, today_str,
+            )
 
     print(f"✅ Total unique advisors parsed: {len(advisors)}")
     return list(advisors.values())
 
 
-if __name__ == "__main__":
-    feed_url = get_advisor_feed_url()
-    xml_files = download_and_extract_xml_files(feed_url)
+def ingest_advisors(xml_files, feed_date=None):
     parsed_advisors = parse_advisors(xml_files)
 
     print(f"\n📤 Sending {len(parsed_advisors)} advisor records to Supabase...")
     write_advisors_to_supabase(parsed_advisors, batch_size=100, upsert_on="crd_number", resume_from_checkpoint=True)
+    # Archived after the write, so the archive never holds up the database
+    archive_records("advisors", feed_date, parsed_advisors)
+    return len(parsed_advisors)
+
+
+if __name__ == "__main__":
+    require_supabase_settings()  # Fail before downloading the feed
+    feed_url = get_advisor_feed_url()
+    xml_files = download_and_extract_xml_files(feed_url)
+    ingest_advisors(xml_files, feed_date_from_url(feed_url))
@@ -1,24 +1,24 @@
-from supabase import create_client, Client
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 import os
 import requests
 import xml.etree.ElementTree as ET
 import zipfile
 import gzip
 import io
-import pandas as pd
 import math
+import sys
 from collections import Counter
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from storage.clients import supabase
+from storage.feed_archive import archive_records, feed_date_from_url
 from storage.firm_cache import load_previous_firms, save_current_firms
 
-# ✅ Load environment variables
-load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 DRY_RUN = False  # Set to False to enable DB write
+FIRM_BATCH_SIZE = 50
+FIRM_FLOAT_COLUMNS = ("total_regulatory_aum",)
+# Not in the feed and owned by other processes; never sent from the feed, or
+# every changed firm would have them reset to null
+NON_FEED_COLUMNS = ("adv_part2_url", "adv_part2_text", "disclosure_summary", "mentions_fiduciary", "mentions_fee_only")
 
 
 def get_firm_feed_url(feed_type="SEC"):
@@ -52,12 +52,25 @@ def download_and_extract_xml(url):
         return response.content
 
 
-def sanitize_floats(obj):
-    if isinstance(obj, dict):
-        return {k: sanitize_floats(v) for k, v in obj.items()}
-    elif isinstance(obj, float):
-        return obj if math.isfinite(obj) else None
-    return obj
+def build_firm_rows(firms):
+    # Single pass over parsed firms: keep the first row per CRD, format
+    # filing_date for JSON and map non-finite floats to None
+    seen = set()
+    rows = []
+    for firm in firms:
+        crd = firm["crd_number"]
+        if crd in seen:
+            continue
+        seen.add(crd)
+
+        row = {k: v for k, v in firm.items() if k not in NON_FEED_COLUMNS}
+        row["filing_date"] = firm["filing_date"].strftime("%Y-%m-%d")
+        for column in FIRM_FLOAT_COLUMNS:
+            value = row[column]
+            if value is not None and not math.isfinite(value):
+                row[column] = None
+        rows.append(row)
+    return rows
 
 
 def audit_field_completeness(records, fields):
@@ -174,47 +187,50 @@ def write_firms_to_supabase(firms):
         print("🚫 Skipping DB write due to DRY_RUN mode")
         return
 
-    df = pd.DataFrame(firms)
-    df = df.drop_duplicates(subset=["crd_number"])
-    df["filing_date"] = df["filing_date"].dt.strftime("%Y-%m-%d")
-    records = [sanitize_floats(r) for r in df.to_dict(orient="records")]
+    rows = build_firm_rows(firms)
 
-    BATCH_SIZE = 50
-    for i in range(0, len(records), BATCH_SIZE):
-        batch = records[i:i + BATCH_SIZE]
-        supabase.table("firm_data").upsert(batch, on_conflict=["crd_number"]).execute()
+    for i in range(0, len(rows), FIRM_BATCH_SIZE):
+        batch = rows[i:i + FIRM_BATCH_SIZE]
+        supabase.table("firm_data").upsert(batch, on_conflict="crd_number").execute()
         print(f"⬆️ Uploaded {len(batch)} firms")
 
 
+def ingest_firm_feed(xml_data, feed_type, feed_date=None):
+    parsed_firms = parse_firms(xml_data, registration_type=feed_type)
+
+    previous_firms = load_previous_firms()
+    new_or_updated = []
+    for firm in parsed_firms:
+        # Force all firms to be considered updated for this test run
+        new_or_updated.append(firm)
+
+    print(f"📌 New or updated firms: {len(new_or_updated)}")
+
+    audit_field_completeness(
+        new_or_updated,
+        fields=[
+            "total_regulatory_aum",
+            "total_employees",
+            "client_count",
+            "office_city",
+            "office_state",
+            "office_zip",
+            "dual_registrant",
+            "firm_drp_count",
+            "has_drp_flag"
+        ]
+    )
+
+    write_firms_to_supabase(new_or_updated)
+    save_current_firms(parsed_firms)
+    # Archived after the write, so the archive never holds up the database
+    archive_records(f"firms_{feed_type.lower()}", feed_date, parsed_firms)
+    return len(parsed_firms)
+
+
 if __name__ == "__main__":
     for feed_type in ["SEC", "STATE"]:
         print(f"\n🚀 Ingesting {feed_type} firm feed")
         FIRM_FEED_URL = get_firm_feed_url(feed_type=feed_type)
         xml_data = download_and_extract_xml(FIRM_FEED_URL)
-        parsed_firms = parse_firms(xml_data, registration_type=feed_type)
-
-        previous_firms = load_previous_firms()
-        new_or_updated = []
-        for firm in parsed_firms:
-            # Force all firms to be considered updated for this test run
-            new_or_updated.append(firm)
-
-        print(f"📌 New or updated firms: {len(new_or_updated)}")
-
-        audit_field_completeness(
-            new_or_updated,
-            fields=[
-                "total_regulatory_aum",
-                "total_employees",
-                "client_count",
-                "office_city",
-                "office_state",
-                "office_zip",
-                "dual_registrant",
-                "firm_drp_count",
-                "has_drp_flag"
-            ]
-        )
-
-        write_firms_to_supabase(new_or_updated)
-        save_current_firms(parsed_firms)
+        ingest_firm_feed(xml_data, feed_type, feed_date_from_url(FIRM_FEED_URL))
@@ -0,0 +1,99 @@
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from storage.advisor_records import ADVISOR_COLUMNS, AdvisorRecord
+from storage.clients import supabase
+from storage.feed_archive import list_partitions, read_partition
+from storage.firm_summary_cache import load_firm_summaries, save_firm_summaries
+from storage.supabase_mirror import refresh_mirror
+
+# --- Constants ---
+SUMMARY_TABLE = "firm_advisor_summaries"
+SUMMARY_BATCH_SIZE = 1000
+DELETE_BATCH_SIZE = 500
+
+# --- Aggregation ---
+def load_archived_advisors():
+    # The advisors parsed from the latest feed, as archived by ingest_advisors;
+    # the advisors table also keeps advisors who have left the feed
+    feed_dates = list_partitions("advisors")
+    if not feed_dates:
+        raise Exception("❌ No archived advisor feed found — run the advisors stage first.")
+    data = read_partition("advisors", feed_dates[-1], ADVISOR_COLUMNS)
+    return [AdvisorRecord(*values) for values in zip(*(data[c] for c in ADVISOR_COLUMNS))]
+
+def build_firm_index(advisors):
+    # {firm_crd: [AdvisorRecord, ...]} in one pass over the parsed feed
+    index = {}
+    for advisor in advisors:
+        if advisor.firm_crd_number is None:
+            continue
+        members = index.get(advisor.firm_crd_number)
+        if members is None:
+            index[advisor.firm_crd_number] = [advisor]
+        else:
+            members.append(advisor)
+    return index
+
+def load_drp_scores():
+    # {crd: drp_score} from the local mirror; rollups are keyed by the CRD as text
+    mirror = refresh_mirror(["advisor_drp_scores"])
+    rows = mirror.execute("SELECT crd, drp_score FROM advisor_drp_scores WHERE drp_score IS NOT NULL")
+    scores = {str(crd): score for crd, score in rows}
+    mirror.close()
+    return scores
+
+def summarize_firm(firm_crd, members, drp_scores):
+    active = sum(1 for a in members if a.status == "Active")
+    disclosed = sum(1 for a in members if a.has_disclosures)
+    scores = [drp_scores[str(a.crd_number)] for a in members if str(a.crd_number) in drp_scores]
+    names = Counter(a.firm_name for a in members if a.firm_name)
+    return {
+        "firm_crd_number": firm_crd,
+        "firm_name": names.most_common(1)[0][0] if names else None,
+        "advisor_count": len(members),
+        "active_count": active,
+        "inactive_count": len(members) - active,
+        "disclosed_count": disclosed,
+        "disclosed_share": round(disclosed / len(members), 4),
+        "disclosures_total": sum(a.disclosures_count for a in members),
+        "scored_count": len(scores),
+        "avg_drp_score": round(sum(scores) / len(scores), 3) if scores else None,
+    }
+
+def summarize_firms(advisors, drp_scores):
+    index = build_firm_index(advisors)
+    return {str(firm_crd): summarize_firm(firm_crd, members, drp_scores) for firm_crd, members in index.items()}
+
+# --- Write ---
+def write_firm_summaries(advisors, drp_scores=None):
+    # Rewrites only the firms whose figures differ from the last run and drops
+    # firms that no longer have any advisor in the feed
+    if drp_scores is None:
+        drp_scores = load_drp_scores()
+    summaries = summarize_firms(advisors, drp_scores)
+    previous = load_firm_summaries()
+
+    changed = [row for key, row in summaries.items() if previous.get(key) != row]
+    removed = [int(key) for key in previous if key not in summaries]
+    print(f"🏢 {len(summaries):,} firms with advisors: {len(changed):,} changed, {len(removed):,} removed")
+
+    now = datetime.utcnow().isoformat()
+    for i in range(0, len(changed), SUMMARY_BATCH_SIZE):
+        batch = [{**row, "updated_at": now} for row in changed[i:i + SUMMARY_BATCH_SIZE]]
+        supabase.table(SUMMARY_TABLE).upsert(batch, on_conflict="firm_crd_number").execute()
+        print(f"⬆️ Uploaded {len(batch)} firm summaries")
+
+    for i in range(0, len(removed), DELETE_BATCH_SIZE):
+        supabase.table(SUMMARY_TABLE).delete().in_("firm_crd_number", removed[i:i + DELETE_BATCH_SIZE]).execute()
+
+    save_firm_summaries(summaries)
+    return len(changed)
+
+def main():
+    return write_firm_summaries(load_archived_advisors())
+
+if __name__ == "__main__":
+    main()
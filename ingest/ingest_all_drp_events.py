@@ -8,13 +8,21 @@ import zipfile
 import io
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from storage.write_drp_events_to_supabase import write_drp_events_to_supabase
-
-load_dotenv()
+from storage.clients import supabase
+from storage.feed_archive import archive_records, feed_date_from_url
+from storage.supabase_mirror import refresh_mirror
+from storage.write_drp_events_to_supabase import delete_drp_events, write_drp_events_to_supabase
+from scoring.advisor_rollups import apply_rollup_deltas, summarize_deltas
+from scoring.event_scores import (
+    build_event_score_rows, hash_event, load_event_id_index, reconcile_pending_rollups, retire_event_scores,
+    watermark_now, write_event_scores,
+)
+from scoring.rules import compile_rules
+from storage.rollup_journal import close_rollup_batch, open_rollup_batch
 
 CHECKPOINT_FILE = "drp_checkpoint.json"
 BATCH_SIZE = 100
+SCORE_BATCH_SIZE = 5000
 
 friendly_names = {
     "hasRegAction": "Regulatory Action",
@@ -54,60 +62,281 @@ def save_checkpoint(crd):
     with open(CHECKPOINT_FILE, "w") as f:
         json.dump({"last_crd": crd}, f)
 
+# Detailed event sections under each Indvl, keyed by the DRP flag they explain
+DETAIL_SECTIONS = {
+    "hasCustComp": ("CustomerComplaints", "CustomerComplaintEvent"),
+    "hasCriminal": ("Criminals", "CriminalEvent"),
+    "hasRegAction": ("RegulatoryActions", "RegulatoryActionEvent"),
+    "hasBankrupt": ("Bankruptcies", "BankruptcyEvent"),
+    "hasCivilJudc": ("CivilJudgments", "CivilJudgmentEvent"),
+    "hasBond": ("Bonds", "BondEvent"),
+    "hasJudgment": ("Judgments", "JudgmentEvent"),
+    "hasInvstgn": ("Investigations", "InvestigationEvent"),
+    "hasTermination": ("Terminations", "TerminationEvent"),
+}
+
+# Substrings of lowercased field names → typed column, checked in order
+FIELD_ROLES = [
+    ("date", "event_date"),
+    ("regulator", "regulator"),
+    ("initiatedby", "regulator"),
+    ("agency", "regulator"),
+    ("forum", "regulator"),
+    ("court", "regulator"),
+    ("resolution", "resolution"),
+    ("disposition", "resolution"),
+    ("outcome", "resolution"),
+    ("allegation", "description"),
+    ("description", "description"),
+    ("summary", "description"),
+    ("comment", "description"),
+    ("charge", "description"),
+]
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%Y-%m", "%m/%Y", "%Y"]
+_field_role_cache = {}
+
+def field_role(name):
+    role = _field_role_cache.get(name)
+    if role is None:
+        lowered = name.lower()
+        role = "details"
+        if lowered.endswith("dt"):
+            role = "event_date"
+        else:
+            for needle, column in FIELD_ROLES:
+                if needle in lowered:
+                    role = column
+                    break
+        _field_role_cache[name] = role
+    return role
+
+def parse_event_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+def base_record(crd, flag, today):
+    return {
+        "crd": crd,
+        "flag_type": flag,
+        "event_seq": 0,
+        "label": friendly_names.get(flag, flag),
+        "event_date": None,
+        "disposition": None,
+        "description": None,
+        "regulator": None,
+        "resolution": None,
+        "details": {},
+        "source": "XML",
+        "drp_url": f"https://adviserinfo.sec.gov/individual/summary/{crd}",
+        "created_at": today,
+    }
+
+def detailed_record(crd, flag, seq, event, today):
+    record = base_record(crd, flag, today)
+    record["event_seq"] = seq
+
+    # Attributes and child elements both carry event fields in the feed
+    fields = list(event.attrib.items())
+    fields.extend((el.tag, el.text.strip()) for el in event if el.text and el.text.strip())
+
+    for name, value in fields:
+        role = field_role(name)
+        if role == "event_date" and record["event_date"] is None:
+            parsed = parse_event_date(value)
+            if parsed:
+                record["event_date"] = parsed
+                continue
+        elif role in ("regulator", "resolution") and record[role] is None:
+            record[role] = value
+            continue
+        elif role == "description":
+            record["description"] = f"{record['description']} {value}" if record["description"] else value
+            continue
+        record["details"][name] = value
+
+    record["disposition"] = record["resolution"]
+    return record
+
+def count_disclosure_events(drps, find_section):
+    # advisors.disclosures_count: the advisor_drp_events rows parse_drp_events
+    # produces for one advisor — each detailed event once, a flagged DRP without
+    # a detail section once. find_section(tag) returns the Indvl child or None.
+    flags = {flag for drp in drps.findall("DRP") for flag, val in drp.attrib.items() if val == "Y"}
+    total = 0
+    for flag in flags:
+        section = DETAIL_SECTIONS.get(flag)
+        container = find_section(section[0]) if section else None
+        events = len(container.findall(section[1])) if container is not None else 0
+        total += events or 1
+    return total
+
 def parse_drp_events(xml_contents, resume_from=None):
+    # Single streaming pass: each Indvl's children are indexed once by tag,
+    # then flags and their detailed event sections are read from the index
     print("🔍 Parsing DRP records...")
     drp_records = []
     today = datetime.utcnow().isoformat()
     skipping = bool(resume_from)
+    crd = None
 
     for xml in xml_contents:
-        root = ET.fromstring(xml)
-        for indvl in root.iter("Indvl"):
-            crd = indvl.find("Info").attrib.get("indvlPK", "N/A")
+        for _, indvl in ET.iterparse(io.BytesIO(xml), events=("end",)):
+            if indvl.tag != "Indvl":
+                continue
+
+            children = {}
+            for child in indvl:
+                children.setdefault(child.tag, child)
+
+            info = children.get("Info")
+            crd = info.attrib.get("indvlPK", "N/A") if info is not None else "N/A"
 
             if skipping:
                 if crd == resume_from:
                     skipping = False
+                indvl.clear()
                 continue
 
-            drps = indvl.find("DRPs")
-            if not drps:
+            drps = children.get("DRPs")
+            if drps is None or not len(drps):
+                indvl.clear()
                 continue
 
             for drp in drps.findall("DRP"):
                 for flag, val in drp.attrib.items():
                     if val != "Y":
                         continue
-                    record = {
-                        "crd": crd,
-                        "flag_type": flag,
-                        "label": friendly_names.get(flag, flag),
-                        "event_date": None,
-                        "disposition": None,
-                        "details": {},
-                        "source": "XML",
-                        "drp_url": f"https://adviserinfo.sec.gov/individual/summary/{crd}",
-                        "created_at": today,
-                    }
+
+                    section = DETAIL_SECTIONS.get(flag)
+                    container = children.get(section[0]) if section else None
+                    events = container.findall(section[1]) if container is not None else []
+
+                    if events:
+                        for seq, event in enumerate(events):
+                            drp_records.append(detailed_record(crd, flag, seq, event, today))
+                        continue
+
+                    # No detail section: keep the flag-level record
+                    record = base_record(crd, flag, today)
                     for child in drp:
                         if "date" in child.tag.lower():
-                            record["event_date"] = child.text.strip()
+                            record["event_date"] = child.text.strip() if child.text else None
                         elif "disposition" in child.tag.lower():
-                            record["disposition"] = child.text.strip()
+                            record["disposition"] = child.text.strip() if child.text else None
                         else:
                             record["details"][child.tag] = child.text.strip() if child.text else ""
                     drp_records.append(record)
 
+            indvl.clear()
+
     return drp_records, crd
 
-if __name__ == "__main__":
-    feed_url = get_feed_url()
-    xml_files = download_and_extract_xml(feed_url)
+def delete_stale_drp_events(records):
+    # Rows the feed no longer produces for the advisors in `records`: event_seqs
+    # past a flag's current event count (or past 0 once it fell back to the
+    # flag-level row), and flags that are no longer set. Runs before the feed is
+    # written so rows the upsert overwrites with a different event are seen too.
+    # Returns the deleted and overwritten rows.
+    seq_limits = {}
+    flags_by_crd = {}
+    incoming = {}
+    for r in records:
+        key = (r["crd"], r["flag_type"])
+        seq_limits[key] = max(seq_limits.get(key, 0), r["event_seq"] + 1)
+        flags_by_crd.setdefault(r["crd"], set()).add(r["flag_type"])
+        incoming[(r["crd"], r["flag_type"], r["event_seq"])] = hash_event(r)
+
+    mirror = refresh_mirror(["advisor_drp_events"])
+    stale = []
+    replaced = []
+    for row in mirror.execute(
+        "SELECT id, crd, flag_type, event_seq, event_date, description, regulator FROM advisor_drp_events"
+    ):
+        if row["crd"] not in flags_by_crd:
+            continue
+        row = dict(row)
+        limit = seq_limits.get((row["crd"], row["flag_type"]))
+        if limit is None or row["event_seq"] >= limit:
+            stale.append(row)
+        elif incoming.get((row["crd"], row["flag_type"], row["event_seq"])) != hash_event(row):
+            replaced.append(row)
+
+    if stale:
+        ids = [row["id"] for row in stale]
+        delete_drp_events(ids)
+        # Deletes never move the mirror's watermark, so write them through
+        mirror.executemany("DELETE FROM advisor_drp_events WHERE id = ?", [(i,) for i in ids])
+        mirror.commit()
+        print(f"🧹 Deleted {len(stale)} DRP event rows the feed no longer has")
+    mirror.close()
+    return stale + replaced
+
+def score_drp_events(records, removed=()):
+    # advisor_drp_events upserts on (crd, flag_type, event_seq), so only the last
+    # record per key is stored; score exactly those rows so IDs match the batch scorer.
+    # removed: rows delete_stale_drp_events dropped or saw overwritten; their
+    # scores are retired unless the event is still produced under another seq.
+    stored = list({(r["crd"], r["flag_type"], r["event_seq"]): r for r in records}.values())
+    rules = compile_rules()
+    reconcile_pending_rollups(supabase, rules.version)
+
+    run_started = watermark_now()
+    existing_event_ids = load_event_id_index(supabase)
+    scored_total = 0
+
+    for i in range(0, len(stored), SCORE_BATCH_SIZE):
+        chunk = stored[i:i + SCORE_BATCH_SIZE]
+        rows = build_event_score_rows(chunk, existing_event_ids, rules)
+        if not rows:
+            continue
+        # Journaled first: once the score rows exist the events count as scored,
+        # so deltas lost to a crash are only recovered by the next run's reconcile
+        open_rollup_batch("ingest", (r["crd"] for r in rows))
+        write_event_scores(supabase, rows, existing_event_ids, SCORE_BATCH_SIZE)
+        deltas = summarize_deltas((r["crd"] for r in rows), (r["adjusted_score"] for r in rows))
+        apply_rollup_deltas(supabase, deltas, rules.version)
+        close_rollup_batch("ingest")
+        scored_total += len(rows)
+
+    # A flag-level row replaced by its detailed events, or a deleted row whose
+    # event is not produced under another seq, leaves a stale score behind
+    produced = {hash_event(r) for r in stored}
+    superseded = {}
+    for r in stored:
+        flag_level_id = hash_event({"crd": r["crd"], "flag_type": r["flag_type"], "event_date": None})
+        if flag_level_id not in produced and flag_level_id in existing_event_ids:
+            superseded[flag_level_id] = r["crd"]
+    for r in removed:
+        event_id = hash_event(r)
+        if event_id not in produced and event_id in existing_event_ids:
+            superseded[event_id] = r["crd"]
+    if superseded:
+        retire_event_scores(supabase, superseded, rules.version, existing_event_ids)
+
+    existing_event_ids.save(scored_at_watermark=run_started)
+    print(f"🎯 Scored {scored_total} new DRP events ({len(stored) - scored_total} already scored)")
+    return scored_total
+
+def ingest_drp_feed(xml_files, feed_date=None):
     checkpoint = load_checkpoint()
     last_crd = checkpoint.get("last_crd")
 
     parsed_drps, last_crd = parse_drp_events(xml_files, resume_from=last_crd)
 
+    removed = delete_stale_drp_events(parsed_drps)
     write_drp_events_to_supabase(parsed_drps, batch_size=BATCH_SIZE)
+    score_drp_events(parsed_drps, removed)
+    # Archived after the writes, so the archive never holds up the database
+    archive_records("drp_events", feed_date, parsed_drps)
     save_checkpoint(last_crd)
     print("✅ All DRP records ingested and checkpoint saved.")
+    return len(parsed_drps)
+
+if __name__ == "__main__":
+    feed_url = get_feed_url()
+    xml_files = download_and_extract_xml(feed_url)
+    ingest_drp_feed(xml_files, feed_date_from_url(feed_url))
@@ -2,50 +2,49 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
 
-from supabase import create_client
 from datetime import datetime
 from tqdm import tqdm
 import logging
 import requests
 import tempfile
 import time
-from dotenv import load_dotenv
+from storage.clients import supabase
+from storage.supabase_mirror import refresh_mirror
 from storage.s3_upload import upload_pdf_to_s3
-
-# --- Load environment variables ---
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from storage.adv_schedule_cache import load_schedule_state, save_schedule_state
+from ingest.adv_refresh_scheduler import build_refresh_queue, mark_refreshed
 
 # --- Constants ---
 BATCH_SIZE = 100
 MAX_BATCHES = None  # Run all
 REQUEST_DELAY = 0.5
-CRD_LOAD_BATCH_SIZE = 1000
-CRD_LOAD_MAX = None  # Remove limit for prod
+REQUEST_BUDGET = int(os.getenv("ADV_REQUEST_BUDGET", "5000"))  # PDF downloads per run
 
 # --- Logging Setup ---
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("populate_advisor_advs.log"),
-        logging.StreamHandler()
-    ]
-)
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler("populate_advisor_advs.log"),
+            logging.StreamHandler()
+        ]
+    )
 
 # --- Helper Functions ---
 def generate_adv_url(crd: str) -> str:
     return f"https://reports.adviserinfo.sec.gov/reports/individual/individual_{crd}.pdf"
 
-def get_crds_from_advisors(offset: int, limit: int):
-    result = supabase.table("advisors") \
-        .select("crd_number") \
-        .range(offset, offset + limit - 1) \
-        .execute()
-    return [row["crd_number"] for row in result.data if row.get("crd_number")]
+def load_fetched_at(mirror):
+    rows = mirror.execute("SELECT crd, last_fetched_at FROM advisor_advs WHERE crd IS NOT NULL")
+    return {str(row["crd"]): row["last_fetched_at"] for row in rows}
+
+def load_advisors(mirror):
+    rows = mirror.execute(
+        "SELECT crd_number, has_disclosures, disclosures_count, firm_crd_number FROM advisors "
+        "WHERE crd_number IS NOT NULL ORDER BY crd_number"
+    )
+    return [dict(row) for row in rows]
 
 def insert_adv_records(crd_list):
     now = datetime.utcnow().isoformat()
@@ -82,52 +81,42 @@ def insert_adv_records(crd_list):
         time.sleep(REQUEST_DELAY)
 
     if records:
-        supabase.table("advisor_advs").insert(records).execute()
-        logging.info(f"✅ Inserted {len(records)} records with S3 URLs.")
+        supabase.table("advisor_advs").upsert(records, on_conflict="crd").execute()
+        logging.info(f"✅ Upserted {len(records)} records with S3 URLs.")
+
+    return [r["crd"] for r in records]
 
 # --- Main Function ---
 def main():
-    logging.info("📥 Loading all existing ADV CRDs from Supabase...")
-    all_existing_crds = set()
-    offset = 0
-    total_loaded = 0
-
-    while True:
-        result = supabase.table("advisor_advs") \
-            .select("crd") \
-            .range(offset, offset + CRD_LOAD_BATCH_SIZE - 1) \
-            .execute()
-
-        if not result.data:
-            break
-
-        all_existing_crds.update(row["crd"] for row in result.data if row.get("crd"))
-        offset += CRD_LOAD_BATCH_SIZE
-        total_loaded += len(result.data)
+    logging.info("📥 Loading advisors and ADV fetch times from the local mirror...")
+    mirror = refresh_mirror(["advisors", "advisor_advs"])
+    advisors = load_advisors(mirror)
+    fetched_at = load_fetched_at(mirror)
+    mirror.close()
+    logging.info(f"🧮 Loaded {len(advisors):,} advisors and {len(fetched_at):,} fetched ADVs")
+
+    state = load_schedule_state()
+    queue = build_refresh_queue(advisors, fetched_at, state, budget=REQUEST_BUDGET)
+    save_schedule_state(state)
+    logging.info(
+        f"🗓️ Refresh queue: {len(queue):,} CRDs (budget {REQUEST_BUDGET:,}, "
+        f"{len(state['pending']):,} with pending changes)"
+    )
 
-        if CRD_LOAD_MAX and total_loaded >= CRD_LOAD_MAX:
-            logging.info(f"🧪 CRD load capped at {CRD_LOAD_MAX} for test")
-            break
-
-    logging.info(f"🧮 Loaded {len(all_existing_crds):,} existing CRDs from advisor_advs table")
-
-    offset = 0
     inserted_total = 0
     batch_number = 1
 
-    while True:
-        crd_batch = get_crds_from_advisors(offset, BATCH_SIZE)
-        if not crd_batch:
-            break
-
-        crds_to_insert = [crd for crd in crd_batch if crd not in all_existing_crds]
-        logging.info(f"📦 Batch {batch_number}: Read {len(crd_batch)} | New: {len(crds_to_insert)}")
+    for i in range(0, len(queue), BATCH_SIZE):
+        crd_batch = queue[i:i + BATCH_SIZE]
+        new_count = sum(1 for crd in crd_batch if crd not in fetched_at)
+        logging.info(f"📦 Batch {batch_number}: Refreshing {len(crd_batch)} | New: {new_count}")
 
-        if crds_to_insert:
-            insert_adv_records(crds_to_insert)
-            inserted_total += len(crds_to_insert)
+        refreshed = insert_adv_records(crd_batch)
+        inserted_total += sum(1 for crd in refreshed if crd not in fetched_at)
 
-        offset += BATCH_SIZE
+        # Persist progress so an interrupted run does not lose refreshed changes
+        mark_refreshed(refreshed, state)
+        save_schedule_state(state)
         batch_number += 1
 
         if MAX_BATCHES is not None and batch_number > MAX_BATCHES:
@@ -140,5 +129,6 @@ def main():
 import sys
 
 if __name__ == "__main__":
+    setup_logging()
     inserted = main()
     sys.exit(0 if inserted == 0 else 10)
\ No newline at end of file
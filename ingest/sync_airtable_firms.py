@@ -0,0 +1,187 @@
+import os
+import sys
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from storage.airtable_sync_state import load_airtable_state, save_airtable_state
+from storage.clients import airtable, airtable_configured, get_settings
+from storage.supabase_mirror import refresh_mirror
+
+# --- Constants ---
+AIRTABLE_BATCH_SIZE = 10           # records per create/update call, the API maximum
+AIRTABLE_REQUESTS_PER_SECOND = 5   # per-base limit; a 429 locks the base out for 30s
+AIRTABLE_WORKERS = 4               # requests in flight, so latency never leaves a slot unused
+STATE_SAVE_EVERY = 50              # completed batches between saves of the record-id map
+LISTING_SAFETY_MARGIN = timedelta(hours=1)  # createdTime is Airtable's clock; allow for skew
+IAPD_FIRM_URL = "https://adviserinfo.sec.gov/firm/summary/{}"
+
+# Airtable field → firm_data column. Only fields the pipeline owns are sent;
+# manually maintained ones (Custodian, Notes, ...) are never touched.
+FIELD_COLUMNS = {
+    "Firm Name": "firm_name",
+    "CRD Number": "crd_number",
+    "SEC Registration Type": "registration_type",
+    "FilingDate": "filing_date",
+}
+
+class RateLimiter:
+    # Evenly spaced request slots shared by every worker thread
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def base_limiter(base_id):
+    with _limiters_lock:
+        if base_id not in _limiters:
+            _limiters[base_id] = RateLimiter(AIRTABLE_REQUESTS_PER_SECOND)
+        return _limiters[base_id]
+
+# --- Records ---
+def firm_fields(row):
+    fields = {field: row[column] for field, column in FIELD_COLUMNS.items()}
+    fields["IAPD Profile URL"] = IAPD_FIRM_URL.format(row["crd_number"])
+    return fields
+
+def fields_digest(fields):
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def load_firm_rows():
+    mirror = refresh_mirror(["firm_data"])
+    columns = ", ".join(FIELD_COLUMNS.values())
+    rows = mirror.execute(f"SELECT {columns} FROM firm_data WHERE crd_number IS NOT NULL ORDER BY crd_number")
+    firms = [dict(row) for row in rows]
+    mirror.close()
+    return firms
+
+def record_crd(value):
+    # "CRD Number" is edited by hand in the base; anything that is not a CRD is skipped
+    try:
+        return str(int(str(value).strip()))
+    except (TypeError, ValueError):
+        return None
+
+def reconcile_record_ids(state, limiter):
+    # Lists the records created since the last listing (all of them the first
+    # time), so firms already in the base are updated instead of duplicated:
+    # rows from the old CSV workflow, or ones created by a run whose map was
+    # never saved and whose older map the cache restored
+    started = datetime.utcnow() - LISTING_SAFETY_MARGIN
+    since = state.get("listed_at") if state["records"] else None
+    if since:
+        formula = f"IS_AFTER(CREATED_TIME(), '{since}Z')"
+        print(f"🗺️ Listing Airtable records created since {since}...")
+    else:
+        formula = None
+        print("🗺️ No CRD → record map yet — listing existing Airtable records once...")
+
+    mapped = skipped = 0
+    for page in airtable.iterate(page_size=100, fields=["CRD Number"], formula=formula):
+        for record in page:
+            crd = record_crd(record["fields"].get("CRD Number"))
+            if crd is None:
+                skipped += 1
+                continue
+            if crd not in state["records"]:
+                state["records"][crd] = record["id"]
+                mapped += 1
+        limiter.wait()
+
+    state["listed_at"] = started.isoformat()
+    save_airtable_state(state)
+    print(f"🗺️ Mapped {mapped:,} records not in the map ({skipped:,} without a usable CRD)")
+
+# --- Sync ---
+def push_batch(limiter, creates, updates):
+    # One API call: creates or updates, never both. Returns (crd, record id) pairs.
+    limiter.wait()
+    if creates:
+        created = airtable.batch_create([fields for _, fields in creates], typecast=True)
+        return [(crd, record["id"]) for (crd, _), record in zip(creates, created)]
+    airtable.batch_update([{"id": record_id, "fields": fields} for _, record_id, fields in updates], typecast=True)
+    return [(crd, record_id) for crd, record_id, _ in updates]
+
+def sync_firms(firms, state, full=False, workers=AIRTABLE_WORKERS):
+    limiter = base_limiter(get_settings()["airtable_base_id"])
+    reconcile_record_ids(state, limiter)
+
+    creates, updates, digests = [], [], {}
+    for row in firms:
+        crd = str(row["crd_number"])
+        fields = firm_fields(row)
+        digest = fields_digest(fields)
+        if not full and state["pushed"].get(crd) == digest:
+            continue
+        digests[crd] = digest
+        record_id = state["records"].get(crd)
+        if record_id:
+            updates.append((crd, record_id, fields))
+        else:
+            creates.append((crd, fields))
+
+    batches = [(creates[i:i + AIRTABLE_BATCH_SIZE], []) for i in range(0, len(creates), AIRTABLE_BATCH_SIZE)]
+    batches += [([], updates[i:i + AIRTABLE_BATCH_SIZE]) for i in range(0, len(updates), AIRTABLE_BATCH_SIZE)]
+    print(
+        f"📤 Airtable: {len(creates):,} new and {len(updates):,} changed firms in {len(batches):,} requests "
+        f"(≥{len(batches) / AIRTABLE_REQUESTS_PER_SECOND:.0f}s at {AIRTABLE_REQUESTS_PER_SECOND} req/s)"
+    )
+
+    pushed = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(push_batch, limiter, batch_creates, batch_updates) for batch_creates, batch_updates in batches]
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ Airtable batch failed: {e}")
+                    continue
+                for crd, record_id in results:
+                    state["records"][crd] = record_id
+                    state["pushed"][crd] = digests[crd]
+                pushed += len(results)
+                if done % STATE_SAVE_EVERY == 0:
+                    save_airtable_state(state)
+                    print(f"⬆️ Synced {pushed:,} firms")
+        finally:
+            # Keep every record id already created, even if the run is interrupted
+            for future in futures:
+                future.cancel()
+            save_airtable_state(state)
+
+    if failed:
+        raise Exception(f"{failed} Airtable batches failed; their firms are retried next run")
+    return pushed
+
+# --- Main Function ---
+def main(full=False):
+    if not airtable_configured():
+        print("⏭️ AIRTABLE_PAT / AIRTABLE_BASE_ID not set — skipping Airtable sync.")
+        return 0
+
+    firms = load_firm_rows()
+    state = load_airtable_state()
+    started = time.time()
+    pushed = sync_firms(firms, state, full=full)
+    print(f"🎉 Airtable firm sync complete: {pushed:,} firms pushed in {time.time() - started:.0f}s")
+    return pushed
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv)
@@ -1,55 +1,78 @@
 import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
-from collections import defaultdict
-
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-print("📊 Fetching DRP data from Supabase...")
-
-# Step 1: Fetch all advisor DRP events
-response = supabase.table("advisor_drp_events").select("crd").execute()
-if not hasattr(response, "data") or not response.data:
-    print("❌ No DRP data returned.")
-    exit()
-
-# Step 2: Count DRPs per CRD
-crd_counts = defaultdict(int)
-for row in response.data:
-    crd = row.get("crd")
-    if crd:
-        crd_counts[crd] += 1
-
-print(f"✅ Found {len(crd_counts)} advisors with at least one DRP.")
-
-# Step 3: Prepare batch updates for advisor table
-updates = []
-for crd, count in crd_counts.items():
-    updates.append({
-        "crd_number": crd,
-        "has_disclosures": True,
-        "disclosures_count": count
-    })
-
-print(f"📤 Updating {len(updates)} advisor records...")
-
-# Step 4: Perform updates (not upserts)
-batch_size = 100
-for i in range(0, len(updates), batch_size):
-    batch = updates[i:i + batch_size]
-    print(f"📦 Processing batch {i // batch_size + 1} with {len(batch)} records")
-    for row in batch:
-        try:
-            supabase.table("advisors").update({
-                "has_disclosures": row["has_disclosures"],
-                "disclosures_count": row["disclosures_count"]
-            }).eq("crd_number", row["crd_number"]).execute()
-        except Exception as e:
-            print(f"❌ Update failed for CRD {row['crd_number']}: {e}")
-
-print("🎉 Advisor disclosure flags updated successfully.")
+import sys
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from storage.clients import supabase
+from storage.supabase_mirror import refresh_mirror
+
+# disclosures_count is the number of disclosure events (advisor_drp_events rows)
+# per advisor, the same figure parse_advisors computes from the feed
+# (count_disclosure_events); not the number of DRP flags.
+# Per-CRD counts that differ from what the mirrored advisors row already holds;
+# CRDs missing from the mirror are included so the update is still attempted
+CHANGED_COUNTS_SQL = """
+    SELECT e.crd, COUNT(*) AS disclosures_count
+    FROM advisor_drp_events e
+    LEFT JOIN advisors a ON a.crd_number = CAST(e.crd AS INTEGER)
+    WHERE e.crd IS NOT NULL AND e.crd != ''
+    GROUP BY e.crd
+    HAVING MAX(a.has_disclosures) IS NOT 1 OR MAX(a.disclosures_count) IS NOT COUNT(*)
+"""
+
+def main():
+    print("📊 Refreshing the local mirror of DRP events and advisors...")
+    mirror = refresh_mirror(["advisor_drp_events", "advisors"])
+
+    # Step 1–2: Count DRPs per CRD locally, keeping only advisors whose flags changed
+    total = mirror.execute(
+        "SELECT COUNT(DISTINCT crd) FROM advisor_drp_events WHERE crd IS NOT NULL AND crd != ''"
+    ).fetchone()[0]
+    if not total:
+        print("❌ No DRP data returned.")
+        mirror.close()
+        return 0
+
+    print(f"✅ Found {total} advisors with at least one DRP.")
+
+    # Step 3: Prepare batch updates for advisor table
+    updates = []
+    for crd, count in mirror.execute(CHANGED_COUNTS_SQL):
+        updates.append({
+            "crd_number": crd,
+            "has_disclosures": True,
+            "disclosures_count": count
+        })
+
+    print(f"📤 Updating {len(updates)} advisor records ({total - len(updates)} already current)...")
+
+    # Step 4: Perform updates (not upserts); the changed_at trigger marks each row
+    # changed for mirror refreshes and the advisor profile stage
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    batch_size = 100
+    for i in range(0, len(updates), batch_size):
+        batch = updates[i:i + batch_size]
+        print(f"📦 Processing batch {i // batch_size + 1} with {len(batch)} records")
+        for row in batch:
+            try:
+                supabase.table("advisors").update({
+                    "has_disclosures": row["has_disclosures"],
+                    "disclosures_count": row["disclosures_count"],
+                    "last_updated": today
+                }).eq("crd_number", row["crd_number"]).execute()
+            except Exception as e:
+                print(f"❌ Update failed for CRD {row['crd_number']}: {e}")
+                continue
+            # Write through so the next run sees the row as current
+            mirror.execute(
+                "UPDATE advisors SET has_disclosures = 1, disclosures_count = ?, last_updated = ? "
+                "WHERE crd_number = CAST(? AS INTEGER)",
+                (row["disclosures_count"], today, row["crd_number"]),
+            )
+        mirror.commit()
+
+    mirror.close()
+    print("🎉 Advisor disclosure flags updated successfully.")
+    return len(updates)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from storage.clients import supabase
+from storage.supabase_mirror import mirror_state, refresh_mirror
+
+# --- Constants ---
+PROFILE_TABLE = "advisor_profiles"
+PROFILE_BATCH_SIZE = 1000
+WATERMARK_SAFETY_MARGIN = timedelta(hours=1)
+SOURCE_TABLES = ["advisors", "advisor_advs", "advisor_drp_scores", "firm_data"]
+
+PROFILE_COLUMNS = (
+    "crd_number", "advisor_name", "status",
+    "firm_crd_number", "firm_name", "firm_registration_type", "firm_aum", "firm_employees", "firm_city", "firm_state",
+    "has_disclosures", "disclosures_count",
+    "drp_score", "drp_event_count", "drp_volume_adjusted_score",
+    "adv_url", "adv_fetched_at",
+)
+BOOLEAN_COLUMNS = ("has_disclosures",)  # sqlite hands these back as 0/1
+
+# Profiles are assembled from the local mirror. advisor_drp_scores and
+# advisor_advs key on the CRD as text, advisors and firm_data as an integer.
+PROFILE_SELECT = """
+    SELECT a.crd_number, a.advisor_name, a.status,
+           a.firm_crd_number, a.firm_name, f.registration_type AS firm_registration_type,
+           f.total_regulatory_aum AS firm_aum, f.total_employees AS firm_employees,
+           f.office_city AS firm_city, f.office_state AS firm_state,
+           a.has_disclosures, a.disclosures_count,
+           s.drp_score, s.event_count AS drp_event_count, s.volume_adjusted_score AS drp_volume_adjusted_score,
+           v.adv_url, v.last_fetched_at AS adv_fetched_at
+    FROM _profile_candidates c
+    JOIN advisors a ON a.crd_number = c.crd
+    LEFT JOIN firm_data f ON f.crd_number = a.firm_crd_number
+    LEFT JOIN advisor_drp_scores s ON s.crd IN (a.crd_number, CAST(a.crd_number AS TEXT))
+    LEFT JOIN advisor_advs v ON v.crd IN (a.crd_number, CAST(a.crd_number AS TEXT))
+"""
+
+# Advisors whose own source rows moved since the last build, plus everyone at a
+# firm whose mirrored attributes no longer match what their profile shows
+CANDIDATES_SQL = """
+    INSERT OR IGNORE INTO _profile_candidates (crd)
+    SELECT crd_number FROM advisors WHERE changed_at >= :since
+    UNION SELECT CAST(crd AS INTEGER) FROM advisor_advs WHERE last_fetched_at >= :since
+    UNION SELECT CAST(crd AS INTEGER) FROM advisor_drp_scores WHERE last_scored_at >= :since
+    UNION SELECT p.crd_number FROM advisor_profiles p
+        LEFT JOIN firm_data f ON f.crd_number = p.firm_crd_number
+        WHERE p.firm_crd_number IS NOT NULL AND (
+            f.registration_type IS NOT p.firm_registration_type OR f.total_regulatory_aum IS NOT p.firm_aum
+            OR f.total_employees IS NOT p.firm_employees OR f.office_city IS NOT p.firm_city
+            OR f.office_state IS NOT p.firm_state
+        )
+"""
+
+# --- Local Copy ---
+def ensure_local_profiles(mirror):
+    # Last published version of every profile, used to skip unchanged rows
+    columns = ", ".join(PROFILE_COLUMNS)
+    mirror.execute(f"CREATE TABLE IF NOT EXISTS advisor_profiles ({columns}, PRIMARY KEY (crd_number))")
+    mirror.execute("CREATE TEMP TABLE IF NOT EXISTS _profile_candidates (crd PRIMARY KEY)")
+    mirror.execute("DELETE FROM _profile_candidates")
+
+def select_candidates(mirror, since):
+    if since is None:
+        mirror.execute("INSERT INTO _profile_candidates (crd) SELECT crd_number FROM advisors")
+    else:
+        mirror.execute(CANDIDATES_SQL, {"since": since})
+    return mirror.execute("SELECT COUNT(*) FROM _profile_candidates").fetchone()[0]
+
+def changed_profiles(mirror):
+    # Recomputed candidate profiles minus the identical rows already published
+    new = ", ".join(f"n.{c}" for c in PROFILE_COLUMNS)
+    published = ", ".join(f"p.{c}" for c in PROFILE_COLUMNS)
+    mirror.execute("DROP TABLE IF EXISTS temp._new_profiles")
+    mirror.execute(f"CREATE TEMP TABLE _new_profiles AS {PROFILE_SELECT}")
+    rows = mirror.execute(
+        f"SELECT {new} FROM _new_profiles n LEFT JOIN advisor_profiles p ON p.crd_number = n.crd_number "
+        f"WHERE ({new}) IS NOT ({published})"
+    )
+    return [dict(row) for row in rows]
+
+def to_remote_row(profile, now):
+    row = dict(profile)
+    for column in BOOLEAN_COLUMNS:
+        if row[column] is not None:
+            row[column] = bool(row[column])
+    row["profile_updated_at"] = now
+    return row
+
+# --- Main Function ---
+def main(full=False):
+    print("📊 Refreshing the local mirror of profile source tables...")
+    mirror = refresh_mirror(SOURCE_TABLES)
+    ensure_local_profiles(mirror)
+
+    state = mirror_state(mirror, PROFILE_TABLE)
+    since = None if full or not state else state["watermark"]
+    build_started = (datetime.utcnow() - WATERMARK_SAFETY_MARGIN).isoformat()
+
+    candidates = select_candidates(mirror, since)
+    changed = changed_profiles(mirror)
+    print(f"🧮 Recomputed {candidates:,} advisor profiles, {len(changed):,} changed")
+
+    now = datetime.utcnow().isoformat()
+    columns = ", ".join(PROFILE_COLUMNS)
+    insert = f"INSERT OR REPLACE INTO advisor_profiles ({columns}) VALUES ({', '.join('?' for _ in PROFILE_COLUMNS)})"
+    for i in range(0, len(changed), PROFILE_BATCH_SIZE):
+        batch = changed[i:i + PROFILE_BATCH_SIZE]
+        supabase.table(PROFILE_TABLE).upsert(
+            [to_remote_row(p, now) for p in batch], on_conflict="crd_number"
+        ).execute()
+        # Record as published only once the upsert went through
+        mirror.executemany(insert, [tuple(p[c] for c in PROFILE_COLUMNS) for p in batch])
+        mirror.commit()
+        print(f"⬆️ Upserted profiles {i + 1:,}–{i + len(batch):,}")
+
+    row_count = mirror.execute("SELECT COUNT(*) FROM advisor_profiles").fetchone()[0]
+    mirror.execute(
+        "INSERT OR REPLACE INTO _mirror_state (table_name, watermark, refreshed_at, row_count) VALUES (?, ?, ?, ?)",
+        (PROFILE_TABLE, build_started, now, row_count),
+    )
+    mirror.commit()
+    mirror.close()
+    print(f"🎉 Advisor profiles current ({row_count:,} published).")
+    return len(changed)
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv)
@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from storage.name_index import ADVISOR, FIRM, INDEX_FILE, build_name_index
+from storage.s3_upload import upload_file_to_s3
+from storage.supabase_mirror import refresh_mirror
+
+# --- Constants ---
+S3_PREFIX = "search/"  # consumers download name_index.bin (+ .json) from here
+
+def name_entries(mirror):
+    # (kind, crd, name) for every advisor and firm in the mirror
+    for crd, name in mirror.execute("SELECT crd_number, advisor_name FROM advisors WHERE crd_number IS NOT NULL"):
+        yield ADVISOR, int(crd), name
+    for crd, name in mirror.execute("SELECT crd_number, firm_name FROM firm_data WHERE crd_number IS NOT NULL"):
+        yield FIRM, int(crd), name
+
+def ship_index(path=INDEX_FILE):
+    # Uploads the index unless this build is already in S3, so a failed upload
+    # is retried by the next run even when no name changed in between
+    with open(path + ".json", "r") as f:
+        meta = json.load(f)
+    if meta.get("shipped_at", "") >= meta["built_at"]:
+        return False
+
+    meta["shipped_at"] = datetime.utcnow().isoformat()
+    with open(path + ".json", "w") as f:
+        json.dump(meta, f)
+    for local_path in (path, path + ".json"):
+        if not upload_file_to_s3(local_path, S3_PREFIX + os.path.basename(local_path)):
+            meta.pop("shipped_at")
+            with open(path + ".json", "w") as f:
+                json.dump(meta, f)
+            raise Exception(f"Failed to upload {local_path}")
+    return True
+
+def main(full=False):
+    print("📊 Refreshing the local mirror of advisor and firm names...")
+    mirror = refresh_mirror(["advisors", "firm_data"])
+    changed = build_name_index(name_entries(mirror), full=full, built_at=datetime.utcnow().isoformat())
+    mirror.close()
+
+    print(f"🔎 Name index: {changed:,} names changed")
+    if ship_index():
+        print("📦 Name index uploaded to S3.")
+    return changed
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv)
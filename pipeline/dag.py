@@ -0,0 +1,183 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+import hashlib
+import logging
+import threading
+import time
+import requests
+
+class Stage:
+    # deps: stages that must succeed first. When track_deps is set, a dependency's
+    # input key is part of this stage's key, so the stage reruns whenever an
+    # upstream stage saw new inputs. inputs(ctx) adds the stage's own inputs
+    # (a feed hash, a rule version, a period) to the key.
+    def __init__(self, name, run, deps=(), inputs=None, track_deps=True):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+        self.inputs = inputs
+        self.track_deps = track_deps
+
+
+class FeedSource:
+    # A downloaded feed shared by every stage in the run. The fingerprint is the
+    # SHA-256 of the raw file; when the HEAD validators match the last run the
+    # stored hash is reused and nothing is downloaded until a stage needs the data.
+    def __init__(self, name, find_url, extract, feed_state):
+        self.name = name
+        self.find_url = find_url
+        self.extract = extract
+        self.feed_state = feed_state
+        self._lock = threading.Lock()
+        self._url = None
+        self._head = None
+        self._digest = None
+        self._content = None
+
+    def _resolve(self):
+        if self._url is None:
+            self._url = self.find_url()
+            response = requests.head(self._url)
+            self._head = [
+                self._url,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                response.headers.get("Content-Length"),
+            ]
+
+    def _download(self):
+        logging.info(f"📥 Downloading {self.name} feed: {self._url}")
+        response = requests.get(self._url)
+        if response.status_code != 200:
+            raise Exception(f"Failed to download {self.name} feed: {response.status_code}")
+
+        self._digest = hashlib.sha256(response.content).hexdigest()
+        self.feed_state[self.name] = {"head": self._head, "sha256": self._digest}
+        self._content = self.extract(response.content)
+
+    def url(self):
+        with self._lock:
+            self._resolve()
+            return self._url
+
+    def fingerprint(self):
+        with self._lock:
+            if self._digest is None:
+                self._resolve()
+                saved = self.feed_state.get(self.name)
+                validators_known = self._head[1] or self._head[2]
+                if saved and validators_known and saved.get("head") == self._head:
+                    self._digest = saved["sha256"]
+                else:
+                    self._download()
+            return self._digest
+
+    def content(self):
+        with self._lock:
+            if self._content is None:
+                self._resolve()
+                self._download()
+            return self._content
+
+
+def stage_key(stage, keys, ctx):
+    parts = [stage.name]
+    if stage.track_deps:
+        parts.extend(keys[dep] for dep in stage.deps)
+    if stage.inputs is not None:
+        parts.append(str(stage.inputs(ctx)))
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+def check_graph(stages):
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        missing = set(stage.deps) - names
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {sorted(missing)}")
+
+    # Kahn's algorithm: anything left over is part of a cycle
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+def run_stages(stages, state, ctx, save_state, force=(), max_workers=4):
+    # Runs every stage once its dependencies finish, independent branches in
+    # parallel. A stage whose key matches its last success is skipped; a failure
+    # blocks its dependents. Status is saved after every stage so the next run
+    # resumes from the failure point.
+    check_graph(stages)
+    by_name = {stage.name: stage for stage in stages}
+    records = state["stages"]
+    state_lock = threading.Lock()
+    keys = {}
+    status = {}
+
+    def record(name, **fields):
+        with state_lock:
+            previous = records.get(name, {})
+            records[name] = {**previous, **fields}
+            save_state(state)
+
+    def execute(stage):
+        started = time.time()
+        key = stage_key(stage, keys, ctx)
+        previous = records.get(stage.name, {})
+        # "key" is only written on success, so a blocked stage keeps its last good key
+        if stage.name not in force and previous.get("key") == key and previous.get("status") != "failed":
+            logging.info(f"⏭️ {stage.name}: inputs unchanged, skipping")
+            return key, "skipped", started
+
+        logging.info(f"▶️ {stage.name}: running")
+        stage.run(ctx)
+        return key, "succeeded", started
+
+    pending = set(by_name)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+        while pending or running:
+            for name in sorted(pending):
+                stage = by_name[name]
+                if any(dep not in status for dep in stage.deps):
+                    continue
+                pending.discard(name)
+                if any(status[dep] in ("failed", "blocked") for dep in stage.deps):
+                    status[name] = "blocked"
+                    logging.warning(f"⛔ {name}: blocked by failed dependency")
+                    record(name, status="blocked", error=None)
+                    continue
+                running[pool.submit(execute, stage)] = name
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                finished = datetime.utcnow().isoformat()
+                try:
+                    key, outcome, started = future.result()
+                except Exception as e:
+                    status[name] = "failed"
+                    logging.exception(f"❌ {name} failed")
+                    record(name, status="failed", error=f"{type(e).__name__}: {e}", finished_at=finished)
+                    continue
+
+                keys[name] = key
+                status[name] = outcome
+                seconds = round(time.time() - started, 1)
+                if outcome == "succeeded":
+                    logging.info(f"✅ {name}: done in {seconds}s")
+                    record(
+                        name, status=outcome, key=key, error=None, seconds=seconds,
+                        started_at=datetime.utcfromtimestamp(started).isoformat(), finished_at=finished,
+                    )
+                else:
+                    record(name, status=outcome, error=None)
+
+    return status
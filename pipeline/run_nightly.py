@@ -0,0 +1,147 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import gzip
+import io
+import logging
+import zipfile
+from datetime import datetime
+from ingest import (
+    extract_adv_text, firm_advisor_summaries, populate_advisor_advs, sync_airtable_firms, update_advisor_disclosure_flags,
+    update_advisor_profiles, update_name_index,
+)
+from ingest.fetch_and_parse_advisors import get_advisor_feed_url, ingest_advisors
+from ingest.fetch_and_parse_firm_xml import get_firm_feed_url, ingest_firm_feed
+from ingest.ingest_all_drp_events import ingest_drp_feed
+from pipeline.dag import FeedSource, Stage, run_stages
+from scoring import drp_severity_scoring
+from scoring.rules import CURRENT_VERSION
+from storage.feed_archive import feed_date_from_url
+from storage.pipeline_state import load_pipeline_state, save_pipeline_state
+
+# --- Constants ---
+MAX_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+FIRM_FEED_TYPES = ["SEC", "STATE"]
+
+# --- Logging Setup ---
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(threadName)s] [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler("pipeline.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+# --- Feeds ---
+def unzip_xml(raw):
+    with zipfile.ZipFile(io.BytesIO(raw)) as z:
+        return [z.read(name) for name in z.namelist() if name.endswith(".xml")]
+
+class PipelineContext:
+    # Shared by every stage: one download per feed per run, and the process-wide
+    # clients from storage.clients
+    def __init__(self, feed_state):
+        self.feeds = {"advisor": FeedSource("advisor", get_advisor_feed_url, unzip_xml, feed_state)}
+        for feed_type in FIRM_FEED_TYPES:
+            self.feeds[f"firm_{feed_type}"] = FeedSource(
+                f"firm_{feed_type}", lambda t=feed_type: get_firm_feed_url(feed_type=t), gzip.decompress, feed_state
+            )
+
+# --- Stages ---
+def advisor_feed_hash(ctx):
+    return ctx.feeds["advisor"].fingerprint()
+
+def firm_feed_hashes(ctx):
+    return ",".join(ctx.feeds[f"firm_{t}"].fingerprint() for t in FIRM_FEED_TYPES)
+
+def current_week(ctx):
+    return datetime.utcnow().strftime("%G-W%V")
+
+def feed_args(ctx, name):
+    feed = ctx.feeds[name]
+    return feed.content(), feed_date_from_url(feed.url())
+
+def run_firms(ctx):
+    for feed_type in FIRM_FEED_TYPES:
+        print(f"\n🚀 Ingesting {feed_type} firm feed")
+        xml_data, feed_date = feed_args(ctx, f"firm_{feed_type}")
+        ingest_firm_feed(xml_data, feed_type, feed_date)
+
+def build_stages():
+    return [
+        Stage("drp_events", lambda ctx: ingest_drp_feed(*feed_args(ctx, "advisor")), inputs=advisor_feed_hash),
+        Stage("advisors", lambda ctx: ingest_advisors(*feed_args(ctx, "advisor")), inputs=advisor_feed_hash),
+        Stage("disclosure_sync", lambda ctx: update_advisor_disclosure_flags.main(), deps=("drp_events", "advisors")),
+        Stage("firms", run_firms, inputs=firm_feed_hashes),
+        # Inline scoring covers new events; the backfill only matters when the rules change
+        Stage(
+            "drp_rescore", lambda ctx: drp_severity_scoring.main(),
+            deps=("drp_events",), inputs=lambda ctx: CURRENT_VERSION, track_deps=False,
+        ),
+        # Weekly: ADV PDFs once the advisor table is current, then their text
+        Stage(
+            "adv_pdfs", lambda ctx: populate_advisor_advs.main(),
+            deps=("advisors",), inputs=current_week, track_deps=False,
+        ),
+        Stage("adv_text", lambda ctx: extract_adv_text.main(), deps=("adv_pdfs",)),
+        # Firm headcount/disclosure figures from the archived advisor parse, with
+        # DRP scores once inline scoring and any rescore have written them
+        Stage(
+            "firm_summaries", lambda ctx: firm_advisor_summaries.main(),
+            deps=("advisors", "drp_events", "drp_rescore"),
+        ),
+        # Denormalized per-advisor rows; only profiles whose sources changed are rewritten
+        Stage(
+            "advisor_profiles", lambda ctx: update_advisor_profiles.main(),
+            deps=("disclosure_sync", "firms", "drp_rescore", "adv_pdfs"),
+        ),
+        Stage("name_index", lambda ctx: update_name_index.main(), deps=("advisors", "firms")),
+        Stage("airtable_sync", lambda ctx: sync_airtable_firms.main(), deps=("firms",)),
+    ]
+
+def parse_stage_list(argv, flag, names):
+    if flag not in argv:
+        return set()
+    value = argv[argv.index(flag) + 1]
+    if value == "all":
+        return set(names)
+    selected = set(value.split(","))
+    unknown = selected - set(names)
+    if unknown:
+        raise SystemExit(f"❌ Unknown stages for {flag}: {', '.join(sorted(unknown))}")
+    return selected
+
+def print_status(state):
+    for name, record in state["stages"].items():
+        error = f" — {record['error']}" if record.get("error") else ""
+        print(f"{name:<16} {record.get('status', '?'):<10} {record.get('finished_at', '')}{error}")
+
+# --- Main Function ---
+def main(argv):
+    state = load_pipeline_state()
+    if "--status" in argv:
+        print_status(state)
+        return 0
+
+    stages = build_stages()
+    force = parse_stage_list(argv, "--force", [s.name for s in stages])
+    ctx = PipelineContext(state["feeds"])
+
+    started = datetime.utcnow()
+    status = run_stages(stages, state, ctx, save_pipeline_state, force=force, max_workers=MAX_WORKERS)
+    elapsed = (datetime.utcnow() - started).total_seconds()
+
+    failed = sorted(name for name, outcome in status.items() if outcome in ("failed", "blocked"))
+    summary = ", ".join(f"{name}={outcome}" for name, outcome in status.items())
+    logging.info(f"🏁 Pipeline finished in {elapsed:.0f}s: {summary}")
+    if failed:
+        logging.error(f"❌ Not completed: {', '.join(failed)} — rerun to resume from here")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    setup_logging()
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,155 @@
+from datetime import datetime
+import logging
+from storage.table_scan import scan_table
+
+STATE_LOOKUP_BATCH_SIZE = 500
+REBUILD_PAGE_SIZE = 1000
+ROLLUP_WRITE_BATCH_SIZE = 1000
+
+# --- Aggregate Math ---
+def rollup_scores(score_sum, count):
+    average_score = round(score_sum / count, 3)
+    volume_penalty = 1 + 0.05 * (count - 1)
+    volume_adjusted_score = min(round(average_score * volume_penalty, 3), 1.0)
+    return average_score, volume_adjusted_score
+
+def summarize_deltas(crds, adjusted_scores):
+    # {crd: [sum, count, max]} for the newly scored events only
+    deltas = {}
+    for crd, adjusted in zip(crds, adjusted_scores):
+        delta = deltas.get(crd)
+        if delta is None:
+            deltas[crd] = [adjusted, 1, adjusted]
+        else:
+            delta[0] += adjusted
+            delta[1] += 1
+            if adjusted > delta[2]:
+                delta[2] = adjusted
+    return deltas
+
+def merge_state(state, delta):
+    if state is None:
+        return list(delta)
+    return [state[0] + delta[0], state[1] + delta[1], max(state[2], delta[2])]
+
+# --- Stored State ---
+def load_rollup_state(supabase, crds):
+    # Returns ({crd: [sum, count, max]}, crds whose stored rows predate the state columns)
+    state = {}
+    legacy = []
+    crds = list(crds)
+
+    for i in range(0, len(crds), STATE_LOOKUP_BATCH_SIZE):
+        chunk = crds[i:i + STATE_LOOKUP_BATCH_SIZE]
+        result = supabase.table("advisor_drp_scores") \
+            .select("crd,event_count,adjusted_score_sum,adjusted_score_max") \
+            .in_("crd", chunk) \
+            .execute()
+        for row in result.data or []:
+            if row.get("adjusted_score_sum") is None:
+                if row.get("event_count"):
+                    legacy.append(row["crd"])
+                continue
+            state[row["crd"]] = [row["adjusted_score_sum"], row["event_count"], row["adjusted_score_max"]]
+
+    return state, legacy
+
+def rebuild_rollup_state(supabase, crds):
+    # Full per-CRD recompute from drp_event_scores, limited to the given CRDs
+    state = {}
+    crds = list(crds)
+
+    for i in range(0, len(crds), STATE_LOOKUP_BATCH_SIZE):
+        chunk = crds[i:i + STATE_LOOKUP_BATCH_SIZE]
+        # A few hundred advisors' events: one keyset pass, no range split
+        rows = scan_table(
+            "drp_event_scores", "crd,adjusted_score,event_id", key="event_id", filters=[("in_", "crd", chunk)],
+            page_size=REBUILD_PAGE_SIZE, workers=1, client=supabase,
+        )
+        for row in rows:
+            if row.get("adjusted_score") is None:
+                continue
+            state[row["crd"]] = merge_state(state.get(row["crd"]), [row["adjusted_score"], 1, row["adjusted_score"]])
+
+    return state
+
+def write_rollups(supabase, states, scoring_version):
+    # states: {crd: [sum, count, max]} for every advisor to rewrite
+    now = datetime.utcnow().isoformat()
+    rows = []
+    max_score = 0
+    max_crd = None
+
+    for crd, (score_sum, count, score_max) in states.items():
+        average_score, volume_adjusted_score = rollup_scores(score_sum, count)
+        if volume_adjusted_score > max_score:
+            max_score = volume_adjusted_score
+            max_crd = crd
+
+        rows.append({
+            "crd": crd,
+            "drp_score": average_score,
+            "event_count": count,
+            "volume_adjusted_score": volume_adjusted_score,
+            "adjusted_score_sum": score_sum,
+            "adjusted_score_max": score_max,
+            "last_scored_at": now,
+            "scoring_version": scoring_version
+        })
+
+    for i in range(0, len(rows), ROLLUP_WRITE_BATCH_SIZE):
+        supabase.table("advisor_drp_scores").upsert(rows[i:i + ROLLUP_WRITE_BATCH_SIZE], on_conflict="crd").execute()
+
+    logging.info(f"✅ Wrote {len(rows)} rollups to advisor_drp_scores")
+    logging.info(f"🏆 Max volume-adjusted score this run: {max_score} (CRD: {max_crd})")
+    return len(rows)
+
+def apply_rollup_deltas(supabase, deltas, scoring_version):
+    # deltas must describe events already written to drp_event_scores
+    if not deltas:
+        return 0
+
+    state, legacy = load_rollup_state(supabase, deltas.keys())
+
+    # Legacy rows have no stored sum, so rebuild them; the rebuild already
+    # includes this run's events and must not get the delta again
+    rebuilt = rebuild_rollup_state(supabase, legacy) if legacy else {}
+    if legacy:
+        logging.info(f"🧮 Rebuilt aggregate state for {len(rebuilt)} advisors without stored sums")
+
+    states = {
+        crd: rebuilt[crd] if crd in rebuilt else merge_state(state.get(crd), delta)
+        for crd, delta in deltas.items()
+    }
+    return write_rollups(supabase, states, scoring_version)
+
+def apply_rescore_changes(supabase, changes, scoring_version):
+    # changes: (crd, old_adjusted, new_adjusted) for events already rewritten
+    # in drp_event_scores; event counts are unchanged by a rescore
+    by_crd = {}
+    for crd, old, new in changes:
+        by_crd.setdefault(crd, []).append((old, new))
+    if not by_crd:
+        return 0
+
+    state, legacy = load_rollup_state(supabase, by_crd.keys())
+    needs_rebuild = set(legacy) | {crd for crd in by_crd if crd not in state and crd not in legacy}
+
+    states = {}
+    for crd, pairs in by_crd.items():
+        if crd in needs_rebuild:
+            continue
+        score_sum, count, score_max = state[crd]
+        score_sum += sum(new - old for old, new in pairs)
+        new_max = max(new for _, new in pairs)
+        if new_max >= score_max:
+            score_max = new_max
+        elif any(old == score_max and new < old for old, new in pairs):
+            # The event holding the max went down; only a rescan can find the next one
+            needs_rebuild.add(crd)
+            continue
+        states[crd] = [score_sum, count, score_max]
+
+    if needs_rebuild:
+        states.update(rebuild_rollup_state(supabase, needs_rebuild))
+    return write_rollups(supabase, states, scoring_version)
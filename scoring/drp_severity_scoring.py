@@ -1,246 +1,278 @@
-from supabase import create_client
 from datetime import datetime
-from tqdm import tqdm
 import logging
 import os
-import requests
-import tempfile
-import time
-import hashlib
-from dotenv import load_dotenv
+import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import sys
-
-# --- Load environment variables ---
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Add repo root to path
+from scoring.advisor_rollups import apply_rescore_changes, apply_rollup_deltas, summarize_deltas
+from storage.clients import reset_clients, supabase
+from storage.event_id_index import EventIdIndex
+from storage.supabase_mirror import open_mirror, refresh_mirror
+from scoring.event_scores import (
+    build_event_score_rows, load_event_id_index, reconcile_pending_rollups, watermark_now,
+    write_event_scores,
+)
+from storage.rollup_journal import close_rollup_batch, open_rollup_batch
+from scoring.rules import CURRENT_VERSION, compile_rules, diff_rules
 
 # --- Constants ---
 BATCH_SIZE = 5000  # Larger batch for full load
-REQUEST_DELAY = 0.5
-SCORING_VERSION = "v1.0"
+SCORING_VERSION = CURRENT_VERSION  # Rule set version, see scoring/rules.py
+RESCORE_PAGE_SIZE = 1000
+SHARD_BUCKETS = 100  # CRD mod 100; caps the useful shard count
+RESCORE_COLUMNS = "event_id,crd,event_type,description,event_date,regulator,resolution,adjusted_score"
+CHECKPOINT_FILE = "drp_scoring_checkpoint.json"
+
+# Only the advisor_drp_events columns that hash_event / scoring read, paged out
+# of the local mirror in id order; shards are CRD mod 100 (its last two digits)
+SCORING_EVENTS_SQL = """
+    SELECT id, crd, flag_type, event_date, description, regulator, resolution
+    FROM advisor_drp_events
+    WHERE (? IS NULL OR id > ?) AND (? IS NULL OR CAST(substr(crd, -2) AS INTEGER) % ? = ?)
+    ORDER BY id LIMIT ?
+"""
 
 # --- Logging Setup ---
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("populate_advisor_advs.log"),
-        logging.StreamHandler()
-    ]
-)
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler("drp_severity_scoring.log"),
+            logging.StreamHandler()
+        ]
+    )
 
 # --- Helper Functions ---
-def generate_adv_url(crd: str) -> str:
-    return f"https://reports.adviserinfo.sec.gov/reports/individual/individual_{crd}.pdf"
-
-def hash_event(event) -> str:
-    raw = f"{event.get('crd')}|{event.get('flag_type')}|{event.get('description', '')}|{event.get('event_date', '')}|{event.get('regulator', '')}|{SCORING_VERSION}"
-    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
-
-FLAG_TYPE_MAP = {
-    "hasBankrupt": "Bankruptcy",
-    "hasCustComp": "Customer Complaint",
-    "hasCustDispute": "Customer Dispute",
-    "hasRegAction": "Regulatory Action",
-    "hasCriminal": "Criminal Charge",
-    "hasTermination": "Termination",
-    "hasInvstgn": "Investigation",
-    "hasJudgment": "Civil Judgment",
-    "hasCivilJudc": "Civil Judgment",
-    "hasBond": "Bond Claim",
-    "hasTestFlag": "Test"
-}
+RULES = compile_rules(SCORING_VERSION)
+FLAG_TYPE_MAP = RULES.flag_labels
 
 unmapped_flag_counts = {}
 unmapped_label_counts = {}
 low_score_label_counts = {}
 
-base_map = {
-    "Bankruptcy": 0.2,
-    "Customer Complaint": 0.6,
-    "Customer Dispute": 0.6,
-    "Regulatory Action": 0.8,
-    "Criminal Charge": 0.9,
-    "Criminal Conviction": 1.0,
-    "Criminal Disclosure": 1.0,
-    "Termination": 0.5,
-    "Investigation": 0.7,
-    "Civil Judgment": 0.6,
-    "Bond Claim": 0.4,
-    "Test": 0.4
-}
-
 def score_drp_event(event):
-    raw_flag = event.get("flag_type") or event.get("event_type")  # fallback for previously scored records
-    normalized = FLAG_TYPE_MAP.get(raw_flag, "Unknown")
-
-    base = base_map.get(normalized, 0.4)
-
-    desc = (event.get("description") or "").lower()
-    adjusted = base
-    reason = ""
+    return RULES.score_event(event)
 
-    if "fraud" in desc:
-        adjusted += 0.1
-        reason += "fraud keyword; "
-    if "unauthorized" in desc:
-        adjusted += 0.1
-        reason += "unauthorized keyword; "
-    if "client harm" in desc or "loss" in desc:
-        adjusted += 0.05
-        reason += "client harm/loss keyword; "
-
-    adjusted = min(adjusted, 1.0)
-    return base, adjusted, reason.strip()
+def score_drp_events_batch(events):
+    return RULES.score_batch(events)
 
 def fetch_existing_event_ids():
-    logging.info("📥 Fetching existing event IDs from Supabase...")
-    existing_ids = set()
-    last_id = ""
-    while True:
-        query = supabase.table("drp_event_scores").select("event_id").order("event_id").limit(1000)
-        if last_id:
-            query = query.gte("event_id", last_id)
-        result = query.execute()
-        rows = result.data or []
-
-        if not rows:
-            break
-
-        for r in rows:
-            existing_ids.add(r["event_id"])
-        last_id = rows[-1]["event_id"]
-        if len(rows) < 1000:
-            break
-    logging.info(f"✅ Retrieved {len(existing_ids)} existing event IDs")
-    return existing_ids
-
-def insert_drp_event_scores(events):
-    scored_events = []
-    now = datetime.utcnow().isoformat()
-    rows = []
-    existing_event_ids = fetch_existing_event_ids()
-
-    for e in events:
-        event_id = hash_event(e)
-        if event_id in existing_event_ids:
-            continue  # Skip previously inserted event
-        base, adjusted, reason = score_drp_event(e)
-
-        scored_event = {
-            "crd": e["crd"],
-            "event_id": event_id,
-            "event_type": e.get("flag_type"),
-            "description": e.get("description"),
-            "event_date": e.get("event_date"),
-            "regulator": e.get("regulator"),
-            "resolution": e.get("resolution"),
-            "base_score": round(base, 2),
-            "adjusted_score": round(adjusted, 2),
-            "reasoning": reason,
-            "scored_at": now,
-            "scoring_version": SCORING_VERSION
-        }
-        rows.append(scored_event)
-        scored_events.append(scored_event)
+    return load_event_id_index(supabase)
 
+def insert_drp_event_scores(events, existing_event_ids):
+    rows = build_event_score_rows(events, existing_event_ids, RULES)
     if rows:
-        for i in range(0, len(rows), BATCH_SIZE):
-            chunk = rows[i:i+BATCH_SIZE]
-            supabase.table("drp_event_scores").upsert(chunk, on_conflict=["event_id"]).execute()
-            logging.info(f"✅ Wrote batch {i}–{i + len(chunk) - 1} to drp_event_scores")
-
-    return scored_events
+        write_event_scores(supabase, rows, existing_event_ids, BATCH_SIZE)
+    return rows
 
 def insert_advisor_rollups(scored_events):
-    now = datetime.utcnow().isoformat()
-    by_crd = {}
-    for e in scored_events:
-        crd = e["crd"]
-        adjusted = e.get("adjusted_score")
-        if adjusted is None:
-            _, adjusted, _ = score_drp_event(e)
-        if crd not in by_crd:
-            by_crd[crd] = []
-        by_crd[crd].append(adjusted)
-
-    rows = []
-    max_score = 0
-    max_crd = None
-
-    for crd, scores in by_crd.items():
-        average_score = round(sum(scores) / len(scores), 3)
-        volume_penalty = 1 + 0.05 * (len(scores) - 1)
-        volume_adjusted_score = min(round(average_score * volume_penalty, 3), 1.0)
-
-        if volume_adjusted_score > max_score:
-            max_score = volume_adjusted_score
-            max_crd = crd
-
-        rows.append({
-            "crd": crd,
-            "drp_score": average_score,
-            "event_count": len(scores),
-            "volume_adjusted_score": volume_adjusted_score,
-            "last_scored_at": now,
-            "scoring_version": SCORING_VERSION
-        })
-
-    if rows:
-        supabase.table("advisor_drp_scores").upsert(rows, on_conflict=["crd"]).execute()
-        logging.info(f"✅ Wrote {len(rows)} rollups to advisor_drp_scores")
-        logging.info(f"🏆 Max volume-adjusted score: {max_score} (CRD: {max_crd})")
-
-def get_all_drp_events():
-    logging.info("📥 Fetching all DRP events from Supabase...")
-    all_events = []
-    last_id = ""
-
-    while True:
-        query = supabase.table("advisor_drp_events").select("*").order("id").limit(BATCH_SIZE)
+    # Applies only this run's events on top of each advisor's stored sum/count/max
+    unscored = [e for e in scored_events if e.get("adjusted_score") is None]
+    _, unscored_adjusted, _ = score_drp_events_batch(unscored)
+    fallback = iter(round(a, 2) for a in unscored_adjusted)
+
+    adjusted_scores = [
+        e["adjusted_score"] if e.get("adjusted_score") is not None else next(fallback)
+        for e in scored_events
+    ]
+    deltas = summarize_deltas((e["crd"] for e in scored_events), adjusted_scores)
+    apply_rollup_deltas(supabase, deltas, SCORING_VERSION)
+
+# --- Selective Rescoring ---
+def find_outdated_scoring_version():
+    result = supabase.table("drp_event_scores") \
+        .select("scoring_version") \
+        .neq("scoring_version", SCORING_VERSION) \
+        .limit(1) \
+        .execute()
+    rows = result.data or []
+    return rows[0]["scoring_version"] if rows else None
+
+def rescore_for_rule_change(old_version):
+    flags, keywords, everything = diff_rules(old_version, SCORING_VERSION)
+    if everything:
+        logging.info(f"♻️ Rules {old_version} → {SCORING_VERSION}: full rescore required")
+    else:
+        logging.info(
+            f"♻️ Rules {old_version} → {SCORING_VERSION}: rescoring flags {sorted(flags)} "
+            f"and keywords {sorted(keywords)}"
+        )
+
+    rescored = 0
+    last_id = None
+    while flags or keywords or everything:
+        query = supabase.table("drp_event_scores") \
+            .select(RESCORE_COLUMNS) \
+            .eq("scoring_version", old_version) \
+            .order("event_id") \
+            .limit(RESCORE_PAGE_SIZE)
+        if not everything:
+            filters = [f"event_type.in.({','.join(sorted(flags))})"] if flags else []
+            filters += [f'description.ilike."*{keyword}*"' for keyword in sorted(keywords)]
+            query = query.or_(",".join(filters))
         if last_id:
-            query = query.gte("id", last_id)
-
-        result = query.execute()
-        batch = result.data or []
+            query = query.gt("event_id", last_id)
 
-        if last_id and batch and batch[0]["id"] == last_id:
-            batch = batch[1:]
-
-        if not batch:
+        # Stop on an empty page only: the server may cap pages below RESCORE_PAGE_SIZE
+        rows = query.execute().data or []
+        if not rows:
             break
+        last_id = rows[-1]["event_id"]
 
-        all_events.extend(batch)
-        last_id = batch[-1]["id"]
-        logging.info(f"🔁 Fetched {len(batch)} events (Total: {len(all_events)})")
-
-    logging.info(f"📊 Total DRP events fetched: {len(all_events)}")
-    return all_events
+        now = datetime.utcnow().isoformat()
+        bases, adjusteds, reasons = score_drp_events_batch(rows)
+        updates = []
+        changes = []
+        for row, base, adjusted, reason in zip(rows, bases, adjusteds, reasons):
+            adjusted = round(adjusted, 2)
+            changes.append((row["crd"], row["adjusted_score"], adjusted))
+            updates.append({
+                **row,
+                "base_score": round(base, 2),
+                "adjusted_score": adjusted,
+                "reasoning": reason,
+                "scored_at": now,
+                "scoring_version": SCORING_VERSION
+            })
+
+        # Same event_id, so rows are updated in place
+        open_rollup_batch("rescore", (row["crd"] for row in rows))
+        supabase.table("drp_event_scores").upsert(updates, on_conflict=["event_id"]).execute()
+        apply_rescore_changes(supabase, changes, SCORING_VERSION)
+        close_rollup_batch("rescore")
+        rescored += len(rows)
+        logging.info(f"🔁 Rescored {rescored} events")
+
+    # Every other row scores identically under the new rules
+    supabase.table("drp_event_scores").update({"scoring_version": SCORING_VERSION}) \
+        .eq("scoring_version", old_version).execute()
+    supabase.table("advisor_drp_scores").update({"scoring_version": SCORING_VERSION}) \
+        .eq("scoring_version", old_version).execute()
+    logging.info(f"✅ Rescored {rescored} events affected by {old_version} → {SCORING_VERSION}")
+    return rescored
+
+def checkpoint_file(shard=None, shard_count=1):
+    if shard is None:
+        return CHECKPOINT_FILE
+    return CHECKPOINT_FILE.replace(".json", f".shard{shard}of{shard_count}.json")
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {"last_id": None}
+
+def save_checkpoint(last_id, path=CHECKPOINT_FILE):
+    with open(path, "w") as f:
+        json.dump({"last_id": last_id}, f)
+
+def clear_checkpoint(path=CHECKPOINT_FILE):
+    if os.path.exists(path):
+        os.remove(path)
+
+def iter_drp_event_pages(after_id=None, shard=None, shard_count=1):
+    # Pages arrive in id order, so the caller can checkpoint on the last id of each page.
+    # Reads the mirror main() refreshed; each shard process opens its own connection
+    mirror = open_mirror()
+    try:
+        while True:
+            params = (after_id, after_id, shard, shard_count, shard, BATCH_SIZE)
+            page = [dict(row) for row in mirror.execute(SCORING_EVENTS_SQL, params)]
+            if not page:
+                return
+            yield page
+            after_id = page[-1]["id"]
+    finally:
+        mirror.close()
+
+def score_partition(existing_event_ids, shard=None, shard_count=1, debug=False):
+    path = checkpoint_file(shard, shard_count)
+    writer = "scoring" if shard is None else f"scoring.shard{shard}of{shard_count}"
+    checkpoint = load_checkpoint(path)
+    label = "" if shard is None else f"[shard {shard + 1}/{shard_count}] "
+    if checkpoint.get("last_id") is not None:
+        logging.info(f"⏩ {label}Resuming after advisor_drp_events id {checkpoint['last_id']}")
+
+    base_score_by_label = Counter()
+    total_events = 0
+    total_scored = 0
+
+    # Each page is scored and written before the next one is fetched
+    for page in iter_drp_event_pages(checkpoint.get("last_id"), shard, shard_count):
+        # Journaled until the rollups land: the written score rows alone mark
+        # these events as scored for every later run
+        open_rollup_batch(writer, (e["crd"] for e in page))
+        scored_events = insert_drp_event_scores(page, existing_event_ids)
+        insert_advisor_rollups(scored_events)
+        close_rollup_batch(writer)
+        save_checkpoint(page[-1]["id"], path)
+
+        total_events += len(page)
+        total_scored += len(scored_events)
+        logging.info(f"🔁 {label}Processed {len(page)} events (Total: {total_events}, newly scored: {total_scored})")
+
+        if debug:
+            bases, _, _ = score_drp_events_batch(scored_events)
+            for e, base in zip(scored_events, bases):
+                flag_label = FLAG_TYPE_MAP.get(e.get("event_type"), "Unknown")
+                base_score_by_label[(flag_label, base)] += 1
+
+    clear_checkpoint(path)
+    return total_events, base_score_by_label
+
+def run_shard(shard, shard_count, debug):
+    # Worker process: its own HTTP client, a read-only view of the event ID
+    # index, and exclusive ownership of its CRDs' rollups (no cross-shard barrier)
+    reset_clients()
+    existing_event_ids = EventIdIndex()
+    total_events, base_score_by_label = score_partition(existing_event_ids, shard, shard_count, debug)
+    new_ids = [digest.hex() for digest in existing_event_ids.pending]
+    existing_event_ids.close()
+    return total_events, base_score_by_label, new_ids
+
+def score_sharded(existing_event_ids, shard_count, debug):
+    total_events = 0
+    base_score_by_label = Counter()
+    with ProcessPoolExecutor(max_workers=shard_count) as pool:
+        futures = [pool.submit(run_shard, shard, shard_count, debug) for shard in range(shard_count)]
+        for future in as_completed(futures):
+            events, labels, new_ids = future.result()
+            total_events += events
+            base_score_by_label.update(labels)
+            existing_event_ids.update(new_ids)
+    return total_events, base_score_by_label
 
 # --- Main Function ---
-from collections import Counter
+def main(debug: bool = False, shards: int = 1):
+    reconcile_pending_rollups(supabase, SCORING_VERSION)
+    rescored_versions = set()
+    outdated = find_outdated_scoring_version()
+    while outdated and outdated not in rescored_versions:
+        rescore_for_rule_change(outdated)
+        rescored_versions.add(outdated)
+        outdated = find_outdated_scoring_version()
+
+    run_started = watermark_now()
+    existing_event_ids = fetch_existing_event_ids()
+    refresh_mirror(["advisor_drp_events"]).close()
 
-def main(debug: bool = False):
-    events = get_all_drp_events()
-    if not events:
+    if shards > 1:
+        logging.info(f"🧩 Scoring with {shards} CRD shards")
+        total_events, base_score_by_label = score_sharded(existing_event_ids, shards, debug)
+    else:
+        total_events, base_score_by_label = score_partition(existing_event_ids, debug=debug)
+
+    existing_event_ids.save(scored_at_watermark=run_started)
+    if not total_events:
         logging.info("✅ No DRP events found to score.")
         return 0
 
-    scored_events = insert_drp_event_scores(events)
-    insert_advisor_rollups(scored_events)
     logging.info("🎯 DRP severity scoring complete.")
 
     if debug:
-        base_score_by_label = Counter()
-        for e in scored_events:
-            base, _, _ = score_drp_event(e)
-            raw_flag = e.get("flag_type") or e.get("event_type")
-            label = FLAG_TYPE_MAP.get(raw_flag, "Unknown")
-            base_score_by_label[(label, base)] += 1
-
         logging.info("🧪 Base Score Counts by Normalized Label:")
         for (label, base), count in base_score_by_label.items():
             logging.info(f"  {label}: base={base} count={count}")
@@ -260,9 +292,23 @@ def main(debug: bool = False):
             for label, count in low_score_label_counts.items():
                 logging.info(f"  {label}: {count}")
 
-    return len(events)
+    return total_events
+
+def parse_shards(argv):
+    value = os.getenv("DRP_SCORING_SHARDS", "1")
+    if "--shards" in argv:
+        position = argv.index("--shards") + 1
+        value = argv[position] if position < len(argv) else None
+    if value == "auto":
+        shards = os.cpu_count() or 1
+    elif value is not None and value.isdigit():
+        shards = int(value)
+    else:
+        raise SystemExit(f"❌ --shards needs a number or 'auto' (usage: --shards N|auto), got {value!r}")
+    return min(max(shards, 1), SHARD_BUCKETS)
 
 if __name__ == "__main__":
+    setup_logging()
     debug_flag = '--debug' in sys.argv
-    inserted = main(debug=debug_flag)
+    inserted = main(debug=debug_flag, shards=parse_shards(sys.argv))
     sys.exit(0)
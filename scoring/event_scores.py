@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+import hashlib
+import logging
+from storage.event_id_index import EventIdIndex
+from storage.rollup_journal import clear_rollup_journal, close_rollup_batch, open_rollup_batch, pending_rollup_crds
+from storage.table_scan import scan_pages
+from scoring.advisor_rollups import rebuild_rollup_state, write_rollups
+
+EVENT_ID_SALT = "v1.0"  # Historical SCORING_VERSION baked into every existing event_id
+WATERMARK_SAFETY_MARGIN = timedelta(hours=1)  # scored_at is client time; allow for clock skew
+EVENT_ID_PAGE_SIZE = 1000
+
+def hash_event(event) -> str:
+    # Event identity only: EVENT_ID_SALT is frozen so rule changes never re-key events.
+    # Null description/regulator hash like the absent columns older rows were hashed without
+    raw = f"{event.get('crd')}|{event.get('flag_type')}|{event.get('description') or ''}|{event.get('event_date', '')}|{event.get('regulator') or ''}|{EVENT_ID_SALT}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def watermark_now():
+    return (datetime.utcnow() - WATERMARK_SAFETY_MARGIN).isoformat()
+
+def load_event_id_index(supabase):
+    # Local sorted-digest index; only IDs scored since the last saved watermark
+    # are downloaded, the full column only when no index exists yet
+    index = EventIdIndex()
+    fetch_started = watermark_now()
+    watermark = index.meta.get("scored_at_watermark") if index.exists() else None
+
+    if watermark:
+        logging.info(f"📥 Fetching event IDs scored since {watermark} ({len(index):,} cached locally)...")
+    else:
+        logging.info("📥 No local event ID index — fetching all existing event IDs from Supabase...")
+
+    fetched = 0
+    filters = [("gte", "scored_at", watermark)] if watermark else []
+    pages = scan_pages(
+        "drp_event_scores", "event_id", key="event_id", filters=filters,
+        page_size=EVENT_ID_PAGE_SIZE, ordered=False, client=supabase,
+    )
+    for rows in pages:
+        index.update(r["event_id"] for r in rows)
+        fetched += len(rows)
+
+    index.save(scored_at_watermark=fetch_started)
+    logging.info(f"✅ Retrieved {fetched} event IDs ({len(index):,} known)")
+    return index
+
+def build_event_score_rows(events, existing_event_ids, rules):
+    # drp_event_scores rows for events not already scored, batch-scored with `rules`
+    now = datetime.utcnow().isoformat()
+    new_events = []
+    event_ids = []
+    page_ids = set()
+    for e in events:
+        event_id = hash_event(e)
+        if event_id in existing_event_ids or event_id in page_ids:
+            continue  # Skip previously inserted event
+        page_ids.add(event_id)
+        new_events.append(e)
+        event_ids.append(event_id)
+
+    bases, adjusteds, reasons = rules.score_batch(new_events)
+
+    rows = []
+    for e, event_id, base, adjusted, reason in zip(new_events, event_ids, bases, adjusteds, reasons):
+        rows.append({
+            "crd": e["crd"],
+            "event_id": event_id,
+            "event_type": e.get("flag_type"),
+            "description": e.get("description"),
+            "event_date": e.get("event_date"),
+            "regulator": e.get("regulator"),
+            "resolution": e.get("resolution"),
+            "base_score": round(base, 2),
+            "adjusted_score": round(adjusted, 2),
+            "reasoning": reason,
+            "scored_at": now,
+            "scoring_version": rules.version
+        })
+    return rows
+
+def write_event_scores(supabase, rows, existing_event_ids, batch_size):
+    for i in range(0, len(rows), batch_size):
+        chunk = rows[i:i + batch_size]
+        supabase.table("drp_event_scores").upsert(chunk, on_conflict=["event_id"]).execute()
+        logging.info(f"✅ Wrote batch {i}–{i + len(chunk) - 1} to drp_event_scores")
+    existing_event_ids.update(row["event_id"] for row in rows)
+
+def rebuild_rollups(supabase, crds, scoring_version):
+    # Rewrites the advisors' rollups from their score rows; advisors left
+    # without any score row lose their rollup
+    states = rebuild_rollup_state(supabase, crds)
+    emptied = set(crds) - set(states)
+    for crd in emptied:
+        supabase.table("advisor_drp_scores").delete().eq("crd", crd).execute()
+    if states:
+        write_rollups(supabase, states, scoring_version)
+    return len(states)
+
+def reconcile_pending_rollups(supabase, scoring_version):
+    # A run that died between writing score rows and applying their deltas
+    # left those advisors in the rollup journal; the rebuild is idempotent
+    crds = pending_rollup_crds()
+    if not crds:
+        return 0
+    logging.info(f"🧮 Rebuilding rollups for {len(crds)} advisors left unapplied by an earlier run")
+    rebuild_rollups(supabase, crds, scoring_version)
+    clear_rollup_journal()
+    return len(crds)
+
+def retire_event_scores(supabase, crd_by_event_id, scoring_version, existing_event_ids, batch_size=500):
+    # Drop score rows whose source event no longer exists and rebuild the
+    # affected advisors' rollups from what remains. The IDs leave the local
+    # index first: an ID the index still holds would keep a returning event
+    # from ever being scored, while a forgotten one is at worst rescored.
+    event_ids = list(crd_by_event_id)
+    crds = set(crd_by_event_id.values())
+    existing_event_ids.discard(event_ids)
+    existing_event_ids.save()
+    open_rollup_batch("retire", crds)
+    for i in range(0, len(event_ids), batch_size):
+        supabase.table("drp_event_scores").delete().in_("event_id", event_ids[i:i + batch_size]).execute()
+
+    rebuild_rollups(supabase, crds, scoring_version)
+    close_rollup_batch("retire")
+    logging.info(f"🧹 Retired {len(event_ids)} superseded event scores across {len(crds)} advisors")
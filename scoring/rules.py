@@ -0,0 +1,178 @@
+from bisect import bisect_right
+from itertools import accumulate
+
+# --- Versioned Rule Sets ---
+# Never edit a published version in place: add a new entry and point
+# CURRENT_VERSION at it. drp_severity_scoring rescores only the events the
+# difference between the two versions can affect.
+RULESETS = {
+    "v1.0": {
+        "flag_labels": {
+            "hasBankrupt": "Bankruptcy",
+            "hasCustComp": "Customer Complaint",
+            "hasCustDispute": "Customer Dispute",
+            "hasRegAction": "Regulatory Action",
+            "hasCriminal": "Criminal Charge",
+            "hasTermination": "Termination",
+            "hasInvstgn": "Investigation",
+            "hasJudgment": "Civil Judgment",
+            "hasCivilJudc": "Civil Judgment",
+            "hasBond": "Bond Claim",
+            "hasTestFlag": "Test"
+        },
+        "base_scores": {
+            "Bankruptcy": 0.2,
+            "Customer Complaint": 0.6,
+            "Customer Dispute": 0.6,
+            "Regulatory Action": 0.8,
+            "Criminal Charge": 0.9,
+            "Criminal Conviction": 1.0,
+            "Criminal Disclosure": 1.0,
+            "Termination": 0.5,
+            "Investigation": 0.7,
+            "Civil Judgment": 0.6,
+            "Bond Claim": 0.4,
+            "Test": 0.4
+        },
+        "default_base": 0.4,
+        # Applied in order: (keywords, bonus, reason)
+        "keyword_adjustments": [
+            (("fraud",), 0.1, "fraud keyword; "),
+            (("unauthorized",), 0.1, "unauthorized keyword; "),
+            (("client harm", "loss"), 0.05, "client harm/loss keyword; "),
+        ],
+        "max_score": 1.0,
+    },
+}
+
+CURRENT_VERSION = "v1.0"
+
+
+class CompiledRules:
+    def __init__(self, version, ruleset):
+        self.version = version
+        self.flag_labels = ruleset["flag_labels"]
+        self.base_scores = ruleset["base_scores"]
+        self.default_base = ruleset["default_base"]
+        self.keyword_adjustments = ruleset["keyword_adjustments"]
+        self.max_score = ruleset["max_score"]
+
+        self.keyword_bits = {
+            keyword: 1 << i
+            for i, (keywords, _, _) in enumerate(self.keyword_adjustments)
+            for keyword in keywords
+        }
+        self._build_outcome_table()
+
+    def base_for_flag(self, raw_flag):
+        label = self.flag_labels.get(raw_flag, "Unknown")
+        return self.base_scores.get(label, self.default_base)
+
+    def score_event(self, event):
+        raw_flag = event.get("flag_type") or event.get("event_type")  # fallback for previously scored records
+        base = self.base_for_flag(raw_flag)
+
+        desc = (event.get("description") or "").lower()
+        adjusted = base
+        reason = ""
+
+        for keywords, bonus, text in self.keyword_adjustments:
+            if any(keyword in desc for keyword in keywords):
+                adjusted += bonus
+                reason += text
+
+        adjusted = min(adjusted, self.max_score)
+        return base, adjusted, reason.strip()
+
+    # --- Batch Scoring ---
+    def _build_outcome_table(self):
+        # outcomes[code][mask] = (base, adjusted, reason), computed with the same
+        # float operations as score_event so batch results are identical
+        labels = sorted(set(self.flag_labels.values()) | {"Unknown"})
+        label_codes = {label: i for i, label in enumerate(labels)}
+        self.flag_codes = {flag: label_codes[label] for flag, label in self.flag_labels.items()}
+        self.unknown_code = label_codes["Unknown"]
+
+        self.outcomes = []
+        for label in labels:
+            base = self.base_scores.get(label, self.default_base)
+            row = []
+            for mask in range(1 << len(self.keyword_adjustments)):
+                adjusted = base
+                reason = ""
+                for i, (_, bonus, text) in enumerate(self.keyword_adjustments):
+                    if mask & (1 << i):
+                        adjusted += bonus
+                        reason += text
+                row.append((base, min(adjusted, self.max_score), reason.strip()))
+            self.outcomes.append(row)
+
+    def find_keyword_masks(self, descriptions):
+        # Scan the whole page as one newline-joined buffer (no keyword contains a
+        # newline); str.find runs in C and beats a regex alternation here
+        masks = [0] * len(descriptions)
+        starts = [*accumulate((len(d) + 1 for d in descriptions), initial=0)]
+        text = "\n".join(descriptions)
+
+        for keyword, bit in self.keyword_bits.items():
+            pos = text.find(keyword)
+            while pos != -1:
+                i = bisect_right(starts, pos) - 1
+                masks[i] |= bit
+                pos = text.find(keyword, starts[i + 1])  # one hit per description is enough
+        return masks
+
+    def score_batch(self, events):
+        # Columnar equivalent of score_event over a whole page of events
+        codes = [
+            self.flag_codes.get(e.get("flag_type") or e.get("event_type"), self.unknown_code)
+            for e in events
+        ]
+        masks = self.find_keyword_masks([(e.get("description") or "").lower() for e in events])
+
+        results = [self.outcomes[code][mask] for code, mask in zip(codes, masks)]
+        bases = [r[0] for r in results]
+        adjusteds = [r[1] for r in results]
+        reasons = [r[2] for r in results]
+        return bases, adjusteds, reasons
+
+
+_compiled = {}
+
+def compile_rules(version=CURRENT_VERSION):
+    if version not in _compiled:
+        _compiled[version] = CompiledRules(version, RULESETS[version])
+    return _compiled[version]
+
+# --- Rule Diffs ---
+def diff_rules(old_version, new_version):
+    # Returns (flags, keywords, everything) describing which stored scores can
+    # differ between the two versions: raw flag types whose base changed,
+    # keywords whose adjustment changed, or everything when that cannot be narrowed
+    if old_version not in RULESETS:
+        return set(), set(), True
+
+    old = compile_rules(old_version)
+    new = compile_rules(new_version)
+
+    if old.max_score != new.max_score or old.default_base != new.default_base:
+        return set(), set(), True
+
+    flags = {
+        flag for flag in set(old.flag_labels) | set(new.flag_labels)
+        if old.base_for_flag(flag) != new.base_for_flag(flag)
+    }
+
+    old_groups = [(tuple(k), b, r) for k, b, r in old.keyword_adjustments]
+    new_groups = [(tuple(k), b, r) for k, b, r in new.keyword_adjustments]
+    common_old = [g for g in old_groups if g in new_groups]
+    common_new = [g for g in new_groups if g in old_groups]
+    if common_old != common_new:
+        # Reordering changes reason strings and float summation order everywhere
+        return flags, set(), True
+
+    keywords = set()
+    for keywords_, _, _ in set(old_groups) ^ set(new_groups):
+        keywords.update(keywords_)
+
+    return flags, keywords, False
@@ -0,0 +1,7 @@
+-- Per-CRD aggregate state used by scoring/advisor_rollups.py to apply
+-- newly scored events as deltas instead of rescanning drp_event_scores.
+-- Rows created before this migration keep NULLs and are rebuilt from
+-- drp_event_scores the next time one of their events is scored.
+alter table advisor_drp_scores
+    add column if not exists adjusted_score_sum double precision,
+    add column if not exists adjusted_score_max double precision;
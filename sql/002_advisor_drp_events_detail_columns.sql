@@ -0,0 +1,14 @@
+-- Event-level DRP detail extracted by ingest/ingest_all_drp_events.py.
+-- One row per detailed event: (crd, flag_type, event_seq) replaces the old
+-- one-row-per-flag key; flag-level rows keep event_seq = 0.
+alter table advisor_drp_events
+    add column if not exists event_seq integer not null default 0,
+    add column if not exists description text,
+    add column if not exists regulator text,
+    add column if not exists resolution text;
+
+alter table advisor_drp_events
+    drop constraint if exists advisor_drp_events_crd_flag_type_key;
+
+create unique index if not exists advisor_drp_events_crd_flag_type_event_seq_key
+    on advisor_drp_events (crd, flag_type, event_seq);
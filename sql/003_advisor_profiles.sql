@@ -0,0 +1,27 @@
+-- Denormalized per-advisor profile maintained by ingest/update_advisor_profiles.py:
+-- identity, current firm attributes, disclosure counts, DRP scores and ADV URL
+-- in one row, so readers do a single primary-key lookup instead of joining
+-- advisors, firm_data, advisor_drp_scores and advisor_advs.
+create table if not exists advisor_profiles (
+    crd_number bigint primary key,
+    advisor_name text,
+    status text,
+    firm_crd_number bigint,
+    firm_name text,
+    firm_registration_type text,
+    firm_aum double precision,
+    firm_employees integer,
+    firm_city text,
+    firm_state text,
+    has_disclosures boolean,
+    disclosures_count integer,
+    drp_score double precision,
+    drp_event_count integer,
+    drp_volume_adjusted_score double precision,
+    adv_url text,
+    adv_fetched_at timestamp,
+    profile_updated_at timestamp
+);
+
+create index if not exists advisor_profiles_firm_crd_number_idx
+    on advisor_profiles (firm_crd_number);
@@ -0,0 +1,16 @@
+-- Per-firm advisor aggregates written by ingest/firm_advisor_summaries.py from
+-- the parsed advisor feed; only firms whose figures changed are rewritten.
+-- avg_drp_score covers the firm's advisors that have an advisor_drp_scores row.
+create table if not exists firm_advisor_summaries (
+    firm_crd_number bigint primary key,
+    firm_name text,
+    advisor_count integer not null,
+    active_count integer not null,
+    inactive_count integer not null,
+    disclosed_count integer not null,
+    disclosed_share double precision,
+    disclosures_total integer not null,
+    scored_count integer not null,
+    avg_drp_score double precision,
+    updated_at timestamp
+);
@@ -0,0 +1,6 @@
+-- advisors.disclosures_count counts disclosure events, not DRP flags: one per
+-- advisor_drp_events row (each detailed event, or the flag-level row of a DRP
+-- without a detail section). ingest/fetch_and_parse_advisors.py and
+-- ingest/update_advisor_disclosure_flags.py both write this figure.
+comment on column advisors.disclosures_count is
+    'Number of disclosure events (advisor_drp_events rows) for the advisor, not the number of DRP flags';
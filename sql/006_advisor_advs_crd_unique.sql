@@ -0,0 +1,17 @@
+-- ingest/populate_advisor_advs.py upserts advisor_advs on crd, which PostgREST
+-- only accepts with a unique constraint or index on that column. Duplicate
+-- rows from the earlier insert-only loader are removed first, keeping the
+-- most recently fetched row per CRD.
+delete from advisor_advs a
+using advisor_advs b
+where a.crd = b.crd
+  and (a.last_fetched_at, a.ctid) < (b.last_fetched_at, b.ctid);
+
+delete from advisor_advs a
+using advisor_advs b
+where a.crd = b.crd
+  and a.last_fetched_at is null
+  and (b.last_fetched_at is not null or a.ctid < b.ctid);
+
+create unique index if not exists advisor_advs_crd_key
+    on advisor_advs (crd);
@@ -0,0 +1,14 @@
+-- Keyword flags from each advisor's individual IAPD report, written by
+-- ingest/extract_adv_text.py next to the report's adv_url. The reports are not
+-- the firm's ADV Part 2 brochure, so the firm_data flags earlier runs derived
+-- from them are cleared; firm_data.mentions_* stay null until brochures are
+-- collected.
+alter table advisor_advs
+    add column if not exists mentions_fiduciary boolean,
+    add column if not exists mentions_fee_only boolean;
+
+update firm_data
+set mentions_fiduciary = null,
+    mentions_fee_only = null
+where mentions_fiduciary is not null
+   or mentions_fee_only is not null;
@@ -0,0 +1,44 @@
+-- changed_at moves only when a row's content changes, so the local mirror
+-- (storage/supabase_mirror.py) pulls just the rows that changed. The writers
+-- re-stamp advisors.last_updated and advisor_drp_events.created_at on every
+-- nightly upsert, which made those columns useless as watermarks. firm_data
+-- had no change column at all.
+--
+-- The trigger compares the whole row minus changed_at and the run-timestamp
+-- columns passed as arguments. Upserts that rewrite identical content keep
+-- the old changed_at.
+create or replace function bump_changed_at() returns trigger
+language plpgsql as $$
+declare
+    ignored text[] := coalesce(tg_argv, '{}') || '{changed_at}';
+begin
+    if tg_op = 'INSERT' then
+        new.changed_at := now();
+    elsif (to_jsonb(new) - ignored) is distinct from (to_jsonb(old) - ignored) then
+        new.changed_at := now();
+    else
+        new.changed_at := old.changed_at;
+    end if;
+    return new;
+end;
+$$;
+
+alter table advisors add column if not exists changed_at timestamptz not null default now();
+alter table advisor_drp_events add column if not exists changed_at timestamptz not null default now();
+alter table firm_data add column if not exists changed_at timestamptz not null default now();
+
+create index if not exists advisors_changed_at on advisors (changed_at);
+create index if not exists advisor_drp_events_changed_at on advisor_drp_events (changed_at);
+create index if not exists firm_data_changed_at on firm_data (changed_at);
+
+drop trigger if exists advisors_changed_at on advisors;
+create trigger advisors_changed_at before insert or update on advisors
+    for each row execute function bump_changed_at('last_updated');
+
+drop trigger if exists advisor_drp_events_changed_at on advisor_drp_events;
+create trigger advisor_drp_events_changed_at before insert or update on advisor_drp_events
+    for each row execute function bump_changed_at('created_at');
+
+drop trigger if exists firm_data_changed_at on firm_data;
+create trigger firm_data_changed_at before insert or update on firm_data
+    for each row execute function bump_changed_at();
@@ -0,0 +1,25 @@
+import json
+import os
+
+CACHE_FILE = "storage/adv_schedule_state.json"
+
+# {"advisors": {crd: [has_disclosures, disclosures_count, firm_crd_number]},
+#  "pending": {crd: change_priority}}
+def load_schedule_state():
+    if not os.path.exists(CACHE_FILE):
+        return {"advisors": {}, "pending": {}}
+
+    try:
+        with open(CACHE_FILE, "r") as f:
+            state = json.load(f)
+    except json.JSONDecodeError:
+        print("⚠️ Warning: Corrupted adv_schedule_state.json — ignoring and rebuilding.")
+        return {"advisors": {}, "pending": {}}
+
+    state.setdefault("advisors", {})
+    state.setdefault("pending", {})
+    return state
+
+def save_schedule_state(state):
+    with open(CACHE_FILE, "w") as f:
+        json.dump(state, f, separators=(",", ":"))
@@ -0,0 +1,28 @@
+import json
+import os
+
+CACHE_FILE = "storage/adv_text_cache.json"
+
+# {"documents": {sha256: {"mentions_fiduciary": bool, "mentions_fee_only": bool}},
+#  "keys": {object_key: sha256},
+#  "advisors": {advisor crd: flags last written to advisor_advs}}
+def load_adv_text_cache():
+    if not os.path.exists(CACHE_FILE):
+        return {"documents": {}, "keys": {}, "advisors": {}}
+
+    try:
+        with open(CACHE_FILE, "r") as f:
+            cache = json.load(f)
+    except json.JSONDecodeError:
+        print("⚠️ Warning: Corrupted adv_text_cache.json — ignoring and rebuilding.")
+        return {"documents": {}, "keys": {}, "advisors": {}}
+
+    cache.setdefault("documents", {})
+    cache.setdefault("keys", {})
+    cache.setdefault("advisors", {})
+    cache.pop("firms", None)  # Firm-level flags are no longer written
+    return cache
+
+def save_adv_text_cache(cache):
+    with open(CACHE_FILE, "w") as f:
+        json.dump(cache, f)
@@ -0,0 +1,50 @@
+from collections import namedtuple
+from json.encoder import encode_basestring
+
+# Column order of the advisors table; records are built once in this layout
+ADVISOR_COLUMNS = (
+    "crd_number",
+    "advisor_name",
+    "firm_crd_number",
+    "firm_name",
+    "status",
+    "has_disclosures",
+    "disclosures_count",
+    "last_updated",
+)
+
+# Tuple-backed (no per-record __dict__), CRDs held as ints
+AdvisorRecord = namedtuple("AdvisorRecord", ADVISOR_COLUMNS)
+
+# One object per advisor, filled with %-formatting; strings go through the
+# stdlib C string escaper used by json.dumps
+RECORD_TEMPLATE = (
+    '{"crd_number":%d,"advisor_name":%s,"firm_crd_number":%s,"firm_name":%s,'
+    '"status":%s,"has_disclosures":%s,"disclosures_count":%d,"last_updated":%s}'
+)
+
+def to_crd(value):
+    return int(value) if value and value.isdigit() else None
+
+def _optional_str(value):
+    return "null" if value is None else encode_basestring(value)
+
+def _optional_int(value):
+    return "null" if value is None else str(value)
+
+def encode_advisor_batch(records):
+    # JSON array bytes for a PostgREST bulk insert, without intermediate dicts
+    body = ",".join([
+        RECORD_TEMPLATE % (
+            r.crd_number,
+            encode_basestring(r.advisor_name),
+            _optional_int(r.firm_crd_number),
+            _optional_str(r.firm_name),
+            encode_basestring(r.status),
+            "true" if r.has_disclosures else "false",
+            r.disclosures_count,
+            encode_basestring(r.last_updated),
+        )
+        for r in records
+    ])
+    return ("[" + body + "]").encode("utf-8")
@@ -0,0 +1,27 @@
+import json
+import os
+
+CACHE_FILE = "storage/airtable_sync_state.json"
+
+# {"records": {crd: airtable record id}, "pushed": {crd: digest of the fields last sent},
+#  "listed_at": records created before this (UTC) are already in "records"}
+def load_airtable_state():
+    if not os.path.exists(CACHE_FILE):
+        return {"records": {}, "pushed": {}}
+
+    try:
+        with open(CACHE_FILE, "r") as f:
+            state = json.load(f)
+    except json.JSONDecodeError:
+        print("⚠️ Warning: Corrupted airtable_sync_state.json — ignoring and rebuilding.")
+        return {"records": {}, "pushed": {}}
+
+    state.setdefault("records", {})
+    state.setdefault("pushed", {})
+    return state
+
+def save_airtable_state(state):
+    tmp_path = CACHE_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp_path, CACHE_FILE)
@@ -0,0 +1,99 @@
+# storage/clients.py
+
+import os
+from functools import lru_cache
+
+# Settings and heavy clients are built on first use and shared by every stage
+# running in the same process; importing this module (or any module that uses
+# it) reads no .env file, imports no SDK and opens no connection.
+
+@lru_cache(maxsize=None)
+def get_settings():
+    from dotenv import load_dotenv
+    load_dotenv()
+    return {
+        "supabase_url": os.getenv("SUPABASE_URL"),
+        "supabase_key": os.getenv("SUPABASE_KEY"),
+        "aws_access_key_id": os.getenv("AWS_ACCESS_KEY_ID"),
+        "aws_secret_access_key": os.getenv("AWS_SECRET_ACCESS_KEY"),
+        "aws_region": os.getenv("AWS_REGION", "us-east-2"),
+        "s3_bucket": os.getenv("S3_BUCKET_NAME"),
+        "airtable_pat": os.getenv("AIRTABLE_PAT"),
+        "airtable_base_id": os.getenv("AIRTABLE_BASE_ID"),
+        "airtable_table_name": os.getenv("AIRTABLE_TABLE_NAME", "Firm Data"),
+        "airtable_url": os.getenv("AIRTABLE_URL", "https://api.airtable.com"),
+    }
+
+def require_supabase_settings():
+    settings = get_settings()
+    if not settings["supabase_url"] or not settings["supabase_key"]:
+        raise RuntimeError("Missing SUPABASE_URL or SUPABASE_KEY environment variable.")
+    return settings
+
+@lru_cache(maxsize=None)
+def get_supabase():
+    settings = require_supabase_settings()
+    from supabase import create_client
+    return create_client(settings["supabase_url"], settings["supabase_key"])
+
+@lru_cache(maxsize=None)
+def get_s3():
+    settings = get_settings()
+    if not settings["s3_bucket"]:
+        raise ValueError("Missing S3_BUCKET_NAME in environment")
+
+    import boto3
+    return boto3.client(
+        "s3",
+        aws_access_key_id=settings["aws_access_key_id"],
+        aws_secret_access_key=settings["aws_secret_access_key"],
+        region_name=settings["aws_region"],
+    )
+
+def airtable_configured():
+    settings = get_settings()
+    return bool(settings["airtable_pat"] and settings["airtable_base_id"])
+
+@lru_cache(maxsize=None)
+def get_airtable():
+    # The firm table in the configured base
+    settings = get_settings()
+    if not airtable_configured():
+        raise RuntimeError("Missing AIRTABLE_PAT or AIRTABLE_BASE_ID environment variable.")
+
+    from pyairtable import Api
+    api = Api(settings["airtable_pat"], endpoint_url=settings["airtable_url"])
+    return api.table(settings["airtable_base_id"], settings["airtable_table_name"])
+
+def supabase_rest_url(table):
+    return f"{require_supabase_settings()['supabase_url']}/rest/v1/{table}"
+
+def supabase_rest_headers(**extra):
+    key = require_supabase_settings()["supabase_key"]
+    return {
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+        "Content-Type": "application/json",
+        **extra,
+    }
+
+def reset_clients():
+    # Forked worker processes call this so they open their own connections
+    # instead of sharing the parent's sockets
+    get_supabase.cache_clear()
+    get_s3.cache_clear()
+    get_airtable.cache_clear()
+
+
+class LazyClient:
+    # Module-level stand-in: the real client is created on first attribute access
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+
+supabase = LazyClient(get_supabase)
+s3 = LazyClient(get_s3)
+airtable = LazyClient(get_airtable)
@@ -0,0 +1,207 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import csv
+import hashlib
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+# Streams a CSV export into a Supabase table: rows are read a chunk at a time,
+# mapped and typed per a declared column list, de-duplicated on the conflict key
+# (first row wins) and upserted in batches from a few concurrent workers.
+#   python storage/csv_import.py firm_data.csv firm_data --key crd_number \
+#       --column "CRD Number=crd_number:int" --column "Firm Name=firm_name" [--env-file validate/.env]
+
+# --- Constants ---
+CHUNK_ROWS = 5000
+UPSERT_BATCH_SIZE = 500
+UPSERT_WORKERS = 4
+MAX_IN_FLIGHT = UPSERT_WORKERS * 2   # batches submitted but not finished; bounds memory
+UPSERT_RETRIES = 3
+BITMAP_MAX_KEY = 1 << 28             # integer keys below this share one bitmap (≤32 MB)
+
+# --- Column types ---
+def _to_int(value):
+    # Exact for large CRDs/AUM; float only for whole-number cells like "1.5e6"
+    # or "12.0". "12.7" is not an integer, so the cell becomes None.
+    value = value.replace(",", "")
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(value)
+        return int(number)
+
+def _to_float(value):
+    return float(value.replace(",", "").replace("$", ""))
+
+def _to_bool(value):
+    lowered = value.lower()
+    if lowered in ("true", "t", "yes", "y", "1", "checked"):
+        return True
+    if lowered in ("false", "f", "no", "n", "0"):
+        return False
+    raise ValueError(value)
+
+def _to_date(value):
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+CONVERTERS = {"str": str, "int": _to_int, "float": _to_float, "bool": _to_bool, "date": _to_date}
+
+def parse_column_spec(spec):
+    # "CSV Header=column:type" → (header, column, type); type defaults to str
+    header, _, target = spec.partition("=")
+    column, _, kind = target.partition(":")
+    kind = kind or "str"
+    if not header or not column or kind not in CONVERTERS:
+        raise ValueError(f"Bad column spec {spec!r}; expected 'CSV Header=column[:{'|'.join(CONVERTERS)}]'")
+    return header, column, kind
+
+def convert_row(raw, columns):
+    # Blank or unparseable cells become None
+    row = {}
+    for header, column, kind in columns:
+        value = (raw.get(header) or "").strip()
+        if not value:
+            row[column] = None
+            continue
+        try:
+            row[column] = CONVERTERS[kind](value)
+        except (ValueError, OverflowError):
+            row[column] = None
+    return row
+
+# --- De-duplication ---
+class SeenKeys:
+    # Non-negative integer keys (CRDs) cost one bit each; anything else is
+    # remembered as an 8-byte digest
+    def __init__(self):
+        self._bits = bytearray()
+        self._digests = set()
+
+    def add(self, key):
+        # True when the key had not been seen before
+        if isinstance(key, int) and 0 <= key < BITMAP_MAX_KEY:
+            byte, mask = key >> 3, 1 << (key & 7)
+            if byte >= len(self._bits):
+                self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+            if self._bits[byte] & mask:
+                return False
+            self._bits[byte] |= mask
+            return True
+        digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).digest()
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+# --- Reading ---
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    # utf-8-sig: Airtable and Excel exports start with a byte-order mark
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        chunk = []
+        for raw in reader:
+            chunk.append(raw)
+            if len(chunk) >= chunk_rows:
+                yield reader.fieldnames, chunk
+                chunk = []
+        if chunk:
+            yield reader.fieldnames, chunk
+
+# --- Upserting ---
+def upsert_batch(client, table, key, batch):
+    for attempt in range(1, UPSERT_RETRIES + 1):
+        try:
+            client.table(table).upsert(batch, on_conflict=key).execute()
+            return len(batch)
+        except Exception:
+            if attempt == UPSERT_RETRIES:
+                raise
+            time.sleep(2 ** attempt)
+
+def import_csv(path, table, columns, key, batch_size=UPSERT_BATCH_SIZE, workers=UPSERT_WORKERS, client=None):
+    # columns: [(csv header, column, type)]; key: the column upserts conflict on
+    if client is None:
+        from storage.clients import supabase
+        client = supabase
+    if key not in {column for _, column, _ in columns}:
+        raise ValueError(f"Conflict key {key!r} is not one of the mapped columns")
+
+    seen = SeenKeys()
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "missing_key": 0, "failed_batches": 0}
+    started = time.time()
+    pending = set()
+
+    def collect(done):
+        for future in done:
+            pending.discard(future)
+            try:
+                stats["imported"] += future.result()
+            except Exception as e:
+                stats["failed_batches"] += 1
+                print(f"❌ Batch upsert into {table} failed: {e}")
+
+    print(f"📥 Importing {path} into {table} (key {key})...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        checked_headers = False
+        for fieldnames, chunk in read_chunks(path):
+            if not checked_headers:
+                missing = [header for header, _, _ in columns if header not in (fieldnames or [])]
+                if missing:
+                    raise ValueError(f"CSV is missing mapped columns: {', '.join(missing)}")
+                checked_headers = True
+
+            for raw in chunk:
+                stats["read"] += 1
+                row = convert_row(raw, columns)
+                if row[key] is None:
+                    stats["missing_key"] += 1
+                    continue
+                if not seen.add(row[key]):
+                    stats["duplicates"] += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    if len(pending) >= MAX_IN_FLIGHT:
+                        collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                    pending.add(pool.submit(upsert_batch, client, table, key, batch))
+                    batch = []
+
+            print(f"📦 Read {stats['read']:,} rows ({stats['imported']:,} upserted so far)")
+
+        if batch:
+            pending.add(pool.submit(upsert_batch, client, table, key, batch))
+        collect(wait(pending).done)
+
+    elapsed = time.time() - started
+    print(
+        f"✅ Imported {stats['imported']:,} of {stats['read']:,} rows into {table} in {elapsed:.1f}s "
+        f"({stats['duplicates']:,} duplicate keys, {stats['missing_key']:,} without a key, "
+        f"{stats['failed_batches']} failed batches)"
+    )
+    return stats
+
+def load_env_file(argv):
+    # Explicit --env-file wins over the .env found from the working directory
+    if "--env-file" in argv:
+        from dotenv import load_dotenv
+        load_dotenv(argv[argv.index("--env-file") + 1], override=True)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    load_env_file(args)
+    specs = [args[i + 1] for i, arg in enumerate(args) if arg == "--column"]
+    csv_path, table_name = args[0], args[1]
+    conflict_key = args[args.index("--key") + 1]
+    result = import_csv(csv_path, table_name, [parse_column_spec(s) for s in specs], conflict_key)
+    sys.exit(1 if result["failed_batches"] else 0)
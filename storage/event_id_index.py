@@ -0,0 +1,170 @@
+import json
+import mmap
+import os
+
+INDEX_FILE = "storage/drp_event_ids.bin"
+DIGEST_SIZE = 32  # SHA-256 event IDs stored as raw bytes, sorted
+BLOOM_BITS_PER_ID = 10
+BLOOM_HASHES = 7
+MIN_BLOOM_BITS = 1 << 20
+
+# Sorted array of fixed-width digests, memory-mapped and binary-searched,
+# with a Bloom filter in front and small sets of IDs added or removed since the
+# last save. Removed IDs only leave stale filter bits, which cost a lookup.
+# Files: <path> (digests), <path>.bloom (filter bits), <path>.json (metadata).
+class EventIdIndex:
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.pending = set()
+        self.removed = set()  # Stored digests dropped at the next save
+        self.meta = {}
+        self._file = None
+        self._mm = None
+        self._count = 0
+        self._bloom = None
+        self._bloom_bits = 0
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.path + ".json"):
+            with open(self.path + ".json", "r") as f:
+                self.meta = json.load(f)
+
+        self._count = 0
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            self._file = open(self.path, "rb")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._count = len(self._mm) // DIGEST_SIZE
+
+        if os.path.exists(self.path + ".bloom"):
+            with open(self.path + ".bloom", "rb") as f:
+                self._bloom = bytearray(f.read())
+            self._bloom_bits = len(self._bloom) * 8
+        # A count that disagrees with the digest file means a save was interrupted
+        # between files; the filter may then miss stored IDs, so rebuild it
+        if (
+            self._bloom is None
+            or self._bloom_bits < self._count * BLOOM_BITS_PER_ID
+            or self.meta.get("count", self._count) != self._count
+        ):
+            self._rebuild_bloom()
+
+    def exists(self):
+        return os.path.exists(self.path + ".json")
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = self._file = None
+
+    def __len__(self):
+        return self._count + len(self.pending) - len(self.removed)
+
+    def __contains__(self, event_id):
+        return self._contains_digest(bytes.fromhex(event_id))
+
+    def _contains_digest(self, digest):
+        if digest in self.pending:
+            return True
+        if digest in self.removed or not self._bloom_contains(digest):
+            return False
+        return self._stored_position(digest)[1]
+
+    def add(self, event_id):
+        digest = bytes.fromhex(event_id)
+        if digest in self.removed:
+            self.removed.discard(digest)
+        elif not self._contains_digest(digest):
+            self.pending.add(digest)
+            self._bloom_add(digest)
+
+    def update(self, event_ids):
+        for event_id in event_ids:
+            self.add(event_id)
+
+    def discard(self, event_ids):
+        # Forget retired events so they are scored again if they come back
+        for event_id in event_ids:
+            digest = bytes.fromhex(event_id)
+            if digest in self.pending:
+                self.pending.discard(digest)
+            elif self._bloom_contains(digest) and self._stored_position(digest)[1]:
+                self.removed.add(digest)
+
+    # --- Sorted digest file ---
+    def _digest_at(self, i):
+        return self._mm[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]
+
+    def _stored_position(self, digest):
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._digest_at(mid) < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo, lo < self._count and self._digest_at(lo) == digest
+
+    def save(self, **meta):
+        # Merge pending digests into the sorted file by copying the untouched
+        # runs between insertion and removal points, then swap the new files in
+        # atomically. The filter goes first: it already covers the pending
+        # digests, so it never misses an ID that is in the digest file on disk
+        edits = sorted(
+            [(self._stored_position(digest)[0], 0, digest) for digest in self.pending]
+            + [(self._stored_position(digest)[0], 1, digest) for digest in self.removed]
+        )
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            copied = 0
+            for pos, removal, digest in edits:
+                if pos > copied:
+                    out.write(self._mm[copied * DIGEST_SIZE:pos * DIGEST_SIZE])
+                    copied = pos
+                if removal:
+                    copied = pos + 1
+                else:
+                    out.write(digest)
+            if self._count > copied:
+                out.write(self._mm[copied * DIGEST_SIZE:self._count * DIGEST_SIZE])
+
+        with open(self.path + ".bloom.tmp", "wb") as f:
+            f.write(self._bloom)
+        os.replace(self.path + ".bloom.tmp", self.path + ".bloom")
+
+        self.close()
+        os.replace(tmp_path, self.path)
+
+        self.meta.update(meta)
+        self.meta["count"] = len(self)
+        with open(self.path + ".json.tmp", "w") as f:
+            json.dump(self.meta, f)
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+
+        self.pending = set()
+        self.removed = set()
+        self._load()
+
+    # --- Bloom filter ---
+    # Digests are SHA-256 output, so their 4-byte slices already behave as
+    # independent hashes; no extra hashing is needed
+    def _bloom_positions(self, digest):
+        return [int.from_bytes(digest[i * 4:i * 4 + 4], "big") % self._bloom_bits for i in range(BLOOM_HASHES)]
+
+    def _bloom_add(self, digest):
+        for bit in self._bloom_positions(digest):
+            self._bloom[bit >> 3] |= 1 << (bit & 7)
+
+    def _bloom_contains(self, digest):
+        return all(self._bloom[bit >> 3] & (1 << (bit & 7)) for bit in self._bloom_positions(digest))
+
+    def _rebuild_bloom(self):
+        capacity = max(self._count, len(self.pending)) * 2
+        self._bloom_bits = max(capacity * BLOOM_BITS_PER_ID, MIN_BLOOM_BITS)
+        self._bloom_bits += -self._bloom_bits % 8
+        self._bloom = bytearray(self._bloom_bits // 8)
+        for i in range(self._count):
+            self._bloom_add(self._digest_at(i))
+        for digest in self.pending:
+            self._bloom_add(digest)
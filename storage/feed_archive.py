@@ -0,0 +1,295 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import date, datetime
+from itertools import repeat
+
+ARCHIVE_DIR = os.getenv("FEED_ARCHIVE_DIR", "archive")
+MANIFEST_FILE = "_manifest.json"
+STORE_PREFIX = os.getenv("FEED_ARCHIVE_PREFIX", "archive/")
+LOCAL_ARCHIVE_STORE = os.getenv("FEED_ARCHIVE_STORE")  # Directory used instead of S3 when set
+
+# Columns that identify a record across feed dates, per record type
+RECORD_KEYS = {
+    "advisors": ("crd_number",),
+    "firms_sec": ("crd_number",),
+    "firms_state": ("crd_number",),
+    "drp_events": ("crd", "flag_type", "event_seq"),
+}
+
+# Run timestamps that change every day and would make every record look edited
+DIFF_IGNORED_COLUMNS = {"last_updated", "created_at"}
+
+# Layout: <ARCHIVE_DIR>/<record_type>/date=YYYY-MM-DD/<column>.json.gz + _manifest.json
+# One gzip'd JSON array per column, so readers only open the columns they ask for.
+# This is not a real columnar format (no Parquet/Arrow types, row groups or
+# statistics): a column is read whole and values keep JSON types.
+# Every partition is also uploaded to S3 under <STORE_PREFIX> with the same layout;
+# that copy is the durable one. ARCHIVE_DIR keeps only the latest partition per
+# record type plus any whose upload failed; those are retried on the next write.
+
+def feed_date_from_url(url):
+    # SEC compilation reports are named ..._Feed_MM_DD_YYYY.xml.(zip|gz)
+    match = re.search(r"(\d{2})_(\d{2})_(\d{4})", url or "")
+    if not match:
+        return date.today().isoformat()
+    month, day, year = match.groups()
+    return f"{year}-{month}-{day}"
+
+def partition_path(record_type, feed_date, root=ARCHIVE_DIR):
+    return os.path.join(root, record_type, f"date={feed_date}")
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _columns_of(records):
+    # Accepts dicts or namedtuples; column order follows the first record
+    first = records[0]
+    if hasattr(first, "_fields"):
+        columns = list(first._fields)
+        return columns, [[_json_value(v) for v in column] for column in zip(*records)]
+
+    columns = list(first)
+    for record in records:
+        for column in record:
+            if column not in columns:
+                columns.append(column)
+    return columns, [[_json_value(r.get(c)) for r in records] for c in columns]
+
+# --- Writing ---
+def archive_records(record_type, feed_date, records, root=ARCHIVE_DIR):
+    # Replaces the whole partition so a rerun for the same feed date is idempotent
+    if not records:
+        return 0
+
+    feed_date = feed_date or date.today().isoformat()
+    columns, values = _columns_of(records)
+    final_path = partition_path(record_type, feed_date, root)
+    tmp_path = final_path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    for column, column_values in zip(columns, values):
+        with gzip.open(os.path.join(tmp_path, f"{column}.json.gz"), "wt", compresslevel=6) as f:
+            json.dump(column_values, f, separators=(",", ":"))
+
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+        json.dump({
+            "record_type": record_type,
+            "feed_date": feed_date,
+            "rows": len(records),
+            "columns": columns,
+            "written_at": datetime.utcnow().isoformat(),
+        }, f, indent=2)
+
+    shutil.rmtree(final_path, ignore_errors=True)
+    os.replace(tmp_path, final_path)
+    print(f"🗄️ Archived {len(records):,} {record_type} rows for {feed_date}")
+    upload_pending_partitions(record_type, root)
+    return len(records)
+
+# --- Durable copy ---
+def archive_store():
+    from storage.object_store import LocalObjectStore, S3ObjectStore
+    if LOCAL_ARCHIVE_STORE:
+        return LocalObjectStore(LOCAL_ARCHIVE_STORE)
+    from storage.clients import get_settings
+    if get_settings()["s3_bucket"]:
+        return S3ObjectStore()
+    return None
+
+def store_key(record_type, feed_date, name):
+    return f"{STORE_PREFIX}{record_type}/date={feed_date}/{name}"
+
+def upload_partition(record_type, feed_date, root=ARCHIVE_DIR, store=None):
+    # Manifest goes last, so a partition in the store is complete once it has one
+    store = store or archive_store()
+    if store is None:
+        print(f"⚠️ No S3 bucket configured — {record_type} {feed_date} archived locally only")
+        return False
+
+    path = partition_path(record_type, feed_date, root)
+    names = sorted(name for name in os.listdir(path) if name != MANIFEST_FILE) + [MANIFEST_FILE]
+    for name in names:
+        content_type = "application/json" if name == MANIFEST_FILE else "application/gzip"
+        if not store.put_file(os.path.join(path, name), store_key(record_type, feed_date, name), content_type):
+            raise Exception(f"Failed to upload {record_type} partition {feed_date} to the archive store")
+    return True
+
+def upload_pending_partitions(record_type, root=ARCHIVE_DIR, store=None):
+    # Uploads every local partition not yet in the store, then drops uploaded
+    # ones except the latest. A failed upload is logged and left for the next
+    # run: the archive is a side copy and must never fail an ingest.
+    store = store or archive_store()
+    if store is None:
+        print(f"⚠️ No S3 bucket configured — {record_type} archived locally only")
+        return []
+
+    uploaded = []
+    for feed_date in list_partitions(record_type, root):
+        manifest = read_manifest(record_type, feed_date, root)
+        if manifest.get("uploaded_at"):
+            continue
+        try:
+            upload_partition(record_type, feed_date, root, store)
+        except Exception as e:
+            print(f"⚠️ {record_type} {feed_date} not uploaded, will retry next run: {e}")
+            continue
+        manifest["uploaded_at"] = datetime.utcnow().isoformat()
+        manifest_path = os.path.join(partition_path(record_type, feed_date, root), MANIFEST_FILE)
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        uploaded.append(feed_date)
+
+    prune_local_partitions(record_type, root)
+    return uploaded
+
+def prune_local_partitions(record_type, root=ARCHIVE_DIR):
+    # Keeps the latest partition (what the next run reads) and any not uploaded
+    feed_dates = list_partitions(record_type, root)
+    for feed_date in feed_dates[:-1]:
+        if read_manifest(record_type, feed_date, root).get("uploaded_at"):
+            shutil.rmtree(partition_path(record_type, feed_date, root))
+
+def restore_partitions(record_type, root=ARCHIVE_DIR, store=None):
+    # Downloads complete partitions the local cache is missing (e.g. after the
+    # Actions cache was evicted). Returns the feed dates restored.
+    store = store or archive_store()
+    if store is None:
+        return []
+
+    files_by_date = {}
+    prefix = f"{STORE_PREFIX}{record_type}/date="
+    for key in store.list_keys(prefix):
+        feed_date, _, name = key[len(prefix):].partition("/")
+        files_by_date.setdefault(feed_date, []).append(name)
+
+    local = set(list_partitions(record_type, root))
+    restored = []
+    for feed_date, names in sorted(files_by_date.items()):
+        if feed_date in local or MANIFEST_FILE not in names:
+            continue
+        final_path = partition_path(record_type, feed_date, root)
+        tmp_path = final_path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name in names:
+            data = store.get_bytes(store_key(record_type, feed_date, name))
+            if data is None:
+                raise Exception(f"Failed to download {record_type} partition {feed_date} from the archive store")
+            with open(os.path.join(tmp_path, name), "wb") as f:
+                f.write(data)
+        # Already in the store, so the next write must not upload it again
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "r") as f:
+            manifest = json.load(f)
+        manifest["uploaded_at"] = manifest.get("written_at")
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(final_path, ignore_errors=True)
+        os.replace(tmp_path, final_path)
+        restored.append(feed_date)
+    return restored
+
+# --- Reading ---
+def list_partitions(record_type, root=ARCHIVE_DIR):
+    base = os.path.join(root, record_type)
+    if not os.path.isdir(base):
+        return []
+    return sorted(
+        name[len("date="):] for name in os.listdir(base)
+        if name.startswith("date=") and os.path.exists(os.path.join(base, name, MANIFEST_FILE))
+    )
+
+def read_manifest(record_type, feed_date, root=ARCHIVE_DIR):
+    with open(os.path.join(partition_path(record_type, feed_date, root), MANIFEST_FILE), "r") as f:
+        return json.load(f)
+
+def read_partition(record_type, feed_date, columns=None, root=ARCHIVE_DIR):
+    # Returns {column: [values]} for the requested columns only
+    manifest = read_manifest(record_type, feed_date, root)
+    path = partition_path(record_type, feed_date, root)
+    wanted = manifest["columns"] if columns is None else list(columns)
+
+    data = {}
+    for column in wanted:
+        if column not in manifest["columns"]:
+            data[column] = [None] * manifest["rows"]
+            continue
+        with gzip.open(os.path.join(path, f"{column}.json.gz"), "rt") as f:
+            data[column] = json.load(f)
+    return data
+
+def scan(record_type, start=None, end=None, columns=None, root=ARCHIVE_DIR):
+    # Yields (feed_date, {column: [values]}) for every partition in [start, end]
+    for feed_date in list_partitions(record_type, root):
+        if start and feed_date < start:
+            continue
+        if end and feed_date > end:
+            continue
+        yield feed_date, read_partition(record_type, feed_date, columns, root)
+
+def iter_rows(record_type, start=None, end=None, columns=None, root=ARCHIVE_DIR):
+    for feed_date, data in scan(record_type, start, end, columns, root):
+        names = list(data)
+        for values in zip(*(data[name] for name in names)):
+            yield {"feed_date": feed_date, **dict(zip(names, values))}
+
+# --- Diffs ---
+def _keyed_rows(record_type, feed_date, key, columns, root):
+    data = read_partition(record_type, feed_date, [*key, *columns], root)
+    keys = zip(*(data[k] for k in key)) if len(key) > 1 else data[key[0]]
+    rows = zip(*(data[c] for c in columns)) if columns else repeat(())
+    return dict(zip(keys, rows))
+
+def diff_partitions(record_type, old_date, new_date, columns=None, root=ARCHIVE_DIR):
+    # Compares two feed dates by record key. Returns
+    # {"added": [key], "removed": [key], "changed": {key: {column: [old, new]}}}
+    key = RECORD_KEYS[record_type]
+    if columns is None:
+        old_columns = read_manifest(record_type, old_date, root)["columns"]
+        new_columns = read_manifest(record_type, new_date, root)["columns"]
+        columns = [c for c in new_columns if c in old_columns and c not in DIFF_IGNORED_COLUMNS]
+    columns = [c for c in columns if c not in key]
+
+    old = _keyed_rows(record_type, old_date, key, columns, root)
+    new = _keyed_rows(record_type, new_date, key, columns, root)
+
+    changed = {}
+    for k in old.keys() & new.keys():
+        before, after = old[k], new[k]
+        if before != after:
+            changed[k] = {c: [b, a] for c, b, a in zip(columns, before, after) if b != a}
+
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": changed,
+    }
+
+if __name__ == "__main__":
+    # python storage/feed_archive.py partitions <record_type>
+    # python storage/feed_archive.py restore <record_type>
+    # python storage/feed_archive.py diff <record_type> <old_date> <new_date> [col,col]
+    command, record_type = sys.argv[1], sys.argv[2]
+    if command == "partitions":
+        for feed_date in list_partitions(record_type):
+            print(f"{feed_date}  {read_manifest(record_type, feed_date)['rows']:,} rows")
+    elif command == "restore":
+        restored = restore_partitions(record_type)
+        print(f"📥 Restored {len(restored)} {record_type} partitions from the archive store")
+    elif command == "diff":
+        columns = sys.argv[5].split(",") if len(sys.argv) > 5 else None
+        result = diff_partitions(record_type, sys.argv[3], sys.argv[4], columns)
+        print(f"➕ Added: {len(result['added']):,}  ➖ Removed: {len(result['removed']):,}  ✏️ Changed: {len(result['changed']):,}")
+        field_counts = {}
+        for fields in result["changed"].values():
+            for column in fields:
+                field_counts[column] = field_counts.get(column, 0) + 1
+        for column, count in sorted(field_counts.items(), key=lambda item: -item[1]):
+            print(f"  {column:<25}: {count:,}")
@@ -0,0 +1,20 @@
+import json
+import os
+
+CACHE_FILE = "storage/firm_summary_cache.json"
+
+# {firm_crd: firm_advisor_summaries row as last written, without updated_at}
+def load_firm_summaries():
+    if not os.path.exists(CACHE_FILE):
+        return {}
+
+    try:
+        with open(CACHE_FILE, "r") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        print("⚠️ Warning: Corrupted firm_summary_cache.json — ignoring and rebuilding.")
+        return {}
+
+def save_firm_summaries(summaries):
+    with open(CACHE_FILE, "w") as f:
+        json.dump(summaries, f, separators=(",", ":"))
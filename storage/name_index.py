@@ -0,0 +1,296 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import mmap
+import re
+import struct
+import unicodedata
+from array import array
+
+# numpy is imported where the mapped tables are read, so importing this module
+# (and every stage run_nightly imports) never loads it
+
+INDEX_FILE = "storage/name_index.bin"
+ADVISOR, FIRM = 0, 1
+KIND_NAMES = {ADVISOR: "advisor", FIRM: "firm"}
+REMOVED = 255  # kind of a doc slot whose name left the feed; its postings are gone
+
+# Trailing tokens that never distinguish one advisor or firm from another
+NAME_SUFFIXES = {
+    "jr", "sr", "ii", "iii", "iv", "cpa", "cfp", "chfc", "clu", "phd", "md", "esq",
+    "llc", "inc", "incorporated", "corp", "corporation", "co", "company", "lp", "llp", "ltd", "limited",
+    "plc", "na", "pc", "pllc",
+}
+
+# File layout, little-endian, one mmap:
+#   header | docs (DOC, one per doc id) | names (UTF-8 display names) |
+#   grams (GRAM, sorted by trigram) | postings (uint32 doc ids, ascending per gram)
+# Doc ids are stable across incremental builds: changed names keep their slot,
+# new names are appended and removed ones become REMOVED slots. <path>.json holds metadata.
+MAGIC = b"TGNAMEIX"
+HEADER = struct.Struct("<8sIIIQQQQ")   # magic, version, docs, grams, 4 section offsets
+DOC = struct.Struct("<IIHHB3x")        # crd, name offset, name length, trigram count, kind
+GRAM = struct.Struct("<3sxII")         # trigram, first posting, posting count
+DOC_FIELDS = [("crd", "<u4"), ("offset", "<u4"), ("length", "<u2"), ("grams", "<u2"), ("kind", "u1"), ("pad", "V3")]  # numpy view of DOC
+VERSION = 1
+
+# --- Normalization ---
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+def normalize_name(name):
+    # "O'Brien, John Jr." → "obrien john"; "The Smith Group, LLC" → "smith group"
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii").lower()
+    text = text.replace("&", " and ").replace("'", "")
+    tokens = _NON_ALNUM.sub(" ", text).split()
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    if len(tokens) > 1 and tokens[0] == "the":
+        tokens.pop(0)
+    return " ".join(tokens)
+
+def name_trigrams(normalized, prefix=False):
+    # pg_trgm style: each word padded with two leading spaces and one trailing
+    # space, so word starts are trigrams too. prefix=True leaves the last word
+    # open, so "smi" matches "smith".
+    grams = set()
+    words = normalized.split()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if prefix and i == len(words) - 1 else f"  {word} "
+        for j in range(len(padded) - 2):
+            grams.add(padded[j:j + 3].encode("ascii"))
+    return grams
+
+# --- Reader ---
+class NameIndex:
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.meta = {}
+        self._file = None
+        self._mm = None
+        self._docs = 0
+        self._grams = 0
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.path + ".json"):
+            with open(self.path + ".json", "r") as f:
+                self.meta = json.load(f)
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return
+
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._docs, self._grams, self._docs_at, self._names_at, self._grams_at, self._postings_at = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} name index")
+        import numpy as np
+        self._postings = memoryview(self._mm)[self._postings_at:].cast("I")
+        self._doc_table = np.frombuffer(self._mm, np.dtype(DOC_FIELDS), count=self._docs, offset=self._docs_at)
+
+    def exists(self):
+        return self._mm is not None
+
+    def close(self):
+        if self._mm is not None:
+            self._doc_table = None
+            self._postings.release()
+            self._mm.close()
+            self._file.close()
+            self._mm = self._file = None
+            self._docs = self._grams = 0
+
+    def __len__(self):
+        return self._docs
+
+    def doc(self, doc_id):
+        # (kind, crd, display name, trigram count)
+        crd, offset, length, gram_count, kind = DOC.unpack_from(self._mm, self._docs_at + doc_id * DOC.size)
+        start = self._names_at + offset
+        return kind, crd, self._mm[start:start + length].decode("utf-8"), gram_count
+
+    def docs(self):
+        for doc_id in range(self._docs):
+            yield doc_id, self.doc(doc_id)
+
+    def _gram_at(self, i):
+        return GRAM.unpack_from(self._mm, self._grams_at + i * GRAM.size)
+
+    def grams(self):
+        for i in range(self._grams):
+            yield self._gram_at(i)
+
+    def postings(self, gram):
+        # Binary search of the sorted trigram table; empty when the gram is unknown
+        lo, hi = 0, self._grams
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._gram_at(mid)[0] < gram:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._grams:
+            found, start, count = self._gram_at(lo)
+            if found == gram:
+                return self._postings[start:start + count]
+        return self._postings[0:0]
+
+    def search(self, query, k=10, kind=None, prefix=True):
+        # Top-k [(crd, kind, name, score)]; score is the share of the query's
+        # trigrams the name contains, ties broken by overall trigram similarity
+        if not self.exists():
+            return []
+        query_grams = name_trigrams(normalize_name(query), prefix)
+        if not query_grams:
+            return []
+
+        # Shared-trigram count per doc id, straight off the mapped postings
+        import numpy as np
+        lists = [np.frombuffer(self.postings(gram), dtype="<u4") for gram in query_grams]
+        shared = np.bincount(np.concatenate(lists), minlength=self._docs) if lists else np.zeros(self._docs, int)
+        wanted = {"advisor": ADVISOR, "firm": FIRM}.get(kind, kind)
+        if wanted is not None:
+            shared[self._doc_table["kind"] != wanted] = 0
+
+        candidates = np.flatnonzero(shared)
+        if not len(candidates):
+            return []
+        counts = shared[candidates]
+        if len(candidates) > k:
+            # Only docs sharing at least as many trigrams as the k-th best can place
+            cutoff = np.partition(counts, len(counts) - k)[len(counts) - k]
+            candidates, counts = candidates[counts >= cutoff], counts[counts >= cutoff]
+
+        coverage = counts / len(query_grams)
+        similarity = counts / (len(query_grams) + self._doc_table["grams"][candidates] - counts)
+        order = np.lexsort((self._doc_table["crd"][candidates], -similarity, -coverage))[:k]
+
+        results = []
+        for i in order:
+            doc_kind, crd, name, _ = self.doc(int(candidates[i]))
+            results.append((crd, KIND_NAMES[doc_kind], name, round(float(coverage[i]), 3)))
+        return results
+
+# --- Builder ---
+def build_name_index(entries, path=INDEX_FILE, full=False, **meta):
+    # entries: (kind, crd, display name) for every advisor and firm. Only names
+    # that changed since the last build are re-tokenized; postings of trigrams
+    # they do not touch are copied over byte for byte. Returns the changed count.
+    current = NameIndex(path)
+    if full:
+        current.close()  # a closed index reads as empty: every name is new
+
+    slots = {}
+    doc_rows = []
+    for doc_id, (kind, crd, name, gram_count) in current.docs():
+        doc_rows.append([kind, crd, name, gram_count])
+        if kind != REMOVED:
+            slots[(kind, crd)] = doc_id
+
+    removed_from = {}   # gram → doc ids to drop from its postings
+    added_to = {}       # gram → doc ids to add
+    seen = set()
+    changed = 0
+
+    def retire(doc_id):
+        for gram in name_trigrams(normalize_name(doc_rows[doc_id][2])):
+            removed_from.setdefault(gram, set()).add(doc_id)
+
+    for kind, crd, name in entries:
+        name = name or ""
+        key = (kind, crd)
+        if key in seen:
+            continue
+        seen.add(key)
+        doc_id = slots.get(key)
+        if doc_id is not None and doc_rows[doc_id][2] == name:
+            continue
+        if doc_id is None:
+            doc_id = len(doc_rows)
+            doc_rows.append([kind, crd, name, 0])
+        else:
+            retire(doc_id)
+        grams = name_trigrams(normalize_name(name))
+        for gram in grams:
+            added_to.setdefault(gram, []).append(doc_id)
+        doc_rows[doc_id][2] = name
+        doc_rows[doc_id][3] = len(grams)
+        changed += 1
+
+    for key, doc_id in slots.items():
+        if key not in seen:
+            retire(doc_id)
+            doc_rows[doc_id] = [REMOVED, key[1], "", 0]
+            changed += 1
+
+    if not changed and current.exists():
+        current.close()
+        return 0
+
+    _write_index(path, current, doc_rows, removed_from, added_to)
+    current.close()
+
+    index_meta = dict(current.meta) if not full else {}
+    index_meta.update(meta)
+    index_meta["docs"] = len(doc_rows)
+    index_meta["removed_slots"] = sum(1 for row in doc_rows if row[0] == REMOVED)
+    with open(path + ".json", "w") as f:
+        json.dump(index_meta, f)
+    return changed
+
+def _write_index(path, current, doc_rows, removed_from, added_to):
+    names = bytearray()
+    docs = bytearray(DOC.size * len(doc_rows))
+    for doc_id, (kind, crd, name, gram_count) in enumerate(doc_rows):
+        encoded = name.encode("utf-8")
+        DOC.pack_into(docs, doc_id * DOC.size, crd, len(names), len(encoded), gram_count, kind)
+        names += encoded
+
+    old_grams = {gram: (start, count) for gram, start, count in current.grams()}
+    gram_table = bytearray()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        grams_at = HEADER.size + len(docs) + len(names)
+        all_grams = sorted(set(old_grams) | set(added_to))
+        postings_at = grams_at + GRAM.size * len(all_grams)
+        postings_at += -postings_at % 4  # uint32 alignment for the memoryview cast
+        out.write(HEADER.pack(MAGIC, VERSION, len(doc_rows), 0, HEADER.size, HEADER.size + len(docs), grams_at, postings_at))
+        out.write(docs)
+        out.write(names)
+        out.seek(postings_at)
+
+        written = 0
+        kept = 0
+        for gram in all_grams:
+            start, count = old_grams.get(gram, (0, 0))
+            if gram in removed_from or gram in added_to:
+                drop = removed_from.get(gram, ())
+                ids = [d for d in current._postings[start:start + count] if d not in drop] if count else []
+                ids = array("I", sorted(ids + added_to.get(gram, [])))
+                out.write(ids.tobytes())
+                count = len(ids)
+            else:
+                out.write(current._postings[start:start + count])
+            if count:
+                gram_table += GRAM.pack(gram, written, count)
+                written += count
+                kept += 1
+
+        out.seek(grams_at)
+        out.write(gram_table)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, len(doc_rows), kept, HEADER.size, HEADER.size + len(docs), grams_at, postings_at))
+
+    current.close()
+    os.replace(tmp_path, path)
+
+if __name__ == "__main__":
+    # python storage/name_index.py "john smith" [--k 10] [--kind advisor|firm]
+    argv = sys.argv[1:]
+    k = int(argv[argv.index("--k") + 1]) if "--k" in argv else 10
+    kind = argv[argv.index("--kind") + 1] if "--kind" in argv else None
+    index = NameIndex()
+    for crd, doc_kind, name, score in index.search(argv[0], k=k, kind=kind):
+        print(f"{crd:>10}  {doc_kind:<8} {score:.3f}  {name}")
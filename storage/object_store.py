@@ -0,0 +1,50 @@
+# storage/object_store.py
+
+import os
+import shutil
+
+
+class S3ObjectStore:
+    # The S3 bucket: ADV PDFs from ingest/populate_advisor_advs.py, feed archive partitions
+    def __init__(self):
+        from storage import s3_upload
+        self._s3 = s3_upload
+
+    def list_keys(self, prefix):
+        return self._s3.list_object_keys(prefix)
+
+    def get_bytes(self, key):
+        return self._s3.download_object_bytes(key)
+
+    def put_file(self, local_path, key, content_type="application/octet-stream"):
+        return self._s3.upload_file_to_s3(local_path, key, content_type) is not None
+
+
+class LocalObjectStore:
+    # Directory stand-in for S3: object keys are paths relative to root
+    def __init__(self, root):
+        self.root = root
+
+    def list_keys(self, prefix):
+        # S3 semantics: a plain string prefix, not necessarily a whole directory
+        keys = []
+        base = os.path.join(self.root, os.path.dirname(prefix))
+        for dirpath, _, filenames in os.walk(base):
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def get_bytes(self, key):
+        path = os.path.join(self.root, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def put_file(self, local_path, key, content_type=None):
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(local_path, path)
+        return True
@@ -0,0 +1,27 @@
+import json
+import os
+
+CACHE_FILE = "storage/pipeline_state.json"
+
+# {"stages": {name: {"status", "key", "started_at", "finished_at", "seconds", "error"}},
+#  "feeds": {name: {"head": [url, etag, last_modified, length], "sha256": digest}}}
+def load_pipeline_state():
+    if not os.path.exists(CACHE_FILE):
+        return {"stages": {}, "feeds": {}}
+
+    try:
+        with open(CACHE_FILE, "r") as f:
+            state = json.load(f)
+    except json.JSONDecodeError:
+        print("⚠️ Warning: Corrupted pipeline_state.json — ignoring and rebuilding.")
+        return {"stages": {}, "feeds": {}}
+
+    state.setdefault("stages", {})
+    state.setdefault("feeds", {})
+    return state
+
+def save_pipeline_state(state):
+    tmp_path = CACHE_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, CACHE_FILE)
@@ -0,0 +1,52 @@
+import json
+import os
+
+JOURNAL_DIR = "storage/rollup_journal"
+
+# Advisors whose drp_event_scores rows are being written but whose
+# advisor_drp_scores rollups may not be updated yet. One file per writer (the
+# inline ingest scorer, each scoring shard, the rescorer), so concurrent
+# processes never share a file. Entries left behind by a failed run are
+# reconciled by rebuilding those advisors from their score rows.
+def journal_path(writer):
+    return os.path.join(JOURNAL_DIR, f"{writer}.json")
+
+def open_rollup_batch(writer, crds):
+    # Call before the score rows are written
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    path = journal_path(writer)
+    crds = set(crds)
+    if os.path.exists(path):
+        crds.update(load_journal_file(path))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(sorted(crds), f)
+    os.replace(tmp_path, path)
+
+def close_rollup_batch(writer):
+    # Call once the rollups for every CRD in the batch are written
+    path = journal_path(writer)
+    if os.path.exists(path):
+        os.remove(path)
+
+def load_journal_file(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        print(f"⚠️ Warning: Corrupted {path} — ignoring it.")
+        return []
+
+def pending_rollup_crds():
+    if not os.path.isdir(JOURNAL_DIR):
+        return set()
+    crds = set()
+    for name in os.listdir(JOURNAL_DIR):
+        if name.endswith(".json"):
+            crds.update(load_journal_file(os.path.join(JOURNAL_DIR, name)))
+    return crds
+
+def clear_rollup_journal():
+    if os.path.isdir(JOURNAL_DIR):
+        for name in os.listdir(JOURNAL_DIR):
+            os.remove(os.path.join(JOURNAL_DIR, name))
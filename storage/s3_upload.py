@@ -1,41 +1,47 @@
 # storage/s3_upload.py
 
-import os
-import boto3
 import logging
-from dotenv import load_dotenv
-from botocore.exceptions import BotoCoreError, ClientError
+from storage.clients import get_settings, s3
 
-# Load environment
-load_dotenv()
-
-AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-AWS_REGION = os.getenv("AWS_REGION", "us-east-2")
-S3_BUCKET = os.getenv("S3_BUCKET_NAME")
-
-if not S3_BUCKET:
-    raise ValueError("Missing S3_BUCKET_NAME in environment")
-
-# Create S3 client
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION,
-)
+# botocore is imported inside each helper, like boto3 in storage.clients, so
+# importing this module never requires the AWS SDK
 
 def upload_pdf_to_s3(local_path, s3_key):
+    return upload_file_to_s3(local_path, s3_key, "application/pdf")
+
+def upload_file_to_s3(local_path, s3_key, content_type="application/octet-stream"):
+    from botocore.exceptions import BotoCoreError, ClientError
+    bucket = get_settings()["s3_bucket"]
     try:
         s3.upload_file(
             Filename=local_path,
-            Bucket=S3_BUCKET,
+            Bucket=bucket,
             Key=s3_key,
-            ExtraArgs={"ContentType": "application/pdf"},
+            ExtraArgs={"ContentType": content_type},
         )
-        s3_url = f"https://{S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
+        s3_url = f"https://{bucket}.s3.{get_settings()['aws_region']}.amazonaws.com/{s3_key}"
         logging.info(f"✅ Uploaded to S3: {s3_url}")
         return s3_url
     except (BotoCoreError, ClientError) as e:
         logging.error(f"❌ S3 upload failed for {s3_key}: {e}")
         return None
+
+def list_object_keys(prefix):
+    from botocore.exceptions import BotoCoreError, ClientError
+    keys = []
+    try:
+        paginator = s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=get_settings()["s3_bucket"], Prefix=prefix):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []))
+    except (BotoCoreError, ClientError) as e:
+        logging.error(f"❌ S3 listing failed for {prefix}: {e}")
+    return keys
+
+def download_object_bytes(s3_key):
+    from botocore.exceptions import BotoCoreError, ClientError
+    try:
+        response = s3.get_object(Bucket=get_settings()["s3_bucket"], Key=s3_key)
+        return response["Body"].read()
+    except (BotoCoreError, ClientError) as e:
+        logging.error(f"❌ S3 download failed for {s3_key}: {e}")
+        return None
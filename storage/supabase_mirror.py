@@ -0,0 +1,192 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+from storage.advisor_records import ADVISOR_COLUMNS
+from storage.table_scan import scan_pages
+
+MIRROR_DB = os.getenv("SUPABASE_MIRROR_DB", "storage/supabase_mirror.sqlite")
+# Writers stamp rows with their own clock; re-pull the last hour so a write that
+# started before the previous refresh finished is never skipped
+WATERMARK_SAFETY_MARGIN = timedelta(hours=1)
+
+# Read-only local copies of the tables jobs page through. Rows are pulled by
+# primary key once, then only those whose watermark column moved since the last
+# refresh. Tables without a watermark column are re-pulled in full on every refresh.
+# changed_at is bumped by a trigger only when a row's content changes
+# (sql/008_changed_at_watermarks.sql); last_updated and created_at are
+# re-stamped by every nightly upsert, so they would pull the whole table.
+MIRROR_TABLES = {
+    "advisors": {
+        "key": "crd_number",
+        "watermark": "changed_at",
+        "columns": (*ADVISOR_COLUMNS, "changed_at"),
+        "indexes": ("firm_crd_number", "changed_at"),
+    },
+    "advisor_advs": {
+        "key": "crd",
+        "watermark": "last_fetched_at",
+        "columns": ("crd", "adv_url", "last_fetched_at"),
+    },
+    "advisor_drp_events": {
+        # The JSON `details` blobs are never read locally
+        "key": "id",
+        "watermark": "changed_at",
+        "columns": (
+            "id", "crd", "flag_type", "event_seq", "label", "event_date", "disposition",
+            "description", "regulator", "resolution", "created_at", "changed_at",
+        ),
+        "indexes": ("crd",),
+    },
+    "drp_event_scores": {
+        # Score rows can be deleted (retire_event_scores); refresh with prune to drop them
+        "key": "event_id",
+        "watermark": "scored_at",
+        "columns": (
+            "event_id", "crd", "event_type", "description", "event_date", "regulator", "resolution",
+            "base_score", "adjusted_score", "reasoning", "scored_at", "scoring_version",
+        ),
+        "indexes": ("crd",),
+    },
+    "advisor_drp_scores": {
+        "key": "crd",
+        "watermark": "last_scored_at",
+        "columns": ("crd", "drp_score", "event_count", "volume_adjusted_score", "last_scored_at", "scoring_version"),
+    },
+    "firm_data": {
+        # The ADV text columns are never read locally
+        "key": "crd_number",
+        "watermark": "changed_at",
+        "columns": (
+            "crd_number", "firm_name", "registration_type", "filing_date", "total_regulatory_aum",
+            "total_employees", "client_count", "office_city", "office_state", "changed_at",
+        ),
+    },
+}
+
+# --- Connection ---
+def open_mirror(path=MIRROR_DB):
+    # Refreshes stage pages in TEMP tables and hold the write lock only while
+    # applying them (seconds even on a cold start); the timeout covers that
+    conn = sqlite3.connect(path, timeout=900)
+    conn.row_factory = sqlite3.Row
+    # WAL lets concurrent pipeline stages read while one refreshes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS _mirror_state "
+        "(table_name TEXT PRIMARY KEY, watermark TEXT, refreshed_at TEXT, row_count INTEGER)"
+    )
+    for table, spec in MIRROR_TABLES.items():
+        columns = ", ".join(f'"{c}"' for c in spec["columns"])
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns}, PRIMARY KEY ("{spec["key"]}"))')
+        # A mirror built before a column was added lacks it in every row, so
+        # add the column and forget the watermark: the next refresh is full
+        existing = {row["name"] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+        missing = [c for c in spec["columns"] if c not in existing]
+        for column in missing:
+            conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}"')
+        if missing:
+            conn.execute("DELETE FROM _mirror_state WHERE table_name = ?", (table,))
+        for column in spec.get("indexes", ()):
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_{column}" ON "{table}" ("{column}")')
+    conn.commit()
+    return conn
+
+def mirror_state(conn, table):
+    row = conn.execute("SELECT * FROM _mirror_state WHERE table_name = ?", (table,)).fetchone()
+    return dict(row) if row else None
+
+def _local_value(value):
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+# --- Refresh ---
+def refresh_table(conn, table, full=False, prune=False, client=None):
+    # Pulls rows changed since the saved watermark (everything on a cold start or
+    # with full=True). prune=True also drops local rows whose key is gone remotely.
+    spec = MIRROR_TABLES[table]
+    columns = spec["columns"]
+    state = mirror_state(conn, table)
+    full = full or not spec.get("watermark")
+    watermark = None if full or not state else state["watermark"]
+    started = datetime.utcnow() - WATERMARK_SAFETY_MARGIN
+    next_watermark = started.isoformat()
+
+    filters = [("gte", spec["watermark"], watermark)] if watermark else []
+    if watermark:
+        logging.info(f"🪞 Refreshing mirror of {table} since {watermark}...")
+    else:
+        logging.info(f"🪞 Filling mirror of {table} from scratch...")
+
+    # Pages land in a per-connection TEMP table (its own database file, so no
+    # lock on the mirror) while the network scan runs; other stages keep
+    # reading and refreshing the mirror meanwhile
+    staging = f"_staging_{table}"
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS "{staging}" AS SELECT * FROM "{table}" WHERE 0')
+    conn.execute(f'DELETE FROM "{staging}"')
+    insert = f'INSERT INTO "{staging}" ({quoted}) VALUES ({", ".join("?" for _ in columns)})'
+    pulled = 0
+    for page in scan_pages(table, ",".join(columns), spec["key"], filters=filters, ordered=False, client=client):
+        conn.executemany(insert, [tuple(_local_value(row.get(c)) for c in columns) for row in page])
+        conn.commit()
+        pulled += len(page)
+
+    if prune and not full:
+        scan_remote_keys(conn, table, client)
+
+    # One short write transaction applies everything
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    if full:
+        conn.execute(f'DELETE FROM "{table}"')
+    conn.execute(f'INSERT OR REPLACE INTO "{table}" ({quoted}) SELECT {quoted} FROM "{staging}"')
+    pruned = 0
+    if prune and not full:
+        key = spec["key"]
+        pruned = conn.execute(f'DELETE FROM "{table}" WHERE "{key}" NOT IN (SELECT k FROM _remote_keys)').rowcount
+    row_count = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+    conn.execute(
+        "INSERT OR REPLACE INTO _mirror_state (table_name, watermark, refreshed_at, row_count) VALUES (?, ?, ?, ?)",
+        (table, next_watermark, datetime.utcnow().isoformat(), row_count),
+    )
+    conn.commit()
+    conn.execute(f'DROP TABLE "{staging}"')
+    conn.execute("DROP TABLE IF EXISTS _remote_keys")
+    conn.commit()
+    logging.info(f"✅ Mirror of {table}: pulled {pulled:,}, pruned {pruned:,}, {row_count:,} rows")
+    return pulled
+
+def scan_remote_keys(conn, table, client=None):
+    # Key-only scan of the remote table into TEMP _remote_keys; refresh_table
+    # deletes the local keys it does not contain
+    key = MIRROR_TABLES[table]["key"]
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _remote_keys (k PRIMARY KEY)")
+    conn.execute("DELETE FROM _remote_keys")
+    for page in scan_pages(table, key, key, ordered=False, client=client):
+        conn.executemany("INSERT OR IGNORE INTO _remote_keys (k) VALUES (?)", [(row[key],) for row in page])
+        conn.commit()
+
+def refresh_mirror(tables=None, full=False, prune=False, path=MIRROR_DB, client=None):
+    # Returns an open connection with every requested table current
+    conn = open_mirror(path)
+    for table in tables or MIRROR_TABLES:
+        refresh_table(conn, table, full=full, prune=prune, client=client)
+    return conn
+
+if __name__ == "__main__":
+    # python storage/supabase_mirror.py [table,table] [--full] [--prune] [--status]
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    selected = args[0].split(",") if args else list(MIRROR_TABLES)
+    if "--status" in sys.argv:
+        conn = open_mirror()
+        for name in selected:
+            state = mirror_state(conn, name) or {}
+            print(f"{name:<20} {state.get('row_count', 0):>10,} rows  watermark {state.get('watermark')}  refreshed {state.get('refreshed_at')}")
+    else:
+        refresh_mirror(selected, full="--full" in sys.argv, prune="--prune" in sys.argv)
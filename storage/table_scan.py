@@ -0,0 +1,142 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from storage.clients import supabase
+
+# --- Constants ---
+SCAN_PAGE_SIZE = 1000   # Supabase caps a single select at 1000 rows by default
+SCAN_WORKERS = 4
+PREFETCH_PAGES = 4      # pages buffered per range before its worker waits
+
+# Full-table reads over PostgREST. The key space is split into ranges of roughly
+# equal row counts (probed with a count and a few single-row offset lookups),
+# the ranges are read concurrently with keyset pagination on a unique key, and
+# pages are streamed back in key order or as they arrive.
+#
+# filters are supabase query-builder calls applied to every request, e.g.
+#   [("eq", "scoring_version", "v1.0"), ("gte", "scored_at", watermark), ("or_", "crd.like.*01")]
+
+def apply_filters(query, filters):
+    for method, *args in filters:
+        query = getattr(query, method)(*args)
+    return query
+
+def _select_columns(columns, key):
+    names = [c.strip() for c in columns.split(",")]
+    return columns if key in names or "*" in names else f"{columns},{key}"
+
+def split_key_ranges(table, key, filters=(), parts=SCAN_WORKERS, after=None, client=None, min_rows=SCAN_PAGE_SIZE):
+    # Returns [(lower, lower_inclusive, upper)] covering every key > after; None
+    # bounds are open and upper is always exclusive
+    client = client or supabase
+    base_filters = list(filters) + ([("gt", key, after)] if after is not None else [])
+    if parts <= 1:
+        return [(after, False, None)]
+
+    query = apply_filters(client.table(table).select(key, count="exact"), base_filters)
+    total = query.order(key).limit(1).execute().count or 0
+    if total < min_rows * 2:
+        return [(after, False, None)]
+
+    def key_at(offset):
+        query = apply_filters(client.table(table).select(key), base_filters)
+        rows = query.order(key).range(offset, offset).execute().data or []
+        return rows[0][key] if rows else None
+
+    parts = min(parts, total // min_rows)
+    with ThreadPoolExecutor(max_workers=parts) as pool:
+        probes = list(pool.map(key_at, [total * i // parts for i in range(1, parts)]))
+
+    bounds = []
+    for bound in probes:
+        if bound is not None and (not bounds or bound != bounds[-1]):
+            bounds.append(bound)
+
+    # Each boundary key opens the next range: (after, b1), [b1, b2), ..., [bn, end)
+    lowers = [(after, False)] + [(bound, True) for bound in bounds]
+    uppers = bounds + [None]
+    return [(lower, inclusive, upper) for (lower, inclusive), upper in zip(lowers, uppers)]
+
+def _scan_range(table, select, key, filters, lower, lower_inclusive, upper, page_size, emit, client):
+    # Keyset pagination within one range. Stops on an empty page, never on a
+    # short one: the server may cap pages below page_size.
+    last = lower
+    first = True
+    while True:
+        query = apply_filters(client.table(table).select(select), filters)
+        if last is not None:
+            query = query.gte(key, last) if first and lower_inclusive else query.gt(key, last)
+        if upper is not None:
+            query = query.lt(key, upper)
+        rows = query.order(key).limit(page_size).execute().data or []
+        if not rows:
+            return
+        if not emit(rows):
+            return
+        last = rows[-1][key]
+        first = False
+
+def scan_pages(table, columns, key, filters=(), page_size=SCAN_PAGE_SIZE, workers=SCAN_WORKERS,
+               ordered=True, after=None, client=None):
+    # Yields lists of rows. ordered=True yields pages in ascending key order, so
+    # callers may checkpoint on page[-1][key]; ordered=False yields pages as
+    # soon as any range produces one. key must be unique.
+    client = client or supabase
+    select = _select_columns(columns, key)
+    ranges = split_key_ranges(table, key, filters, workers, after, client)
+    if len(ranges) > 1:
+        logging.info(f"🔀 Scanning {table} in {len(ranges)} key ranges")
+
+    stop = threading.Event()
+    done = object()
+    if ordered:
+        queues = [queue.Queue(maxsize=PREFETCH_PAGES) for _ in ranges]
+    else:
+        queues = [queue.Queue(maxsize=PREFETCH_PAGES * len(ranges))] * len(ranges)
+
+    def put(q, item):
+        # Returns False once the consumer has gone away
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(index, lower, lower_inclusive, upper):
+        q = queues[index]
+        try:
+            _scan_range(
+                table, select, key, filters, lower, lower_inclusive, upper, page_size, lambda rows: put(q, rows), client
+            )
+        except Exception as e:
+            put(q, e)
+        put(q, done)
+
+    pool = ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix=f"scan-{table}")
+    try:
+        for index, (lower, lower_inclusive, upper) in enumerate(ranges):
+            pool.submit(worker, index, lower, lower_inclusive, upper)
+
+        pending = len(ranges)
+        position = 0
+        while pending:
+            item = queues[position if ordered else 0].get()
+            if item is done:
+                pending -= 1
+                position += 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+
+def scan_table(table, columns, key, filters=(), page_size=SCAN_PAGE_SIZE, workers=SCAN_WORKERS,
+               ordered=True, after=None, client=None):
+    # Same as scan_pages, one row at a time
+    for page in scan_pages(table, columns, key, filters, page_size, workers, ordered, after, client):
+        yield from page
@@ -1,89 +1,83 @@
 import os
-import json
 import requests
-from dotenv import load_dotenv
+from storage.advisor_records import encode_advisor_batch
+from storage.clients import supabase_rest_headers, supabase_rest_url
 
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json"
-}
-
-CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_FILE = "advisor_checkpoint.txt"  # One written CRD per line, appended per batch
 
 def load_checkpoint():
     if os.path.exists(CHECKPOINT_FILE):
         with open(CHECKPOINT_FILE, "r") as f:
-            return set(json.load(f))
+            return {int(line) for line in f if line.strip()}
     return set()
 
-def save_checkpoint(processed_crds):
-    with open(CHECKPOINT_FILE, "w") as f:
-        json.dump(list(processed_crds), f)
+def save_checkpoint(crds):
+    # Append only the batch just written instead of rewriting every CRD seen so far
+    with open(CHECKPOINT_FILE, "a") as f:
+        f.write("".join(f"{crd}\n" for crd in crds))
 
 def write_advisors_to_supabase(advisors, batch_size=100, upsert_on=None, resume_from_checkpoint=False):
+    # advisors: AdvisorRecord tuples from storage.advisor_records
     print(f"\U0001F680 Uploading {len(advisors)} advisors to Supabase...")
 
     processed_crds = load_checkpoint() if resume_from_checkpoint else set()
     total_written = 0
+    failed_batches = 0
+
+    headers = supabase_rest_headers()
+    url = supabase_rest_url("advisors")
+    if upsert_on:
+        url += f"?on_conflict={upsert_on}"
 
     for i in range(0, len(advisors), batch_size):
         batch = advisors[i:i + batch_size]
 
         if resume_from_checkpoint:
-            batch = [a for a in batch if a["CRD Number"] not in processed_crds]
+            batch = [a for a in batch if a.crd_number not in processed_crds]
             if not batch:
                 continue
 
-        payload = []
-        for a in batch:
-            payload.append({
-                "crd_number": a["CRD Number"],
-                "advisor_name": a["Advisor Name"],
-                "firm_crd_number": a["Firm CRD Number"],
-                "firm_name": a["Firm Name"],
-                "status": a["Status"],
-                "has_disclosures": a["Has Disclosures"],
-                "disclosures_count": a["Disclosures Count"],
-                "last_updated": a["Last Updated"]
-            })
-
         try:
-            url = f"{SUPABASE_URL}/rest/v1/advisors"
-            if upsert_on:
-                url += f"?on_conflict={upsert_on}"
-
-            resp = requests.post(url, headers=HEADERS, json=payload)
+            resp = requests.post(url, headers=headers, data=encode_advisor_batch(batch))
 
             # If batch fails, fall back to writing individually
             if resp.status_code == 409 and upsert_on:
                 print(f"⚠️ Batch conflict on upsert — retrying individually...")
-                for advisor in payload:
+                batch_failed = False
+                for advisor in batch:
                     try:
-                        single_resp = requests.post(url, headers=HEADERS, json=[advisor])
+                        single_resp = requests.post(url, headers=headers, data=encode_advisor_batch([advisor]))
                         if single_resp.status_code in [200, 201]:
                             total_written += 1
                             if resume_from_checkpoint:
-                                processed_crds.add(advisor["crd_number"])
+                                processed_crds.add(advisor.crd_number)
+                                save_checkpoint([advisor.crd_number])
                         else:
-                            print(f"❌ Advisor {advisor['crd_number']} failed: {single_resp.status_code}")
+                            batch_failed = True
+                            print(f"❌ Advisor {advisor.crd_number} failed: {single_resp.status_code}")
                     except Exception as e:
-                        print(f"❌ Error posting individual advisor {advisor['crd_number']}: {e}")
-
-            
+                        batch_failed = True
+                        print(f"❌ Error posting individual advisor {advisor.crd_number}: {e}")
+
+                if batch_failed:
+                    failed_batches += 1
+                    print(f"❌ Failed to write batch {i // batch_size}: {resp.status_code} - {resp.text}")
+            elif resp.status_code not in [200, 201]:
+                failed_batches += 1
                 print(f"❌ Failed to write batch {i // batch_size}: {resp.status_code} - {resp.text}")
             else:
                 print(f"✅ Wrote batch {i // batch_size + 1} ({len(batch)} records)")
                 total_written += len(batch)
                 if resume_from_checkpoint:
-                    processed_crds.update([a["CRD Number"] for a in batch])
-                    save_checkpoint(processed_crds)
+                    written = [a.crd_number for a in batch]
+                    processed_crds.update(written)
+                    save_checkpoint(written)
         except Exception as e:
+            failed_batches += 1
             print(f"❌ Error posting batch {i // batch_size}: {e}")
 
     print(f"\n✅ Total written to Supabase: {total_written}")
+    # Raise so the pipeline records the stage as failed and reruns it
+    if failed_batches:
+        raise Exception(f"{failed_batches} advisor batches failed to write")
+    return total_written
@@ -1,23 +1,13 @@
-import os
 import requests
 from time import sleep
-from dotenv import load_dotenv
-
-load_dotenv()
+from storage.clients import supabase_rest_headers, supabase_rest_url
 
 def write_drp_events_to_supabase(records, batch_size=100):
     print("📤 Writing DRP events to Supabase via REST...")
     total = len(records)
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_KEY")
-    table_url = f"{supabase_url}/rest/v1/advisor_drp_events?on_conflict=crd,flag_type"
-
-    headers = {
-        "apikey": supabase_key,
-        "Authorization": f"Bearer {supabase_key}",
-        "Content-Type": "application/json",
-        "Prefer": "resolution=merge-duplicates"
-    }
+    table_url = supabase_rest_url("advisor_drp_events") + "?on_conflict=crd,flag_type,event_seq"
+    headers = supabase_rest_headers(Prefer="resolution=merge-duplicates")
+    failed_batches = 0
 
     for i in range(0, total, batch_size):
         batch = records[i:i + batch_size]
@@ -33,9 +23,24 @@ def write_drp_events_to_supabase(records, batch_size=100):
             if response.status_code in [200, 201, 204]:
                 print(f"✅ Batch {i // batch_size + 1}: Inserted or updated {len(batch)} records")
             else:
+                failed_batches += 1
                 print(f"❌ Batch {i // batch_size + 1}: {response.status_code} → {response.text}")
 
         except Exception as e:
+            failed_batches += 1
             print(f"❌ Batch {i // batch_size + 1} request failed: {e}")
 
         sleep(0.25)  # Throttle requests slightly to avoid rate limits
+
+    # Raise so the pipeline records the stage as failed and reruns it
+    if failed_batches:
+        raise Exception(f"{failed_batches} DRP event batches failed to write")
+
+def delete_drp_events(ids, batch_size=500):
+    headers = supabase_rest_headers()
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i + batch_size]
+        url = supabase_rest_url("advisor_drp_events") + f"?id=in.({','.join(str(x) for x in chunk)})"
+        response = requests.delete(url, headers=headers)
+        if response.status_code not in [200, 204]:
+            raise Exception(f"Failed to delete stale DRP events: {response.status_code} → {response.text}")
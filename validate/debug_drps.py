@@ -1,5 +1,7 @@
-import requests, zipfile, io, xml.etree.ElementTree as ET
+import sys, os, xml.etree.ElementTree as ET
 from collections import defaultdict
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ingest.feed_sampler import sample_feed_xml
 
 # Friendly label map
 friendly_names = {
@@ -27,21 +29,13 @@ event_sections = {
     "Terminations": "TerminationEvent"
 }
 
-print("📥 Downloading advisor XML...")
-url = "https://reports.adviserinfo.sec.gov/reports/CompilationReports/IA_INDVL_Feed_05_13_2025.xml.zip"
-response = requests.get(url)
-if response.status_code != 200:
-    raise Exception("Failed to download feed")
+sample_size = 1000
 
-print("📄 Extracting XML...")
-xml_contents = []
-with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-    for name in z.namelist():
-        if name.endswith(".xml"):
-            xml_contents.append(z.read(name))
+print(f"📥 Sampling first {sample_size} advisors from feed...")
+url = os.getenv("ADVISOR_FEED_URL", "https://reports.adviserinfo.sec.gov/reports/CompilationReports/IA_INDVL_Feed_05_13_2025.xml.zip")
+xml_contents = [sample_feed_xml(url, sample_size)]
 
 print("🔍 Parsing DRP flags + matching event data...")
-sample_size = 1000
 count = 0
 drp_data = defaultdict(list)
 
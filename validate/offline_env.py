@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+from contextlib import contextmanager
+import tempfile
+from bench.postgrest_stub import start_stub
+from bench.writer_throughput import point_clients_at
+
+# Shared setup for the offline tests: a throwaway working directory (the local
+# caches, mirror and journals live under storage/ relative to it) and a fresh
+# PostgREST stub that storage.clients points at
+
+@contextmanager
+def stub_workdir(**faults):
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "storage"))
+        os.chdir(root)
+        server = start_stub(**faults)
+        point_clients_at(server.url)
+        try:
+            yield server
+        finally:
+            server.shutdown()
+            os.chdir(previous)
@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+import csv
+from storage.csv_import import SeenKeys, convert_row, import_csv, parse_column_spec
+from validate.offline_env import stub_workdir
+
+# Offline checks of the streaming CSV importer: cells are coerced one by one
+# (a bad cell becomes null, never the whole row), the first row per conflict
+# key wins, and everything else lands in the table through the PostgREST stub
+
+# --- Fixtures ---
+COLUMNS = [
+    parse_column_spec("CRD Number=crd_number:int"),
+    parse_column_spec("Firm Name=firm_name"),
+    parse_column_spec("AUM=total_regulatory_aum:float"),
+    parse_column_spec("Employees=total_employees:int"),
+    parse_column_spec("Dual=dual_registrant:bool"),
+    parse_column_spec("Filed=filing_date:date"),
+]
+HEADERS = [header for header, _, _ in COLUMNS]
+
+def write_csv(path, rows):
+    # Excel-style export: byte-order mark first
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+
+# --- Tests ---
+def test_cells_are_coerced_one_by_one():
+    raw = {"CRD Number": "1,234", "Firm Name": " Acme ", "AUM": "$1,500,000.50", "Employees": "12.7",
+           "Dual": "Checked", "Filed": "03/15/2021"}
+    assert convert_row(raw, COLUMNS) == {
+        "crd_number": 1234, "firm_name": "Acme", "total_regulatory_aum": 1500000.5,
+        "total_employees": None,  # Not a whole number: null, not 12
+        "dual_registrant": True, "filing_date": "2021-03-15",
+    }
+
+    cases = [
+        ("Employees", "12.0", "total_employees", 12),
+        ("Employees", "1.5e3", "total_employees", 1500),
+        ("Employees", "nan", "total_employees", None),
+        ("Employees", "1e400", "total_employees", None),
+        ("Employees", "12345678901234567890", "total_employees", 12345678901234567890),
+        ("AUM", "lots", "total_regulatory_aum", None),
+        ("Dual", "maybe", "dual_registrant", None),
+        ("Dual", "N", "dual_registrant", False),
+        ("Filed", "2021-13-01", "filing_date", None),
+        ("Filed", "3/5/21", "filing_date", "2021-03-05"),
+        ("Firm Name", "   ", "firm_name", None),
+    ]
+    for header, value, column, expected in cases:
+        row = convert_row({**raw, header: value}, COLUMNS)
+        assert row[column] == expected, (header, value, row[column])
+        assert row["crd_number"] == 1234  # A bad cell never spoils its neighbours
+
+def test_seen_keys_dedupe_ints_and_other_keys():
+    seen = SeenKeys()
+    assert seen.add(5) and not seen.add(5)
+    assert seen.add(1 << 27) and not seen.add(1 << 27)
+    assert seen.add(1 << 40) and not seen.add(1 << 40)  # Past the bitmap
+    assert seen.add(-1) and not seen.add(-1)
+    assert seen.add("5") and not seen.add("5")  # Text keys are distinct from ints
+    assert seen.add(("a", 1)) and not seen.add(("a", 1))
+
+def test_import_dedupes_on_key_across_chunks():
+    with stub_workdir() as server:
+        rows = []
+        for crd in range(1, 6001):  # Crosses the 5000-row read chunk
+            rows.append([str(crd), f"Firm {crd}", "100", "3", "no", "2020-01-01"])
+        rows.append(["17", "Second Firm 17", "200", "4", "yes", "2020-01-02"])   # Duplicate: first wins
+        rows.append(["5999.0", "Second Firm 5999", "", "", "", ""])              # Same key, float-formatted
+        rows.append(["", "No key", "1", "1", "yes", "2020-01-01"])
+        rows.append(["12.5", "Fractional key", "1", "1", "yes", "2020-01-01"])  # Key coerces to None
+        write_csv("firms.csv", rows)
+
+        stats = import_csv("firms.csv", "csv_firms", COLUMNS, "crd_number", batch_size=700)
+        assert stats == {"read": 6004, "imported": 6000, "duplicates": 2, "missing_key": 2, "failed_batches": 0}
+
+        stored = {row["crd_number"]: row for row in server.state.tables["csv_firms"].rows.values()}
+        assert sorted(stored) == list(range(1, 6001))
+        assert stored[17]["firm_name"] == "Firm 17"
+        assert stored[5999]["firm_name"] == "Firm 5999"
+        assert stored[1]["dual_registrant"] is False and stored[1]["filing_date"] == "2020-01-01"
+
+def test_missing_mapped_column_is_rejected():
+    with stub_workdir():
+        with open("bad.csv", "w", newline="") as f:
+            f.write("CRD Number,Firm Name\n1,Acme\n")
+        try:
+            import_csv("bad.csv", "csv_firms", COLUMNS, "crd_number")
+            raise AssertionError("a CSV without the mapped headers should be rejected")
+        except ValueError as e:
+            assert "AUM" in str(e)
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
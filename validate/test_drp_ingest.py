@@ -0,0 +1,68 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+from validate.offline_env import stub_workdir
+
+# Offline checks of the DRP ingest against the PostgREST stub: stale event rows
+# are deleted, their scores retired, and a retired event that comes back in a
+# later feed is scored again
+
+# --- Fixtures ---
+def advisor_feed(criminal_events):
+    # One advisor with a criminal DRP flag; no events means the flag-level row
+    events = "".join(
+        f"<CriminalEvent><Dt>2020-01-0{i + 1}</Dt><Desc>charge {i}</Desc></CriminalEvent>"
+        for i in range(criminal_events)
+    )
+    section = f"<Criminals>{events}</Criminals>" if criminal_events else ""
+    return (
+        '<IAPDIndividualReport><Indvls><Indvl><Info indvlPK="7001" firstNm="A" lastNm="B"/>'
+        f'<DRPs><DRP hasCriminal="Y"/></DRPs>{section}</Indvl></Indvls></IAPDIndividualReport>'
+    ).encode()
+
+def ingest(feed, feed_date):
+    import ingest.ingest_all_drp_events as drp
+    if os.path.exists(drp.CHECKPOINT_FILE):
+        os.remove(drp.CHECKPOINT_FILE)  # Each feed is a fresh nightly run
+    drp.ingest_drp_feed([feed], feed_date)
+
+def snapshot(supabase):
+    events = supabase.table("advisor_drp_events").select("event_seq,event_date").execute().data
+    scores = supabase.table("drp_event_scores").select("event_date").execute().data
+    rollups = supabase.table("advisor_drp_scores").select("crd,event_count").execute().data
+    return (
+        sorted((e["event_seq"], e["event_date"]) for e in events),
+        sorted(s["event_date"] or "" for s in scores),
+        {r["crd"]: r["event_count"] for r in rollups},
+    )
+
+# --- Tests ---
+def test_retired_event_is_scored_again_when_it_returns():
+    with stub_workdir():
+        from storage.clients import supabase
+        from storage.event_id_index import EventIdIndex
+
+        ingest(advisor_feed(0), "2026-10-01")
+        assert snapshot(supabase) == ([(0, None)], [""], {"7001": 1})
+
+        # Detailed events replace the flag-level row and retire its score
+        ingest(advisor_feed(2), "2026-10-02")
+        assert snapshot(supabase) == (
+            [(0, "2020-01-01"), (1, "2020-01-02")], ["2020-01-01", "2020-01-02"], {"7001": 2},
+        )
+
+        # The detail section disappears: seq 1 is deleted, both detailed scores
+        # are retired and the flag-level event, retired before, is scored again
+        ingest(advisor_feed(0), "2026-10-03")
+        assert snapshot(supabase) == ([(0, None)], [""], {"7001": 1})
+
+        index = EventIdIndex()
+        assert len(index) == 1
+        index.close()
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
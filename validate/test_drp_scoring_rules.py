@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+from bench.synthetic_feeds import drp_event_records
+from scoring.rules import RULESETS, compile_rules
+
+# Offline checks that the columnar batch scorer gives exactly what the
+# per-event scorer gives, for every published rule version
+
+# --- Fixtures ---
+EDGE_CASES = [
+    {"flag_type": "hasCriminal", "description": None},
+    {"flag_type": "hasCriminal", "description": ""},
+    {"flag_type": "hasNoSuchFlag", "description": "fraud"},
+    {"flag_type": None, "event_type": "hasBond", "description": "Unauthorized trading"},  # Previously scored row
+    {"flag_type": "hasRegAction", "description": "FRAUD, unauthorized trades and client harm"},
+    {"flag_type": "hasCustComp", "description": "loss"},
+    {"flag_type": "hasCustComp", "description": "fraud\nloss"},  # Keyword right after a newline
+    {"flag_type": "hasCustComp", "description": "fraudfraud"},
+    {"flag_type": "hasCustComp", "description": "no keywords here"},
+]
+
+def assert_batch_matches(rules, events):
+    bases, adjusteds, reasons = rules.score_batch(events)
+    assert len(bases) == len(adjusteds) == len(reasons) == len(events)
+    for event, base, adjusted, reason in zip(events, bases, adjusteds, reasons):
+        assert (base, adjusted, reason) == rules.score_event(event), event
+
+# --- Tests ---
+def test_batch_matches_per_event_on_synthetic_events():
+    events = drp_event_records(5000)
+    for version in RULESETS:
+        assert_batch_matches(compile_rules(version), events)
+
+def test_batch_matches_per_event_on_edge_cases():
+    for version in RULESETS:
+        rules = compile_rules(version)
+        assert_batch_matches(rules, EDGE_CASES)
+        # Page boundaries must not change a result
+        for event in EDGE_CASES:
+            assert_batch_matches(rules, [event])
+
+def test_empty_batch():
+    assert compile_rules().score_batch([]) == ([], [], [])
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
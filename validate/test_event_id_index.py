@@ -0,0 +1,151 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+import hashlib
+import json
+import tempfile
+from storage.event_id_index import MIN_BLOOM_BITS, EventIdIndex
+from validate.offline_env import stub_workdir
+
+# Offline checks of the local scored-event ID index: the sorted digest file,
+# its Bloom filter and the metadata survive save/load, and membership is exact
+
+# --- Helpers ---
+def event_ids(start, stop):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(start, stop)]
+
+def index_path(root):
+    return os.path.join(root, "drp_event_ids.bin")
+
+# --- Tests ---
+def test_empty_index():
+    with tempfile.TemporaryDirectory() as root:
+        index = EventIdIndex(index_path(root))
+        assert not index.exists()
+        assert len(index) == 0
+        assert event_ids(0, 1)[0] not in index
+
+def test_save_and_load_roundtrip():
+    with tempfile.TemporaryDirectory() as root:
+        path = index_path(root)
+        index = EventIdIndex(path)
+        index.update(event_ids(0, 3000))
+        index.save(scored_at_watermark="2026-10-01T00:00:00")
+        index.update(event_ids(2000, 5000))  # Overlaps the stored IDs
+        assert len(index) == 5000
+        index.save(scored_at_watermark="2026-10-02T00:00:00")
+        index.close()
+
+        index = EventIdIndex(path)
+        assert index.exists()
+        assert len(index) == 5000
+        assert index.meta == {"scored_at_watermark": "2026-10-02T00:00:00", "count": 5000}
+        assert all(event_id in index for event_id in event_ids(0, 5000))
+        assert not any(event_id in index for event_id in event_ids(5000, 10000))
+
+        # The digest file stays sorted and free of duplicates
+        with open(path, "rb") as f:
+            data = f.read()
+        digests = [data[i:i + 32] for i in range(0, len(data), 32)]
+        assert digests == sorted(set(digests))
+        index.close()
+
+def test_bloom_filter_grows_and_keeps_membership():
+    with tempfile.TemporaryDirectory() as root:
+        path = index_path(root)
+        index = EventIdIndex(path)
+        many = event_ids(0, 150000)  # Past MIN_BLOOM_BITS / BLOOM_BITS_PER_ID
+        index.update(many)
+        index.save()
+        index.close()
+
+        index = EventIdIndex(path)
+        assert os.path.getsize(path + ".bloom") * 8 >= MIN_BLOOM_BITS
+        assert index._bloom_bits >= len(many) * 10
+        assert all(event_id in index for event_id in many[::97])
+
+        # Nearly every absent ID is rejected by the filter alone
+        absent = event_ids(150000, 160000)
+        passed = sum(index._bloom_contains(bytes.fromhex(event_id)) for event_id in absent)
+        assert passed < len(absent) * 0.02
+        assert not any(event_id in index for event_id in absent)
+        index.close()
+
+def test_stale_bloom_is_rebuilt():
+    # A filter left behind by an interrupted save must never hide stored IDs
+    with tempfile.TemporaryDirectory() as root:
+        path = index_path(root)
+        index = EventIdIndex(path)
+        index.update(event_ids(0, 100))
+        index.save()
+        with open(path + ".bloom", "rb") as f:
+            old_bloom = f.read()
+        index.update(event_ids(100, 200))
+        index.save()
+        index.close()
+
+        with open(path + ".bloom", "wb") as f:
+            f.write(old_bloom)
+        with open(path + ".json", "w") as f:
+            json.dump({"count": 100}, f)
+
+        index = EventIdIndex(path)
+        assert all(event_id in index for event_id in event_ids(0, 200))
+        index.close()
+
+def test_discard_removes_ids_across_save():
+    with tempfile.TemporaryDirectory() as root:
+        path = index_path(root)
+        index = EventIdIndex(path)
+        index.update(event_ids(0, 1000))
+        index.save()
+        index.update(event_ids(1000, 1100))
+        index.discard(event_ids(0, 1000)[::2] + event_ids(1000, 1050) + event_ids(5000, 5010))
+        assert len(index) == 550
+        assert event_ids(0, 1)[0] not in index
+        assert event_ids(1, 2)[0] in index
+
+        # A discarded ID that is added again is kept
+        index.add(event_ids(0, 1)[0])
+        assert event_ids(0, 1)[0] in index
+        index.save()
+        index.close()
+
+        index = EventIdIndex(path)
+        kept = set(event_ids(0, 1000)[1::2] + event_ids(1050, 1100) + event_ids(0, 1))
+        assert len(index) == len(kept) == index.meta["count"]
+        assert all((event_id in index) == (event_id in kept) for event_id in event_ids(0, 1100))
+
+        index.discard(list(kept))
+        index.save()
+        assert len(index) == 0
+        assert os.path.getsize(path) == 0
+        index.close()
+
+def test_load_fetches_only_new_ids():
+    with stub_workdir() as server:
+        from scoring.event_scores import load_event_id_index
+        from storage.clients import supabase
+
+        def score_rows(ids, scored_at):
+            return [{"event_id": event_id, "crd": "1", "scored_at": scored_at} for event_id in ids]
+
+        supabase.table("drp_event_scores").upsert(score_rows(event_ids(0, 2500), "2026-01-01T00:00:00"), on_conflict="event_id").execute()
+        index = load_event_id_index(supabase)
+        assert len(index) == 2500
+        index.close()
+
+        supabase.table("drp_event_scores").upsert(score_rows(event_ids(2500, 2600), "2999-01-01T00:00:00"), on_conflict="event_id").execute()
+        before = server.state.stats["GET drp_event_scores rows"]
+        index = load_event_id_index(supabase)
+        assert len(index) == 2600
+        fetched = server.state.stats["GET drp_event_scores rows"] - before
+        assert fetched <= 101  # The 100 new rows plus the range-split probe
+        index.close()
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,134 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import tempfile
+from bench.postgrest_stub import start_stub
+from bench.writer_throughput import point_clients_at
+from ingest.extract_adv_text import (
+    KEYWORD_FLAGS, advisor_flags, crd_from_key, extract_pdf, process_chunk, scan_keywords, write_advisor_flags,
+)
+from storage.object_store import LocalObjectStore
+
+# Offline checks of the ADV keyword extraction against small generated PDFs,
+# stored the way populate_advisor_advs stores reports (adv_pdfs/{advisor crd}.pdf)
+
+# --- Fixtures ---
+def make_pdf(text):
+    # Minimal one-page PDF with `text` in a standard Type1 font
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+REPORTS = {
+    "adv_pdfs/101.pdf": "We act as a fiduciary to our clients",
+    "adv_pdfs/102.pdf": "A fee-only planner",
+    "adv_pdfs/103.pdf": "Nothing relevant here",
+    "adv_pdfs/104.pdf": "A fee-only planner",  # Same bytes as 102
+}
+
+def write_reports(root):
+    os.makedirs(os.path.join(root, "adv_pdfs"))
+    for key, text in REPORTS.items():
+        with open(os.path.join(root, key), "wb") as f:
+            f.write(make_pdf(text))
+    return LocalObjectStore(root)
+
+def empty_cache():
+    return {"keys": {}, "documents": {}, "advisors": {}}
+
+def run_chunk(keys, store, cache, extract_pool_class=ThreadPoolExecutor):
+    with ThreadPoolExecutor(max_workers=2) as download_pool, extract_pool_class(max_workers=2) as extract_pool:
+        return process_chunk(keys, store, cache, download_pool, extract_pool)
+
+# --- Tests ---
+def test_crd_from_key():
+    assert crd_from_key("adv_pdfs/1394280.pdf") == 1394280
+    assert crd_from_key("adv_pdfs/1394280_test.pdf") is None
+
+def test_scan_keywords():
+    assert scan_keywords("Our FIDUCIARIES act fee - only") == {"mentions_fiduciary": True, "mentions_fee_only": True}
+    assert scan_keywords("fiduciarylike fees only") == dict.fromkeys(KEYWORD_FLAGS, False)
+
+def test_extract_pdf():
+    key, digest, flags, error = extract_pdf(("adv_pdfs/101.pdf", "d", make_pdf(REPORTS["adv_pdfs/101.pdf"])))
+    assert (key, digest, error) == ("adv_pdfs/101.pdf", "d", None)
+    assert flags == {"mentions_fiduciary": True, "mentions_fee_only": False}
+
+    _, _, flags, error = extract_pdf(("adv_pdfs/bad.pdf", "d", b"not a pdf"))
+    assert flags is None and error
+
+def test_process_chunk_caches_by_content():
+    with tempfile.TemporaryDirectory() as root:
+        store = write_reports(root)
+        keys = sorted(store.list_keys("adv_pdfs/"))
+        cache = empty_cache()
+
+        extracted, skipped = run_chunk(keys, store, cache)
+        assert (extracted, skipped) == (3, 0)  # 102 and 104 share one extraction
+        assert set(cache["keys"]) == set(REPORTS)
+        assert cache["keys"]["adv_pdfs/102.pdf"] == cache["keys"]["adv_pdfs/104.pdf"]
+
+        assert run_chunk(keys, store, cache) == (0, 4)
+
+def test_process_chunk_in_worker_processes():
+    # The stage's real extract pool: jobs and results are pickled across processes
+    with tempfile.TemporaryDirectory() as root:
+        store = write_reports(root)
+        keys = sorted(store.list_keys("adv_pdfs/"))
+        cache = empty_cache()
+
+        assert run_chunk(keys, store, cache, ProcessPoolExecutor) == (3, 0)
+        assert advisor_flags(keys, cache)[101] == {"mentions_fiduciary": True, "mentions_fee_only": False}
+
+def test_flags_are_written_per_advisor():
+    server = start_stub()
+    point_clients_at(server.url)
+    try:
+        from storage.clients import supabase
+        supabase.table("advisor_advs").upsert(
+            [{"crd": crd, "adv_url": f"u{crd}"} for crd in (101, 102, 103)], on_conflict="crd"
+        ).execute()
+
+        with tempfile.TemporaryDirectory() as root:
+            store = write_reports(root)
+            keys = sorted(store.list_keys("adv_pdfs/"))
+            cache = empty_cache()
+            run_chunk(keys, store, cache)
+
+            # 104 has no advisor_advs row, so it is left for a later run
+            assert write_advisor_flags(keys, cache, {101, 102, 103}) == 3
+            assert write_advisor_flags(keys, cache, {101, 102, 103}) == 0
+
+        rows = supabase.table("advisor_advs").select("*").order("crd").execute().data
+        assert [(r["crd"], r["adv_url"], r["mentions_fiduciary"], r["mentions_fee_only"]) for r in rows] == [
+            (101, "u101", True, False),
+            (102, "u102", False, True),
+            (103, "u103", False, False),
+        ]
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
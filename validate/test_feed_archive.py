@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+import tempfile
+from storage.feed_archive import (
+    archive_records, list_partitions, read_manifest, read_partition, restore_partitions, upload_pending_partitions,
+)
+from storage.object_store import LocalObjectStore
+
+# Offline checks of the feed archive: a failed upload never fails the ingest
+# and is retried on the next write, and the local copy keeps only what the
+# next run reads
+
+# --- Fixtures ---
+class FlakyStore(LocalObjectStore):
+    # Directory store whose uploads fail while `down` is set, like an S3 outage
+    down = False
+
+    def put_file(self, local_path, key, content_type=None):
+        if self.down:
+            return False
+        return super().put_file(local_path, key, content_type)
+
+def advisors(n, day):
+    return [{"crd_number": str(i), "status": "active", "last_updated": day} for i in range(n)]
+
+# --- Tests ---
+def test_failed_upload_is_retried_and_local_copy_pruned():
+    import storage.feed_archive as feed_archive
+    with tempfile.TemporaryDirectory() as root:
+        local, remote = os.path.join(root, "archive"), os.path.join(root, "store")
+        store = FlakyStore(remote)
+        remote = os.path.join(remote, "archive")  # STORE_PREFIX
+        archive_store = feed_archive.archive_store
+        feed_archive.archive_store = lambda: store
+        try:
+            archive_records("advisors", "2026-10-01", advisors(3, "2026-10-01"), root=local)
+            store.down = True
+            archive_records("advisors", "2026-10-02", advisors(4, "2026-10-02"), root=local)
+            archive_records("advisors", "2026-10-03", advisors(5, "2026-10-03"), root=local)
+            # The outage kept both new partitions locally; the uploaded one is gone
+            assert list_partitions("advisors", local) == ["2026-10-02", "2026-10-03"]
+            assert list_partitions("advisors", remote) == ["2026-10-01"]
+
+            store.down = False
+            archive_records("advisors", "2026-10-04", advisors(6, "2026-10-04"), root=local)
+            assert list_partitions("advisors", local) == ["2026-10-04"]
+            assert list_partitions("advisors", remote) == ["2026-10-01", "2026-10-02", "2026-10-03", "2026-10-04"]
+            assert read_partition("advisors", "2026-10-02", ["crd_number"], remote) == {"crd_number": ["0", "1", "2", "3"]}
+
+            # Restored partitions count as uploaded and are not sent again
+            assert restore_partitions("advisors", local, store) == ["2026-10-01", "2026-10-02", "2026-10-03"]
+            assert read_manifest("advisors", "2026-10-01", local)["uploaded_at"]
+            store.down = True
+            assert upload_pending_partitions("advisors", local, store) == []
+            assert list_partitions("advisors", local) == ["2026-10-04"]
+        finally:
+            feed_archive.archive_store = archive_store
+
+def test_no_store_keeps_everything_local():
+    import storage.feed_archive as feed_archive
+    with tempfile.TemporaryDirectory() as root:
+        archive_store = feed_archive.archive_store
+        feed_archive.archive_store = lambda: None
+        try:
+            archive_records("advisors", "2026-10-01", advisors(2, "2026-10-01"), root=root)
+            archive_records("advisors", "2026-10-02", advisors(2, "2026-10-02"), root=root)
+            assert list_partitions("advisors", root) == ["2026-10-01", "2026-10-02"]
+        finally:
+            feed_archive.archive_store = archive_store
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+import random
+import tempfile
+from storage.name_index import ADVISOR, FIRM, REMOVED, NameIndex, build_name_index
+
+# Offline checks of the trigram name index: an index maintained by incremental
+# builds (renames, removals, new names, reused slots) holds exactly what a
+# full rebuild from the same names holds, and answers searches the same way
+
+# --- Fixtures ---
+FIRST = ["John", "Mary", "O'Brien", "José", "Li", "Anne-Marie", "Robert", "Priya", "Chen", "Sam"]
+LAST = ["Smith", "Johnson", "García", "Nguyen", "Smithson", "Patel", "Kowalski", "Brown", "Lee", "Okafor"]
+FIRM_WORDS = ["Capital", "Wealth", "Advisors", "Partners", "Group", "Financial", "Trust", "Planning"]
+
+def advisor_name(rng):
+    suffix = rng.choice(["", "", " Jr.", " CFP"])
+    return f"{rng.choice(FIRST)} {rng.choice(LAST)}{suffix}"
+
+def firm_name(rng):
+    return f"The {rng.choice(LAST)} {rng.choice(FIRM_WORDS)} {rng.choice(['LLC', 'Inc', 'LP', ''])}".strip()
+
+def initial_entries(rng, advisors=2000, firms=400):
+    entries = {(ADVISOR, crd): advisor_name(rng) for crd in range(1, advisors + 1)}
+    entries.update({(FIRM, crd): firm_name(rng) for crd in range(1, firms + 1)})
+    return entries
+
+def next_feed(rng, entries):
+    # Renames, removals and new names, as between two nightly feeds
+    entries = dict(entries)
+    keys = sorted(entries)
+    for key in rng.sample(keys, 150):
+        entries[key] = advisor_name(rng) if key[0] == ADVISOR else firm_name(rng)
+    for key in rng.sample(keys, 100):
+        entries.pop(key, None)
+    top = max(crd for kind, crd in entries if kind == ADVISOR)
+    for crd in range(top + 1, top + 120):
+        entries[(ADVISOR, crd)] = advisor_name(rng)
+    # A name that was removed earlier comes back under its old CRD
+    entries[(FIRM, 1)] = "Smith Wealth Partners LLC"
+    return entries
+
+def as_feed(entries):
+    # (kind, crd, name) triples, with a duplicate the builder must ignore
+    triples = [(kind, crd, name) for (kind, crd), name in entries.items()]
+    return triples + [(triples[0][0], triples[0][1], "ignored duplicate")]
+
+def contents(index):
+    # Doc ids differ between builds; compare by (kind, crd) instead
+    docs = {}
+    by_id = {}
+    for doc_id, (kind, crd, name, gram_count) in index.docs():
+        by_id[doc_id] = (kind, crd)
+        if kind != REMOVED:
+            docs[(kind, crd)] = (name, gram_count)
+    postings = {}
+    for gram, start, count in index.grams():
+        ids = list(index._postings[start:start + count])
+        assert ids == sorted(set(ids)), gram
+        assert all(by_id[i][0] != REMOVED for i in ids), gram
+        postings[gram] = sorted(by_id[i] for i in ids)
+    return docs, postings
+
+# --- Tests ---
+def test_incremental_build_equals_full_rebuild():
+    rng = random.Random(48)
+    with tempfile.TemporaryDirectory() as root:
+        incremental = os.path.join(root, "incremental.bin")
+        full = os.path.join(root, "full.bin")
+        entries = initial_entries(rng)
+        assert build_name_index(as_feed(entries), path=incremental) == len(entries)
+
+        for _ in range(4):
+            entries = next_feed(rng, entries)
+            assert build_name_index(as_feed(entries), path=incremental) > 0
+            build_name_index(as_feed(entries), path=full, full=True)
+
+            a, b = NameIndex(incremental), NameIndex(full)
+            assert contents(a) == contents(b)
+            for query in ("smith", "john smi", "garcia", "obrien", "patel capital", "wealth partners"):
+                assert sorted(a.search(query, k=25)) == sorted(b.search(query, k=25)), query
+            a.close()
+            b.close()
+
+def test_unchanged_feed_rewrites_nothing():
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "names.bin")
+        entries = initial_entries(rng, advisors=300, firms=50)
+        build_name_index(as_feed(entries), path=path, built_at="first")
+        modified = os.path.getmtime(path)
+        assert build_name_index(as_feed(entries), path=path, built_at="second") == 0
+        assert os.path.getmtime(path) == modified
+
+        index = NameIndex(path)
+        assert index.meta["built_at"] == "first"
+        assert index.search("the smith group llc", kind="firm")[0][1] == "firm"
+        index.close()
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -8,12 +8,15 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from storage.write_drp_events_to_supabase import write_drp_events_to_supabase
+from ingest.feed_sampler import sample_feed_xml
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+SAMPLE_INDIVIDUALS = 2000  # Advisors read from the head of the feed; enough to find 10 DRPs
+
 friendly_names = {
     "hasRegAction": "Regulatory Action",
     "hasCriminal": "Criminal Disclosure",
@@ -87,7 +90,10 @@ def parse_drp_events(xml_contents, limit=10):
 
 if __name__ == "__main__":
     feed_url = get_advisor_feed_url()
-    xml_files = download_and_extract_xml(feed_url)
+    if "--full" in sys.argv:
+        xml_files = download_and_extract_xml(feed_url)
+    else:
+        xml_files = [sample_feed_xml(feed_url, SAMPLE_INDIVIDUALS)]
     test_batch = parse_drp_events(xml_files, limit=10)
 
     print(f"\n🧪 Previewing {len(test_batch)} DRP entries:")
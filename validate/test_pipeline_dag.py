@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+import copy
+from pipeline.dag import Stage, run_stages
+
+# Offline checks of the nightly stage graph: stages whose inputs did not change
+# are skipped, a failure blocks its dependents, and the next run resumes from
+# the failure without rerunning what already succeeded
+
+# --- Fixtures ---
+def build_graph(ran, failing=()):
+    # feed -> ingest -> (rollup, index); report runs on its own input only
+    def stage(name):
+        def run(ctx):
+            if name in failing:
+                raise RuntimeError(f"{name} broke")
+            ran.append(name)
+        return run
+    return [
+        Stage("feed", stage("feed"), inputs=lambda ctx: ctx["feed_hash"]),
+        Stage("ingest", stage("ingest"), deps=("feed",)),
+        Stage("rollup", stage("rollup"), deps=("ingest",)),
+        Stage("index", stage("index"), deps=("ingest",)),
+        Stage("report", stage("report"), inputs=lambda ctx: ctx["week"]),
+    ]
+
+def run(state, ctx, failing=(), force=()):
+    ran = []
+    saved = []
+    status = run_stages(build_graph(ran, failing), state, ctx, lambda s: saved.append(copy.deepcopy(s)), force=force)
+    return status, sorted(ran), saved
+
+# --- Tests ---
+def test_unchanged_inputs_are_skipped():
+    state = {"stages": {}}
+    ctx = {"feed_hash": "a", "week": "2026-W42"}
+    status, ran, _ = run(state, ctx)
+    assert set(status.values()) == {"succeeded"}
+    assert ran == ["feed", "index", "ingest", "report", "rollup"]
+
+    status, ran, _ = run(state, ctx)
+    assert set(status.values()) == {"skipped"}
+    assert ran == []
+
+    # A new feed reruns the feed branch only; report's own input is unchanged
+    ctx["feed_hash"] = "b"
+    status, ran, _ = run(state, ctx)
+    assert ran == ["feed", "index", "ingest", "rollup"]
+    assert status["report"] == "skipped"
+
+    # Forced stages run even when nothing changed
+    status, ran, _ = run(state, ctx, force=("report",))
+    assert ran == ["report"]
+
+def test_failure_blocks_dependents():
+    state = {"stages": {}}
+    status, ran, saved = run(state, {"feed_hash": "a", "week": "w"}, failing=("ingest",))
+    assert status == {"feed": "succeeded", "ingest": "failed", "rollup": "blocked", "index": "blocked", "report": "succeeded"}
+    assert ran == ["feed", "report"]
+    assert state["stages"]["ingest"]["error"] == "RuntimeError: ingest broke"
+    assert "key" not in state["stages"]["rollup"]
+    # State is saved after every stage, so a killed run still leaves a record
+    assert len(saved) == len(status)
+
+def test_resume_after_failure():
+    state = {"stages": {}}
+    ctx = {"feed_hash": "a", "week": "w"}
+    run(state, ctx)
+    ctx["feed_hash"] = "b"
+    run(state, ctx, failing=("rollup",))
+    assert state["stages"]["rollup"]["status"] == "failed"
+
+    # Same inputs: only the failed stage runs again
+    status, ran, _ = run(state, ctx)
+    assert ran == ["rollup"]
+    assert status == {"feed": "skipped", "ingest": "skipped", "rollup": "succeeded", "index": "skipped", "report": "skipped"}
+
+    # A blocked stage keeps its last good key and runs once its dependency recovers
+    ctx["feed_hash"] = "c"
+    status, ran, _ = run(state, ctx, failing=("ingest",))
+    assert status["index"] == "blocked" and state["stages"]["index"]["status"] == "blocked"
+    status, ran, _ = run(state, ctx)
+    assert ran == ["index", "ingest", "rollup"]  # feed already succeeded on "c"
+    assert status["index"] == "succeeded"
+
+def test_unknown_dependency_and_cycle_are_rejected():
+    for stages in (
+        [Stage("a", print, deps=("missing",))],
+        [Stage("a", print, deps=("b",)), Stage("b", print, deps=("a",))],
+    ):
+        try:
+            run_stages(stages, {"stages": {}}, {}, lambda s: None)
+            raise AssertionError("an invalid graph should be rejected")
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add repo root to path
+
+import sqlite3
+import time
+from datetime import timedelta
+from validate.offline_env import stub_workdir
+
+# Offline checks of the local sqlite mirror against the PostgREST stub: a cold
+# refresh copies the table, later refreshes pull only rows whose changed_at
+# moved, prune drops rows deleted remotely, and a mirror built before a column
+# existed is rebuilt
+
+# --- Fixtures ---
+def advisor(crd, name, last_updated):
+    # The stub stamps changed_at like the sql/008 trigger
+    return {
+        "crd_number": crd, "advisor_name": name, "firm_crd_number": crd % 7, "firm_name": f"Firm {crd % 7}",
+        "status": "active", "has_disclosures": False, "disclosures_count": 0, "last_updated": last_updated,
+    }
+
+def seed(supabase, n=2500):
+    rows = [advisor(crd, f"Advisor {crd}", "2026-10-01") for crd in range(1, n + 1)]
+    supabase.table("advisors").upsert(rows, on_conflict="crd_number").execute()
+    return rows
+
+def local_names(conn):
+    return dict(conn.execute("SELECT crd_number, advisor_name FROM advisors").fetchall())
+
+# --- Tests ---
+def test_incremental_refresh_pulls_only_changed_rows():
+    import storage.supabase_mirror as supabase_mirror
+    with stub_workdir() as server:
+        from storage.clients import supabase
+        from storage.supabase_mirror import mirror_state, refresh_mirror
+        seed(supabase)
+
+        # No safety margin, so rows written seconds apart fall on either side
+        margin = supabase_mirror.WATERMARK_SAFETY_MARGIN
+        supabase_mirror.WATERMARK_SAFETY_MARGIN = timedelta(0)
+        try:
+            conn = refresh_mirror(["advisors"], path="storage/mirror.sqlite")
+            assert len(local_names(conn)) == 2500
+            assert mirror_state(conn, "advisors")["row_count"] == 2500
+            conn.close()
+            time.sleep(0.01)
+
+            # The nightly upsert re-stamps last_updated on every row; only
+            # three changed in content
+            rows = [advisor(crd, f"Advisor {crd}", "2026-10-02") for crd in range(1, 2501)]
+            for row in rows[:3]:
+                row["advisor_name"] += " Jr"
+            supabase.table("advisors").upsert(rows, on_conflict="crd_number").execute()
+
+            before = server.state.stats["GET advisors rows"]
+            conn = refresh_mirror(["advisors"], path="storage/mirror.sqlite")
+            assert server.state.stats["GET advisors rows"] - before == 3 + 1  # Plus the row-count probe
+            names = local_names(conn)
+            assert names[1] == "Advisor 1 Jr" and names[4] == "Advisor 4"
+            assert len(names) == 2500
+            conn.close()
+        finally:
+            supabase_mirror.WATERMARK_SAFETY_MARGIN = margin
+
+def test_prune_drops_rows_deleted_remotely():
+    with stub_workdir():
+        from storage.clients import supabase
+        from storage.supabase_mirror import refresh_mirror
+        seed(supabase)
+        refresh_mirror(["advisors"], path="storage/mirror.sqlite").close()
+
+        deleted = list(range(100, 200))
+        supabase.table("advisors").delete().in_("crd_number", deleted).execute()
+
+        # Deletes never move a watermark: a plain refresh keeps the rows
+        conn = refresh_mirror(["advisors"], path="storage/mirror.sqlite")
+        assert len(local_names(conn)) == 2500
+        conn.close()
+
+        conn = refresh_mirror(["advisors"], prune=True, path="storage/mirror.sqlite")
+        names = local_names(conn)
+        assert len(names) == 2400
+        assert not set(deleted) & set(names)
+        conn.close()
+
+        conn = refresh_mirror(["advisors"], full=True, path="storage/mirror.sqlite")
+        assert local_names(conn) == names
+        conn.close()
+
+def test_mirror_without_new_column_is_refilled():
+    with stub_workdir():
+        from storage.clients import supabase
+        from storage.supabase_mirror import mirror_state, refresh_mirror
+        seed(supabase, 50)
+
+        # A mirror from before changed_at existed, with a watermark that would
+        # otherwise skip every row
+        old = sqlite3.connect("storage/mirror.sqlite")
+        old.execute("CREATE TABLE _mirror_state (table_name TEXT PRIMARY KEY, watermark TEXT, refreshed_at TEXT, row_count INTEGER)")
+        old.execute("INSERT INTO _mirror_state VALUES ('advisors', '2999-01-01', '2999-01-01', 0)")
+        old.execute("CREATE TABLE advisors (crd_number, advisor_name, firm_crd_number, firm_name, status, "
+                    "has_disclosures, disclosures_count, last_updated, PRIMARY KEY (crd_number))")
+        old.commit()
+        old.close()
+
+        conn = refresh_mirror(["advisors"], path="storage/mirror.sqlite")
+        assert len(local_names(conn)) == 50
+        assert conn.execute("SELECT COUNT(*) FROM advisors WHERE changed_at IS NOT NULL").fetchone()[0] == 50
+        assert mirror_state(conn, "advisors")["watermark"] < "2999"
+        conn.close()
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -1,69 +1,30 @@
-import pandas as pd
-from supabase import create_client, Client
-from dotenv import load_dotenv
 import os
-
-# ✅ Load environment variables
-load_dotenv(dotenv_path="/Users/markford/Documents/Trustgap/trustgap-ingestion/validate/.env")
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-print("Key loaded:", SUPABASE_KEY[:20], "...")  # Safe preview
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Missing SUPABASE_URL or SUPABASE_KEY in .env")
-
-# ✅ Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# ✅ Load CSV
-df = pd.read_csv("firm_data.csv")
-
-# ✅ Standardize column names and fill in missing fields
-df = df.rename(columns={
-    "Record ID": "airtable_id",
-    "CRD Number": "crd_number",
-    "Firm Name": "firm_name",
-    "SEC Registration Type": "registration_type"
-})
-
-df["adv_part2_url"] = None
-df["adv_part2_text"] = None
-df["disclosure_summary"] = None
-df["mentions_fiduciary"] = None
-df["mentions_fee_only"] = None
-
-# ✅ Clean data
-df = df.dropna(subset=["crd_number"])
-df["crd_number"] = pd.to_numeric(df["crd_number"], errors="coerce").astype("Int64")
-
-# ✅ Final column order
-df = df[[
-    "crd_number",
-    "firm_name",
-    "registration_type",
-    "adv_part2_url",
-    "adv_part2_text",
-    "disclosure_summary",
-    "mentions_fiduciary",
-    "mentions_fee_only"
-]]
-
-# ✅ Drop rows with missing CRD and ensure numeric type
-df = df.dropna(subset=["crd_number"])
-df["crd_number"] = pd.to_numeric(df["crd_number"], errors="coerce").astype("Int64")
-
-# ✅ Drop duplicate CRD rows (required for Supabase upsert)
-df = df.drop_duplicates(subset=["crd_number"])
-
-# ✅ Convert to records
-records = df.to_dict(orient="records")
-print(f"Total records prepared: {len(records)}")  # Optional: debug log
-
-# ✅ Upload in batches
-BATCH_SIZE = 50
-for i in range(0, len(records), BATCH_SIZE):
-    batch = records[i:i+BATCH_SIZE]
-    res = supabase.table("firm_data").upsert(batch, on_conflict=["crd_number"]).execute()
-    print(f"Uploaded {len(batch)} records: {i}–{i+len(batch)-1}")
-
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from storage.csv_import import import_csv, load_env_file
+
+# Loads the Airtable "Firm Data" CSV export into firm_data.
+#   python validate/upload_firm_data.py [path/to/firm_data.csv] [--env-file path/to/.env]
+# Only the columns below are written; ADV text and the other pipeline-filled
+# firm_data columns keep their current values.
+
+VALIDATE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(VALIDATE_DIR, "firm_data.csv")
+DEFAULT_ENV_FILE = os.path.join(VALIDATE_DIR, ".env")
+
+# (CSV header, firm_data column, type)
+FIRM_COLUMNS = [
+    ("CRD Number", "crd_number", "int"),
+    ("Firm Name", "firm_name", "str"),
+    ("SEC Registration Type", "registration_type", "str"),
+]
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--env-file" not in args and os.path.exists(DEFAULT_ENV_FILE):
+        args += ["--env-file", DEFAULT_ENV_FILE]
+    load_env_file(args)
+
+    positional = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] != "--env-file")]
+    stats = import_csv(positional[0] if positional else DEFAULT_CSV, "firm_data", FIRM_COLUMNS, key="crd_number")
+    sys.exit(1 if stats["failed_batches"] else 0)